@@ -3,11 +3,15 @@
 from enum import Enum
 from typing import Optional
 from pydantic import BaseModel
+import asyncio
+import time
 import structlog
 
+from app.config import get_settings
 from app.database import db
 
 logger = structlog.get_logger()
+settings = get_settings()
 
 
 class ActionType(str, Enum):
@@ -20,6 +24,7 @@ class ActionType(str, Enum):
     UNSET_MOBILE_PRIMARY = "unset_mobile_primary"
     DELETE_CONTACT = "delete_contact"
     MERGE_CONTACTS = "merge_contacts"
+    MERGE_CONTACT_CLUSTER = "merge_contact_cluster"
 
     # Company actions
     LINK_COMPANY = "link_company"
@@ -57,6 +62,7 @@ class Action(BaseModel):
     # Merge actions
     merge_into_id: Optional[str] = None
     delete_id: Optional[str] = None
+    delete_ids: Optional[list[str]] = None  # Cluster merges
 
     # Deal/intro data
     deal_data: Optional[dict] = None
@@ -137,6 +143,13 @@ async def execute_action(action: Action) -> ActionResult:
             result = await db.merge_contacts(action.merge_into_id, action.delete_id)
             return ActionResult(success=True, message="Contacts merged", data=result)
 
+        elif action.type == ActionType.MERGE_CONTACT_CLUSTER:
+            if not action.merge_into_id or not action.delete_ids:
+                return ActionResult(success=False, message="Missing merge_into_id or delete_ids")
+
+            result = await db.merge_contact_cluster(action.merge_into_id, action.delete_ids)
+            return ActionResult(success=True, message=f"Merged {len(result['deleted'])} contacts", data=result)
+
         elif action.type == ActionType.LINK_COMPANY:
             if not action.contact_id or not action.company_id:
                 return ActionResult(success=False, message="Missing contact_id or company_id")
@@ -203,6 +216,171 @@ async def execute_action(action: Action) -> ActionResult:
         return ActionResult(success=False, message=str(e))
 
 
+def action_log_entry(action: Action, triggered_by: str = "user") -> dict:
+    """agent_action_log row for an executed action."""
+    # Determine entity_type and entity_id based on action type
+    if action.type.value in ['merge_contacts', 'merge_contact_cluster', 'delete_contact']:
+        entity_type = "contact"
+        entity_id = action.merge_into_id or action.delete_id or action.contact_id
+    elif action.type.value in ['merge_companies', 'fix_company_domain']:
+        entity_type = "company"
+        entity_id = action.company_id or action.merge_into_id
+    elif action.contact_id:
+        entity_type = "contact"
+        entity_id = action.contact_id
+    elif action.company_id:
+        entity_type = "company"
+        entity_id = action.company_id
+    else:
+        entity_type = "contact"
+        entity_id = None
+
+    return {
+        "action_type": action.type.value,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "after_data": action.dict(),
+        "triggered_by": triggered_by,
+    }
+
+
+# ==================== PARALLEL EXECUTION ====================
+
+# Actions that remove an entity (or fold it into another) - they run after
+# everything else that references the same entities
+DESTRUCTIVE_ACTIONS = {
+    ActionType.DELETE_CONTACT,
+    ActionType.MERGE_CONTACTS,
+    ActionType.MERGE_CONTACT_CLUSTER,
+    ActionType.MERGE_COMPANIES,
+}
+
+CONTACT_REMOVING_ACTIONS = {
+    ActionType.DELETE_CONTACT,
+    ActionType.MERGE_CONTACTS,
+    ActionType.MERGE_CONTACT_CLUSTER,
+}
+
+
+def action_entities(action: Action) -> set[tuple[str, str]]:
+    """Entities an action reads or writes, as (kind, id) keys."""
+    keys = set()
+    if action.contact_id:
+        keys.add(("contact", action.contact_id))
+    if action.company_id:
+        keys.add(("company", action.company_id))
+    if action.mobile_id:
+        keys.add(("mobile", action.mobile_id))
+    if action.deal_id:
+        keys.add(("deal", action.deal_id))
+    for contact_id in action.intro_contacts or []:
+        keys.add(("contact", contact_id))
+
+    if action.type in CONTACT_REMOVING_ACTIONS:
+        for entity_id in (action.merge_into_id, action.delete_id, *(action.delete_ids or [])):
+            if entity_id:
+                keys.add(("contact", entity_id))
+    elif action.type == ActionType.MERGE_COMPANIES:
+        for entity_id in (action.merge_into_id, action.delete_id):
+            if entity_id:
+                keys.add(("company", entity_id))
+    return keys
+
+
+def build_action_graph(actions: list[Action]) -> tuple[list[int], dict[int, set[int]]]:
+    """
+    Order actions and work out which must wait for which.
+
+    Destructive actions are moved after the others (keeping relative order),
+    then each action depends on every earlier action sharing an entity with
+    it. Contact merges/deletes also wait for all mobile actions, since an
+    Action doesn't say which contact a mobile belongs to.
+
+    Returns:
+        (execution order as indexes into actions, {index: indexes it depends on})
+    """
+    order = sorted(range(len(actions)), key=lambda i: actions[i].type in DESTRUCTIVE_ACTIONS)
+    entities = {i: action_entities(actions[i]) for i in order}
+
+    depends_on = {i: set() for i in order}
+    for position, i in enumerate(order):
+        removes_contact = actions[i].type in CONTACT_REMOVING_ACTIONS
+        for j in order[:position]:
+            if entities[i] & entities[j]:
+                depends_on[i].add(j)
+            elif removes_contact and any(kind == "mobile" for kind, _ in entities[j]):
+                depends_on[i].add(j)
+    return order, depends_on
+
+
+def _execute_blocking(action: Action) -> ActionResult:
+    """Run an action on its own event loop (db calls block, so each gets a thread)."""
+    return asyncio.run(execute_action(action))
+
+
+async def execute_actions_parallel(
+    actions: list[Action],
+    max_concurrency: int | None = None,
+    triggered_by: str = "user",
+) -> list[dict]:
+    """
+    Execute a batch of actions, running independent ones concurrently.
+
+    Actions on disjoint entities run in parallel (up to max_concurrency);
+    actions sharing an entity keep their order, and merges/deletes run after
+    the actions that reference their entities. All action-log rows are
+    written in one insert at the end.
+
+    Returns:
+        one result per action, in input order, with timing and dependency info
+    """
+    max_concurrency = max_concurrency or settings.action_max_concurrency
+    order, depends_on = build_action_graph(actions)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    finished = {i: asyncio.Event() for i in order}
+    results: dict[int, dict] = {}
+    batch_started = time.perf_counter()
+
+    async def run(i: int):
+        action = actions[i]
+        try:
+            for j in depends_on[i]:
+                await finished[j].wait()
+            async with semaphore:
+                started = time.perf_counter()
+                result = await asyncio.to_thread(_execute_blocking, action)
+                elapsed = time.perf_counter() - started
+            results[i] = {
+                "action": action.description,
+                "success": result.success,
+                "message": result.message,
+                "depends_on": sorted(depends_on[i]),
+                "started_ms": round((started - batch_started) * 1000, 2),
+                "duration_ms": round(elapsed * 1000, 2),
+            }
+        finally:
+            finished[i].set()
+
+    await asyncio.gather(*(run(i) for i in order))
+
+    # One insert for the whole batch (logging failures don't fail the actions)
+    try:
+        await db.log_actions([action_log_entry(actions[i], triggered_by) for i in order])
+    except Exception as log_error:
+        logger.warning("action_log_failed", error=str(log_error), count=len(actions))
+
+    total_ms = round((time.perf_counter() - batch_started) * 1000, 2)
+    logger.info(
+        "actions_executed",
+        count=len(actions),
+        successful=sum(1 for r in results.values() if r["success"]),
+        duration_ms=total_ms,
+        sequential_ms=round(sum(r["duration_ms"] for r in results.values()), 2),
+        max_concurrency=max_concurrency,
+    )
+    return [results[i] for i in range(len(actions))]
+
+
 def audit_to_actions(audit_result: dict) -> list[Action]:
     """Convert audit result to executable actions."""
     actions = []
@@ -218,6 +396,7 @@ def audit_to_actions(audit_result: dict) -> list[Action]:
         ))
 
     # Contact duplicates
+    merges = []
     for dup in audit_result.get("contact_duplicates", []):
         if dup.get("action") == "delete":
             actions.append(Action(
@@ -226,12 +405,26 @@ def audit_to_actions(audit_result: dict) -> list[Action]:
                 description=f"Delete duplicate: {dup.get('name')}"
             ))
         elif dup.get("action") == "merge":
-            actions.append(Action(
-                type=ActionType.MERGE_CONTACTS,
-                merge_into_id=audit_result.get("contact", {}).get("contact_id"),
-                delete_id=dup.get("contact_id"),
-                description=f"Merge '{dup.get('name')}' into master contact"
-            ))
+            merges.append(dup)
+
+    # Several duplicates of the same person are folded into the master in one pass
+    master_id = audit_result.get("contact", {}).get("contact_id")
+    if len(merges) > 1:
+        actions.append(Action(
+            type=ActionType.MERGE_CONTACT_CLUSTER,
+            merge_into_id=master_id,
+            delete_ids=[dup.get("contact_id") for dup in merges],
+            description=f"Merge {len(merges)} duplicates into master contact: "
+                        + ", ".join(f"'{dup.get('name')}'" for dup in merges)
+        ))
+    elif merges:
+        dup = merges[0]
+        actions.append(Action(
+            type=ActionType.MERGE_CONTACTS,
+            merge_into_id=master_id,
+            delete_id=dup.get("contact_id"),
+            description=f"Merge '{dup.get('name')}' into master contact"
+        ))
 
     # Mobile issues - handle different action types
     for issue in audit_result.get("mobiles", {}).get("issues", []):
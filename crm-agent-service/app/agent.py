@@ -66,6 +66,21 @@ class CRMAgent:
         """
         logger.info("analyzing_email", email_id=email_data.get("id"), from_email=email_data.get("from_email"))
 
+        from app.triage import email_triage
+
+        # Newsletters and automated mail never reach the model; transactional
+        # and personal mail from a person get a shorter loop over less text.
+        triage = await email_triage.triage(email_data) if settings.triage_enabled else None
+        if triage and triage["action"] == "skip":
+            return await self._skip_analysis(email_data, triage)
+
+        from app.email_text import prepare_email_body
+
+        max_loops, budget = 15, settings.analyze_body_tokens
+        if triage and triage["action"] == "downgrade":
+            max_loops, budget = settings.triage_downgrade_max_loops, settings.triage_downgrade_body_tokens
+        body = prepare_email_body(email_data.get("body_text") or email_data.get("snippet") or "", budget) or "(no content)"
+
         from_email = email_data.get("from_email", "")
         from_name = email_data.get("from_name", "")
         domain = extract_domain_from_email(from_email)
@@ -78,7 +93,7 @@ class CRMAgent:
 **Date:** {email_data.get("date", "unknown")}
 
 **Email Content:**
-{email_data.get("body_text") or email_data.get("snippet") or "(no content)"}
+{body}
 
 ---
 
@@ -109,7 +124,6 @@ Use the source_email_id "{email_data.get("id")}" when creating suggestions.
             )
 
             loop_count = 0
-            max_loops = 15
 
             while response.stop_reason == "tool_use" and loop_count < max_loops:
                 loop_count += 1
@@ -172,6 +186,7 @@ Use the source_email_id "{email_data.get("id")}" when creating suggestions.
                 "suggestions_created": len(suggestions_created),
                 "suggestion_ids": suggestions_created,
                 "message": final_message,
+                "triage": triage,
             }
 
         except Exception as e:
@@ -182,128 +197,194 @@ Use the source_email_id "{email_data.get("id")}" when creating suggestions.
                 "contact_found": False,
                 "suggestions_created": 0,
                 "message": f"Error analyzing email: {str(e)}",
+                "triage": triage,
             }
 
+    async def _skip_analysis(self, email_data: dict, triage: dict) -> dict:
+        """Result for an email triaged as not worth a model call: sender lookup only."""
+        from app.database import db
+
+        contact = await db.get_contact_by_email(email_data.get("from_email") or "")
+        return {
+            "success": True,
+            "email_id": email_data.get("id"),
+            "contact_found": contact is not None,
+            "contact_id": contact.get("contact_id") if contact else None,
+            "suggestions_created": 0,
+            "suggestion_ids": [],
+            "message": f"Skipped model analysis: {triage['category']} email ({', '.join(triage['reasons']) or 'keywords'})",
+            "triage": triage,
+        }
+
     async def run_duplicate_scan(self, limit: int = 100) -> dict:
         """
         Scan contacts for potential duplicates.
 
+        Only contacts created or changed since the previous scan are compared,
+        against the persistent match index (see app.match_index); limit caps
+        how many changed contacts one run takes. Pairwise matches are unioned
+        into clusters (see app.clusters), so a person with N records yields
+        one suggestion and one merge instead of a suggestion per pair.
+
         Returns:
             dict with scan results
         """
         logger.info("starting_duplicate_scan", limit=limit)
 
-        from app.database import db
-
-        contacts = await db.get_all_contacts_for_dedup(limit)
-        logger.info("loaded_contacts_for_scan", count=len(contacts))
-
-        suggestions_created = 0
-        scanned = 0
+        from app.match_index import match_index
+        from app.suggestion_index import suggestion_index
 
-        for contact in contacts:
-            scanned += 1
-            contact_id = contact.get("contact_id")
+        # Only contacts new/changed since the last run are compared (against the index)
+        candidates, index_stats = await match_index.process_changes(limit)
+        scanned = index_stats["changed_contacts"]
 
-            # Find potential duplicates
-            duplicates = await db.find_potential_duplicates(contact_id)
+        await suggestion_index.refresh()
+        report = await self.suggest_duplicates(candidates)
+        suggestions_created = report["created"]
+        logger.info("duplicate_scan_complete", scanned=scanned, **report)
 
-            if not duplicates:
-                continue
-
-            # Get full contact details for analysis
-            full_contact = await db.get_contact_by_id(contact_id)
-            if not full_contact:
-                continue
+        return {
+            "success": True,
+            "scanned": scanned,
+            "suggestions_created": suggestions_created,
+            "write_errors": report["failed"],
+            "message": f"Scanned {scanned} contacts, created {suggestions_created} duplicate suggestions",
+        }
 
-            for dupe in duplicates:
-                dupe_id = dupe.get("contact_id")
-                match_type = dupe.get("match_type")
+    async def suggest_duplicates(self, candidates: list[dict]) -> dict:
+        """
+        Turn duplicate edges into suggestions.
 
-                # Skip if already have a suggestion for this pair
-                exists = await db.check_existing_suggestion("duplicate", contact_id, dupe_id)
-                if exists:
-                    continue
+        Pairs that already have a pending suggestion (either direction) are
+        dropped using the pair index, which the caller loads. The rest are
+        clustered and written in bulk.
 
-                # Also check reverse direction
-                exists_reverse = await db.check_existing_suggestion("duplicate", dupe_id, contact_id)
-                if exists_reverse:
-                    continue
+        Returns:
+            dict with pairs, clusters and the SuggestionWriter report
+        """
+        from app.database import db
+        from app.clusters import resolve_clusters
+        from app.suggestion_index import suggestion_index
+        from app.suggestion_writer import SuggestionWriter
 
-                # Get duplicate contact details
-                dupe_contact = await db.get_contact_by_id(dupe_id)
-                if not dupe_contact:
+        edges = {}
+        for edge in candidates:
+            if suggestion_index.exists("duplicate", edge["a"], edge["b"]):
+                continue
+            edges[frozenset((edge["a"], edge["b"]))] = edge
+
+        clusters = await resolve_clusters(list(edges.values()))
+
+        contact_cache = {}
+        async with SuggestionWriter() as writer:
+            for cluster in clusters:
+                members = {}
+                for member_id in cluster.member_ids:
+                    if member_id not in contact_cache:
+                        contact_cache[member_id] = await db.get_contact_by_id(member_id)
+                    if contact_cache[member_id]:
+                        members[member_id] = contact_cache[member_id]
+                if cluster.survivor_id not in members or len(members) < 2:
                     continue
 
-                # Calculate confidence based on match type
-                if match_type == "exact_email":
-                    confidence = 0.95
-                    priority = "high"
-                    short_reason = "Same email"
-                elif match_type == "exact_name":
-                    confidence = 0.75
-                    priority = "medium"
-                    short_reason = "Same name"
-                elif match_type == "mobile":
-                    confidence = 0.85
-                    priority = "high"
-                    short_reason = "Same phone"
-                else:
-                    confidence = 0.6
-                    priority = "low"
-                    short_reason = "Similar info"
-
-                # Create suggestion
-                suggestion = {
-                    "suggestion_type": "duplicate",
+                await writer.add(_cluster_suggestion(cluster, members), {
+                    "action_type": "suggestion_created",
                     "entity_type": "contact",
-                    "primary_entity_id": contact_id,
-                    "secondary_entity_id": dupe_id,
-                    "confidence_score": confidence,
-                    "priority": priority,
-                    "suggestion_data": {
-                        "match_type": match_type,
-                        "match_value": dupe.get("match_value"),
-                        "short_reason": short_reason,
-                        "primary_contact": {
-                            "contact_id": contact_id,
-                            "first_name": full_contact.get("first_name"),
-                            "last_name": full_contact.get("last_name"),
-                            "emails": [e.get("email") for e in full_contact.get("contact_emails", [])],
-                            "mobiles": [m.get("mobile") for m in full_contact.get("contact_mobiles", [])],
-                        },
-                        "duplicate_contact": {
-                            "contact_id": dupe_id,
-                            "first_name": dupe_contact.get("first_name"),
-                            "last_name": dupe_contact.get("last_name"),
-                            "emails": [e.get("email") for e in dupe_contact.get("contact_emails", [])],
-                            "mobiles": [m.get("mobile") for m in dupe_contact.get("contact_mobiles", [])],
-                        },
-                    },
-                    "agent_reasoning": f"Found {match_type} match: {dupe.get('match_value')}",
-                    "source_description": "Scheduled duplicate scan",
-                }
-
-                result = await db.create_suggestion(suggestion)
-                if result:
-                    suggestions_created += 1
-                    await db.log_action({
-                        "action_type": "suggestion_created",
-                        "suggestion_id": result["id"],
-                        "entity_type": "contact",
-                        "entity_id": contact_id,
-                        "triggered_by": "system",
-                    })
-
-        logger.info("duplicate_scan_complete", scanned=scanned, suggestions=suggestions_created)
-
+                    "entity_id": cluster.survivor_id,
+                    "triggered_by": "system",
+                })
+
+        return {"pairs": len(edges), "clusters": len(clusters), **writer.report()}
+
+
+def _match_confidence(match_type: str) -> tuple[float, str, str]:
+    """(confidence, priority, short_reason) for a duplicate match type."""
+    if match_type == "exact_email":
+        return 0.95, "high", "Same email"
+    elif match_type == "exact_name":
+        return 0.75, "medium", "Same name"
+    elif match_type == "mobile":
+        return 0.85, "high", "Same phone"
+    return 0.6, "low", "Similar info"
+
+
+def _contact_summary(contact_id: str, contact: dict) -> dict:
+    return {
+        "contact_id": contact_id,
+        "first_name": contact.get("first_name"),
+        "last_name": contact.get("last_name"),
+        "emails": [e.get("email") for e in contact.get("contact_emails", [])],
+        "mobiles": [m.get("mobile") for m in contact.get("contact_mobiles", [])],
+    }
+
+
+def _cluster_suggestion(cluster, members: dict) -> dict:
+    """
+    Suggestion for a duplicate cluster.
+
+    Two-member clusters keep the pairwise "duplicate" format (survivor as
+    primary). Larger ones become a single "duplicate_cluster" suggestion whose
+    merge_action folds every member into the survivor in one pass.
+    """
+    from app.actions import Action, ActionType
+
+    survivor_id = cluster.survivor_id
+    # A chain of matches is only as strong as its weakest link
+    weakest = min(cluster.edges, key=lambda e: _match_confidence(e["match_type"])[0])
+    confidence, priority, short_reason = _match_confidence(weakest["match_type"])
+    merge_ids = [m for m in cluster.merge_ids if m in members]
+
+    if len(merge_ids) == 1:
+        dupe_id = merge_ids[0]
         return {
-            "success": True,
-            "scanned": scanned,
-            "suggestions_created": suggestions_created,
-            "message": f"Scanned {scanned} contacts, created {suggestions_created} duplicate suggestions",
+            "suggestion_type": "duplicate",
+            "entity_type": "contact",
+            "primary_entity_id": survivor_id,
+            "secondary_entity_id": dupe_id,
+            "confidence_score": confidence,
+            "priority": priority,
+            "suggestion_data": {
+                "match_type": weakest["match_type"],
+                "match_value": weakest["match_value"],
+                "short_reason": short_reason,
+                "primary_contact": _contact_summary(survivor_id, members[survivor_id]),
+                "duplicate_contact": _contact_summary(dupe_id, members[dupe_id]),
+            },
+            "agent_reasoning": f"Found {weakest['match_type']} match: {weakest['match_value']}",
+            "source_description": "Scheduled duplicate scan",
         }
 
+    survivor = members[survivor_id]
+    survivor_name = f"{survivor.get('first_name') or ''} {survivor.get('last_name') or ''}".strip()
+    merge_action = Action(
+        type=ActionType.MERGE_CONTACT_CLUSTER,
+        merge_into_id=survivor_id,
+        delete_ids=merge_ids,
+        description=f"Merge {len(merge_ids)} duplicates into {survivor_name}",
+    )
+    return {
+        "suggestion_type": "duplicate_cluster",
+        "entity_type": "contact",
+        "primary_entity_id": survivor_id,
+        "confidence_score": confidence,
+        "priority": priority,
+        "suggestion_data": {
+            "short_reason": f"{len(merge_ids) + 1} records for one person",
+            "primary_contact": _contact_summary(survivor_id, survivor),
+            "duplicate_contacts": [_contact_summary(m, members[m]) for m in merge_ids],
+            "matches": [
+                {"a": e["a"], "b": e["b"], "match_type": e["match_type"], "match_value": e["match_value"]}
+                for e in cluster.edges
+            ],
+            "completeness": cluster.completeness,
+            "merge_action": merge_action.dict(),
+        },
+        "agent_reasoning": "; ".join(
+            f"{e['match_type']} match: {e['match_value']}" for e in cluster.edges
+        ),
+        "source_description": "Scheduled duplicate scan",
+    }
+
 
 # Singleton instance
 agent = CRMAgent()
@@ -0,0 +1,412 @@
+"""Bulk Apollo enrichment jobs for contacts on the enrichment worklist."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+import time
+from typing import AsyncIterator
+from urllib.parse import urlparse
+import uuid
+
+import httpx
+import structlog
+
+from app.config import get_settings
+from app.database import db
+from app.name_index import fold_name
+from app.signature import PERSONAL_DOMAINS
+from app.tools import extract_domain_from_email, normalize_email
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+BULK_MATCH_PATH = "/api/v1/people/bulk_match"
+TERMINAL_STATUSES = ("completed", "failed")
+MAX_FINISHED_JOBS = 50  # finished jobs kept in memory for the status endpoint
+
+# Fields reported by the status endpoint and progress stream
+PROGRESS_FIELDS = (
+    "id", "status", "missing", "category", "selected", "skipped", "unmatchable", "cached",
+    "requested", "api_calls", "matched", "no_match", "failed", "written", "error",
+    "created_at", "updated_at", "finished_at",
+)
+COUNTERS = ("selected", "skipped", "unmatchable", "cached", "requested", "api_calls", "matched", "no_match", "failed", "written")
+
+
+def job_progress(job: dict) -> dict:
+    return {k: job.get(k) for k in PROGRESS_FIELDS}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _domain(url: str | None) -> str | None:
+    if not url:
+        return None
+    netloc = urlparse(url if "://" in url else f"https://{url}").netloc.lower()
+    return netloc.removeprefix("www.") or None
+
+
+def _linkedin_slug(url: str | None) -> str | None:
+    """"https://www.linkedin.com/in/Jane-Doe/" -> "linkedin.com/in/jane-doe"."""
+    if not url:
+        return None
+    path = url.lower().split("://")[-1].removeprefix("www.").rstrip("/")
+    return path or None
+
+
+def match_details(contact: dict) -> dict | None:
+    """
+    The Apollo bulk_match entry for a contact (primary email and company
+    first), or None when there is not enough to match on: an email, a
+    LinkedIn URL, or a full name with a company.
+    """
+    emails = sorted(contact.get("contact_emails") or [], key=lambda e: not e.get("is_primary"))
+    email = next((normalize_email(e["email"]) for e in emails if e.get("email")), None)
+    links = sorted(contact.get("contact_companies") or [], key=lambda c: not c.get("is_primary"))
+    company = next((c["companies"] for c in links if c.get("companies")), {})
+    email_domain = extract_domain_from_email(email) if email else None
+
+    details = {
+        "first_name": (contact.get("first_name") or "").strip(),
+        "last_name": (contact.get("last_name") or "").strip(),
+        "email": email,
+        "linkedin_url": (contact.get("linkedin") or "").strip(),
+        "organization_name": (company.get("name") or "").strip(),
+        "domain": _domain(company.get("website")) or (email_domain if email_domain not in PERSONAL_DOMAINS else None),
+    }
+    details = {k: v for k, v in details.items() if v}
+    full_name = details.get("first_name") and details.get("last_name")
+    if not (email or details.get("linkedin_url") or (full_name and (details.get("organization_name") or details.get("domain")))):
+        return None
+    return details
+
+
+def match_key(details: dict) -> str:
+    """Cache key of a lookup: the email, else the LinkedIn URL, else name plus company."""
+    if details.get("email"):
+        return f"email:{details['email']}"
+    if details.get("linkedin_url"):
+        return f"linkedin:{_linkedin_slug(details['linkedin_url'])}"
+    name = fold_name(f"{details.get('first_name', '')} {details.get('last_name', '')}")
+    return f"name:{name}|{details.get('domain') or fold_name(details.get('organization_name', ''))}"
+
+
+def _identities(record: dict) -> set[str]:
+    keys = set()
+    if record.get("email"):
+        keys.add(f"email:{normalize_email(record['email'])}")
+    if record.get("linkedin_url"):
+        keys.add(f"linkedin:{_linkedin_slug(record['linkedin_url'])}")
+    name = fold_name(f"{record.get('first_name') or ''} {record.get('last_name') or ''}")
+    if len(name.split()) >= 2:
+        keys.add(f"name:{name}")
+    return keys
+
+
+def align_matches(details: list[dict], matches: list[dict | None]) -> list[dict | None]:
+    """
+    One person (or None) per details entry. Apollo answers in request order
+    with null for misses; if it drops misses instead, pair by email,
+    LinkedIn or full name.
+    """
+    if len(matches) == len(details):
+        return matches
+    by_identity = {}
+    for person in matches:
+        for key in _identities(person or {}):
+            by_identity.setdefault(key, person)
+    return [next((by_identity[k] for k in _identities(d) if k in by_identity), None) for d in details]
+
+
+def summarize_person(person: dict) -> dict:
+    """The fields of an Apollo person the CRM uses, in the /contact/enrich data shape."""
+    org = person.get("organization") or {}
+    return {
+        "apollo_id": person.get("id"),
+        "first_name": person.get("first_name"),
+        "last_name": person.get("last_name"),
+        "job_title": person.get("title"),
+        "linkedin_url": person.get("linkedin_url"),
+        "photo_url": person.get("photo_url"),
+        "email": person.get("email"),
+        "city": person.get("city"),
+        "state": person.get("state"),
+        "country": person.get("country"),
+        "phones": [
+            {"number": p.get("sanitized_number") or p.get("raw_number"), "type": p.get("type", "unknown")}
+            for p in person.get("phone_numbers") or []
+        ],
+        "organization": {
+            "name": org.get("name"),
+            "website": org.get("website_url"),
+            "domain": org.get("primary_domain"),
+            "linkedin_url": org.get("linkedin_url"),
+            "industry": org.get("industry"),
+            "employee_count": org.get("estimated_num_employees"),
+        },
+        "seniority": person.get("seniority"),
+        "departments": person.get("departments") or [],
+    }
+
+
+class RateLimiter:
+    """Spaces calls at least 60 / per_minute seconds apart; pause() holds everyone back after a 429."""
+
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / max(per_minute, 1)
+        self.next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            delay = self.next_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_at = time.monotonic() + self.interval
+
+    def pause(self, seconds: float) -> None:
+        self.next_at = max(self.next_at, time.monotonic() + seconds)
+
+
+class ApolloEnrichmentJobs:
+    """
+    Enriches worklist contacts through Apollo's bulk people match.
+
+    A job walks the completeness worklist (least complete first) for
+    contacts missing the requested fields (linkedin and job_role by
+    default), passing over those already processed in
+    apollo_enrichment_inbox, and works through up to limit of them in
+    chunks: lookups answered from apollo_match_cache (apollo_cache_ttl_days)
+    cost nothing, and the rest go to bulk_match in groups of
+    apollo_bulk_batch_size, spaced to
+    apollo_requests_per_minute with at most apollo_max_concurrency calls in
+    flight and retried on 429 / 5xx (honouring Retry-After). Each chunk ends
+    with one cache upsert and one inbox upsert (status enriched / no_match /
+    unmatchable / failed plus the matched profile in apollo_data).
+
+    Progress lives in memory on the worker running the job. A job stopped
+    by a restart is simply started again: processed contacts are skipped
+    and fetched lookups come from the cache, so nothing is paid for twice.
+    """
+
+    def __init__(self, chunk_size: int = 100):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.jobs: dict[str, dict] = {}
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.changed: dict[str, asyncio.Event] = {}
+        self.limiter = RateLimiter(settings.apollo_requests_per_minute)
+        self.semaphore = asyncio.Semaphore(settings.apollo_max_concurrency)
+
+    def _publish(self, job: dict) -> None:
+        job["updated_at"] = _now()
+        event = self.changed.pop(job["id"], None)
+        if event:
+            event.set()
+
+    def _prune(self) -> None:
+        finished = [j for j in self.jobs.values() if j["status"] in TERMINAL_STATUSES]
+        for job in sorted(finished, key=lambda j: j["created_at"])[:-MAX_FINISHED_JOBS]:
+            self.jobs.pop(job["id"], None)
+
+    async def start(
+        self,
+        missing: list[str] | None = None,
+        category: str | None = None,
+        limit: int | None = None,
+        force: bool = False,
+    ) -> dict:
+        """Create a job and start it in the background."""
+        job = {
+            "id": str(uuid.uuid4()),
+            "status": "queued",
+            "missing": list(missing or ("linkedin", "job_role")),
+            "category": category,
+            "limit": limit or settings.apollo_job_max_contacts,
+            "force": force,
+            **{counter: 0 for counter in COUNTERS},
+            "error": None,
+            "created_at": _now(),
+            "updated_at": _now(),
+            "finished_at": None,
+        }
+        self._prune()
+        self.jobs[job["id"]] = job
+        self.tasks[job["id"]] = asyncio.create_task(self._run(job))
+        self.tasks[job["id"]].add_done_callback(lambda _: self.tasks.pop(job["id"], None))
+        logger.info("apollo_enrichment_job_started", job_id=job["id"], missing=job["missing"], limit=job["limit"])
+        return job
+
+    async def shutdown(self) -> None:
+        for task in list(self.tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+
+    async def _run(self, job: dict) -> None:
+        from app.completeness import completeness_worklist
+
+        try:
+            job["status"] = "running"
+            self._publish(job)
+            await completeness_worklist.ensure_loaded()
+
+            # Walk down the worklist until limit unprocessed contacts are done:
+            # processed ones stay on it (no_match, or not yet applied) and
+            # must not use up the limit
+            offset, remaining = 0, job["limit"]
+            async with httpx.AsyncClient(base_url=settings.apollo_base_url, timeout=30.0) as client:
+                while remaining > 0:
+                    page = completeness_worklist.worklist(
+                        missing=job["missing"], category=job["category"], limit=self.chunk_size, offset=offset
+                    )
+                    contact_ids = [item["contact_id"] for item in page["items"]]
+                    if not contact_ids:
+                        break
+                    offset += len(contact_ids)
+                    contact_ids = (await self._unprocessed(job, contact_ids))[:remaining]
+                    if contact_ids:
+                        job["selected"] += len(contact_ids)
+                        remaining -= len(contact_ids)
+                        await self._run_chunk(client, job, contact_ids)
+                    self._publish(job)
+
+            job["status"] = "completed"
+            logger.info("apollo_enrichment_job_complete", **job_progress(job))
+        except asyncio.CancelledError:
+            job["status"], job["error"] = "failed", "Cancelled"
+            raise
+        except Exception as e:
+            logger.error("apollo_enrichment_job_failed", job_id=job["id"], error=str(e))
+            job["status"], job["error"] = "failed", str(e)
+        finally:
+            job["finished_at"] = _now()
+            self._publish(job)
+
+    async def _unprocessed(self, job: dict, contact_ids: list[str]) -> list[str]:
+        """contact_ids without a processed apollo_enrichment_inbox row (all of them with force)."""
+        if job["force"]:
+            return contact_ids
+        processed = {
+            r["contact_id"] for r in await self.db.get_apollo_inbox_rows(contact_ids) if r.get("processed_at")
+        }
+        job["skipped"] += len(processed)
+        return [c for c in contact_ids if c not in processed]
+
+    async def _run_chunk(self, client: httpx.AsyncClient, job: dict, contact_ids: list[str]) -> None:
+        """Match one chunk of contacts and write its cache and inbox rows."""
+        contacts = await self.db.get_contacts_for_enrichment(contact_ids)
+
+        rows, lookups = [], {}  # lookups: contact_id -> (match key, details)
+        for contact in contacts:
+            details = match_details(contact)
+            if details is None:
+                rows.append(self._inbox_row(contact["contact_id"], "unmatchable", error="No email, LinkedIn or name with company"))
+                job["unmatchable"] += 1
+            else:
+                lookups[contact["contact_id"]] = (match_key(details), details)
+
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.apollo_cache_ttl_days)
+        keys = list({key for key, _ in lookups.values()})
+        results = {r["match_key"]: r["person"] for r in await self.db.get_apollo_match_cache(keys, cutoff.isoformat())}
+        job["cached"] += sum(1 for key, _ in lookups.values() if key in results)
+
+        to_fetch = {}
+        for key, details in lookups.values():
+            if key not in results:
+                to_fetch.setdefault(key, details)
+        job["requested"] += len(to_fetch)
+        items = list(to_fetch.items())
+        size = settings.apollo_bulk_batch_size
+        batches = [items[i:i + size] for i in range(0, len(items), size)]
+        outcomes = await asyncio.gather(
+            *(self._bulk_match(client, job, [details for _, details in batch]) for batch in batches),
+            return_exceptions=True,
+        )
+
+        errors, cache_rows, fetched_at = {}, [], _now()
+        for batch, outcome in zip(batches, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.warning("apollo_bulk_match_error", job_id=job["id"], error=str(outcome))
+                errors.update({key: str(outcome)[:500] or type(outcome).__name__ for key, _ in batch})
+                continue
+            for (key, _), person in zip(batch, outcome):
+                results[key] = summarize_person(person) if person else None
+                cache_rows.append({"match_key": key, "person": results[key], "fetched_at": fetched_at})
+        await self.db.upsert_apollo_match_cache(cache_rows)
+
+        for contact_id, (key, _) in lookups.items():
+            if key in errors:
+                rows.append(self._inbox_row(contact_id, "failed", error=errors[key]))
+                job["failed"] += 1
+            elif results.get(key):
+                rows.append(self._inbox_row(contact_id, "enriched", data=results[key]))
+                job["matched"] += 1
+            else:
+                rows.append(self._inbox_row(contact_id, "no_match"))
+                job["no_match"] += 1
+        await self.db.upsert_apollo_inbox_rows(rows)
+        job["written"] += len(rows)
+
+    @staticmethod
+    def _inbox_row(contact_id: str, status: str, data: dict = None, error: str = None) -> dict:
+        # Failed and unmatchable contacts stay unprocessed, so the next job retries them
+        done = status in ("enriched", "no_match")
+        return {
+            "contact_id": contact_id,
+            "status": status,
+            "processed_at": _now() if done else None,
+            "error_message": error,
+            "apollo_data": data,
+        }
+
+    async def _bulk_match(self, client: httpx.AsyncClient, job: dict, details: list[dict]) -> list[dict | None]:
+        """One bulk_match call, retried on rate limits, server errors and network failures."""
+        for attempt in range(settings.apollo_max_retries + 1):
+            last = attempt == settings.apollo_max_retries
+            async with self.semaphore:
+                await self.limiter.wait()
+                job["api_calls"] += 1
+                try:
+                    response = await client.post(
+                        BULK_MATCH_PATH,
+                        params={"reveal_personal_emails": "false"},
+                        json={"details": details},
+                        headers={"X-Api-Key": settings.apollo_api_key or "", "Cache-Control": "no-cache"},
+                    )
+                except httpx.TransportError:
+                    if last:
+                        raise
+                    await asyncio.sleep(2 ** attempt)
+                    continue
+
+            if response.status_code == 429 or response.status_code >= 500:
+                if last:
+                    response.raise_for_status()
+                try:
+                    retry_after = float(response.headers.get("retry-after", ""))
+                except ValueError:
+                    retry_after = 2.0 ** attempt
+                logger.info("apollo_bulk_match_retry", status=response.status_code, retry_after=retry_after)
+                self.limiter.pause(retry_after)
+                continue
+            response.raise_for_status()
+            return align_matches(details, response.json().get("matches") or [])
+
+    async def get(self, job_id: str) -> dict | None:
+        return self.jobs.get(job_id)
+
+    async def watch(self, job_id: str) -> AsyncIterator[dict]:
+        """Yield the job's progress after every chunk, until it finishes."""
+        while True:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            yield job_progress(job)
+            if job["status"] in TERMINAL_STATUSES:
+                return
+            await self.changed.setdefault(job_id, asyncio.Event()).wait()
+
+
+# Singleton instance
+apollo_enrichment = ApolloEnrichmentJobs()
@@ -0,0 +1,83 @@
+"""Content-addressed attachment storage with deduplication."""
+
+import os
+import structlog
+
+from app.database import db
+from app.transfer import download_to_tempfile, upload_file_to_storage
+
+logger = structlog.get_logger()
+
+ATTACHMENTS_BUCKET = "whatsapp-attachments"
+
+
+def content_object_path(content_hash: str, file_name: str = "") -> str:
+    """Storage key for a blob: sharded by hash prefix, keeping the extension for downloads."""
+    ext = os.path.splitext(file_name or "")[1].lower()[:10]
+    return f"sha256/{content_hash[:2]}/{content_hash}{ext}"
+
+
+class AttachmentStore:
+    """
+    Stores attachment blobs once per unique content.
+
+    Every copy still gets its own attachments row (so it stays linked to its
+    message), but rows for the same content share one storage object and the
+    first copy's extracted text.
+    """
+
+    def __init__(self):
+        self.db = db
+        self.stats = {
+            "stored": 0,
+            "deduplicated": 0,
+            "bytes_uploaded": 0,
+            "bytes_saved": 0,
+        }
+
+    async def store_from_url(self, url: str, file_name: str, content_type: str) -> dict:
+        """
+        Download a file and store it under its content hash.
+
+        Returns the fields to put on the new attachments row: permanent_url,
+        file_size and content_hash, plus text_content/processed when a
+        previous copy already has extracted text.
+        """
+        async with download_to_tempfile(url, suffix=os.path.splitext(file_name)[1]) as (temp_path, metrics):
+            content_hash = metrics.content_hash
+            size = metrics.bytes_transferred
+            row = {"content_hash": content_hash, "file_size": size}
+
+            existing = await self.db.get_attachment_by_hash(content_hash)
+            if existing and existing.get("permanent_url"):
+                self.stats["deduplicated"] += 1
+                self.stats["bytes_saved"] += size
+                logger.info("attachment_deduplicated", content_hash=content_hash,
+                            file_name=file_name, size_bytes=size, **self.stats)
+                row["permanent_url"] = existing["permanent_url"]
+                if existing.get("text_content"):
+                    row["text_content"] = existing["text_content"]
+                    row["processed"] = True
+                    row["processed_at"] = existing.get("processed_at")
+                return row
+
+            object_path = content_object_path(content_hash, file_name)
+            created, upload_metrics = await upload_file_to_storage(
+                temp_path, ATTACHMENTS_BUCKET, object_path, content_type=content_type
+            )
+
+        if created:
+            self.stats["stored"] += 1
+            self.stats["bytes_uploaded"] += upload_metrics.bytes_transferred
+        else:
+            # Another request stored the same content first
+            self.stats["deduplicated"] += 1
+        logger.info("attachment_stored_by_hash", content_hash=content_hash, created=created,
+                    size_bytes=size, **self.stats)
+
+        row["permanent_url"] = self.db.client.storage.from_(ATTACHMENTS_BUCKET).get_public_url(object_path)
+        return row
+
+
+# Singleton instance
+attachment_store = AttachmentStore()
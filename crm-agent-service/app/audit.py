@@ -633,37 +633,18 @@ class ContactAuditor:
 
     def _analyze_communication(self, subject: str, body: str) -> CommunicationAnalysis:
         """Analyze email content to determine type and potential actions."""
-        text = f"{subject} {body}".lower()
-
-        # Check for deal indicators
-        deal_keywords = [
-            "investment", "funding", "round", "valuation", "term sheet",
-            "equity", "shares", "capital", "pitch", "deck", "proposal",
-            "partnership", "contract", "agreement", "deal"
-        ]
-        involves_deal = any(kw in text for kw in deal_keywords)
-
-        # Check for intro indicators
-        intro_keywords = [
-            "introduction", "introduce", "meet", "connect you with",
-            "putting you in touch", "cc'ing", "looping in", "wanted to connect"
-        ]
-        involves_intro = any(kw in text for kw in intro_keywords)
+        from app.triage import email_triage
+
+        # Same keyword sets as the /analyze-email triage, scanned in one pass
+        hits = email_triage.scan(f"{subject} {body}")
+        involves_deal = "deal" in hits
+        involves_intro = "intro" in hits
 
         # Determine type
-        personal_keywords = [
-            "family", "birthday", "christmas", "holiday", "vacation",
-            "dinner", "lunch", "kids", "school", "receipt", "order"
-        ]
-        transactional_keywords = [
-            "receipt", "invoice", "payment", "order", "confirmation",
-            "subscription", "renewal", "stripe", "paypal"
-        ]
-
-        if any(kw in text for kw in transactional_keywords):
+        if "transactional" in hits:
             comm_type = "transactional"
             summary = "Transactional email - no business action needed"
-        elif any(kw in text for kw in personal_keywords):
+        elif "personal" in hits:
             comm_type = "personal"
             summary = "Personal email - no business action needed"
         elif involves_deal or involves_intro:
@@ -0,0 +1,283 @@
+"""Incremental calendar sync from an ICS feed into command_center_inbox."""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Optional
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import uuid
+
+import httpx
+import structlog
+
+from app.config import get_settings
+from app.database import db
+from app.ics_parser import parse_feed_file
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+# Fields that make up an event's content hash (everything we write except bookkeeping)
+HASHED_FIELDS = (
+    "event_uid", "subject", "body_text", "date", "event_end",
+    "event_location", "from_name", "from_email", "to_recipients",
+    "recurrence_rule",
+)
+
+
+# ==================== HASHING ====================
+
+def record_hash(record: dict) -> str:
+    """Stable content hash of an event record."""
+    payload = json.dumps({k: record.get(k) for k in HASHED_FIELDS}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# ==================== FEED FETCH / PARSE ====================
+
+def sync_window(now: datetime = None) -> tuple[datetime, datetime]:
+    """[start, end] of the events kept in the inbox, aligned to whole UTC days."""
+    today = (now or datetime.now(timezone.utc)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (
+        today - timedelta(days=settings.calendar_window_past_days),
+        today + timedelta(days=settings.calendar_window_future_days),
+    )
+
+
+_parser_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_parser_pool() -> ProcessPoolExecutor:
+    """Worker process for ICS parsing (spawned, so it never inherits the server's threads)."""
+    global _parser_pool
+    if _parser_pool is None:
+        _parser_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    return _parser_pool
+
+
+def shutdown_parser_pool() -> None:
+    """Stop the parser worker (called on app shutdown)."""
+    global _parser_pool
+    if _parser_pool is not None:
+        _parser_pool.shutdown(wait=False, cancel_futures=True)
+        _parser_pool = None
+
+
+async def parse_in_worker(path: str, window_start: datetime, window_end: datetime) -> tuple[list[dict], dict]:
+    """Parse a feed file in the worker process, keeping the event loop free."""
+    global _parser_pool
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_parser_pool(), parse_feed_file, path, window_start, window_end)
+    except BrokenProcessPool:
+        # Worker died (e.g. OOM) - start a fresh one next time
+        _parser_pool = None
+        raise
+
+
+@asynccontextmanager
+async def fetch_feed(url: str, headers: dict) -> AsyncIterator[Optional[tuple[str, httpx.Headers, str]]]:
+    """
+    Stream an ICS feed to a temporary file.
+
+    Yields None when the server answers 304 Not Modified, otherwise
+    (temp_path, response_headers, sha256). The file is removed on exit.
+    """
+    max_bytes = settings.calendar_feed_max_bytes
+    fd, temp_path = tempfile.mkstemp(suffix=".ics")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            async with httpx.AsyncClient(timeout=settings.transfer_timeout, follow_redirects=True) as client:
+                async with client.stream("GET", url, headers=headers) as response:
+                    if response.status_code == 304:
+                        out.close()
+                        yield None
+                        return
+                    response.raise_for_status()
+                    digest = hashlib.sha256()
+                    size = 0
+                    async for chunk in response.aiter_bytes(settings.transfer_chunk_size):
+                        size += len(chunk)
+                        if size > max_bytes:
+                            raise ValueError(f"Calendar feed exceeds {max_bytes} bytes")
+                        digest.update(chunk)
+                        out.write(chunk)
+                    response_headers = response.headers
+        yield temp_path, response_headers, digest.hexdigest()
+    finally:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+
+
+# ==================== SYNC ENGINE ====================
+
+class CalendarSyncEngine:
+    """
+    Applies a parsed feed to command_center_inbox as a diff.
+
+    Existing calendar rows are loaded once with their content hashes, the
+    insert/update/delete sets are computed locally, and then written with
+    bulk upserts and batched deletes. Unchanged events cause no writes.
+
+    sync_feed() adds the fetch in front: the feed is revalidated with
+    ETag/Last-Modified (plus its content hash, for servers without
+    validators) and is only parsed - in a worker process, restricted to the
+    sync window - when it changed or the window moved to a new day.
+    """
+
+    def __init__(self, upsert_batch_size: int = 500, delete_batch_size: int = 200):
+        self.db = db
+        self.upsert_batch_size = upsert_batch_size
+        self.delete_batch_size = delete_batch_size
+        # Validators of the last successfully applied feed (in-process; a
+        # restart just costs one full fetch)
+        self.feed_state = {
+            "etag": None,
+            "last_modified": None,
+            "content_hash": None,
+            "window_start": None,
+            "last_checked_at": None,
+            "last_synced_at": None,
+        }
+
+    async def sync_feed(self, url: str) -> dict:
+        """
+        Fetch the ICS feed and apply it if it changed.
+
+        Returns:
+            sync stats; {"not_modified": True, ...} when the feed was skipped
+        """
+        window_start, window_end = sync_window()
+        state = self.feed_state
+        # Validators only apply to the same window - a new day must re-parse
+        # so events drift in and out of the window
+        same_window = state["window_start"] == window_start.isoformat()
+
+        headers = {}
+        if same_window and state["etag"]:
+            headers["If-None-Match"] = state["etag"]
+        if same_window and state["last_modified"]:
+            headers["If-Modified-Since"] = state["last_modified"]
+
+        state["last_checked_at"] = datetime.now(timezone.utc).isoformat()
+        window = {"window_start": window_start.isoformat(), "window_end": window_end.isoformat()}
+
+        async with fetch_feed(url, headers) as fetched:
+            if fetched is None:
+                logger.info("calendar_feed_not_modified", reason="304", etag=state["etag"])
+                return {"not_modified": True, **window}
+
+            path, response_headers, content_hash = fetched
+            if same_window and content_hash == state["content_hash"]:
+                logger.info("calendar_feed_not_modified", reason="content_hash", content_hash=content_hash)
+                return {"not_modified": True, **window}
+
+            records, parse_stats = await parse_in_worker(path, window_start, window_end)
+
+        dismissed_uids = await self.db.get_dismissed_event_uids()
+        stats = await self.sync(records, dismissed_uids)
+
+        # Only remember validators once the feed has actually been applied
+        state.update({
+            "etag": response_headers.get("etag"),
+            "last_modified": response_headers.get("last-modified"),
+            "content_hash": content_hash,
+            "window_start": window_start.isoformat(),
+            "last_synced_at": datetime.now(timezone.utc).isoformat(),
+        })
+
+        return {"not_modified": False, **window, **parse_stats, **stats}
+
+    async def sync(self, records: list[dict], dismissed_uids: set[str]) -> dict:
+        """
+        Sync parsed event records.
+
+        Args:
+            records: active (non-cancelled) event records from the feed;
+                rows for any other event_uid are deleted
+            dismissed_uids: UIDs the user dismissed - never re-inserted
+
+        Returns:
+            sync stats, including the writes and round-trips avoided
+        """
+        existing_rows, load_round_trips = await self.db.get_calendar_inbox_rows()
+
+        # Index existing rows by event_uid; extra rows for the same uid are stale
+        existing = {}
+        stale_ids = []
+        for row in existing_rows:
+            uid = row.get("event_uid")
+            if not uid:
+                continue
+            if uid in existing:
+                stale_ids.append(row["id"])
+            else:
+                existing[uid] = row
+
+        # If the feed repeats an event_uid, the last VEVENT wins
+        incoming = {}
+        skipped_dismissed = 0
+        for record in records:
+            if record["event_uid"] in dismissed_uids:
+                skipped_dismissed += 1
+                continue
+            incoming[record["event_uid"]] = record
+
+        inserts, updates = [], []
+        unchanged_bytes = 0
+        for uid, record in incoming.items():
+            content_hash = record_hash(record)
+            row = existing.get(uid)
+            if row is None:
+                inserts.append({**record, "id": str(uuid.uuid4()), "content_hash": content_hash})
+            elif row.get("content_hash") != content_hash:
+                updates.append({**record, "id": row["id"], "content_hash": content_hash})
+            else:
+                unchanged_bytes += len(json.dumps(record, default=str))
+
+        delete_ids = stale_ids + [
+            row["id"] for uid, row in existing.items()
+            if uid not in incoming and uid not in dismissed_uids
+        ]
+
+        # Apply
+        upserts = inserts + updates
+        write_round_trips = 0
+        bytes_written = 0
+        for i in range(0, len(upserts), self.upsert_batch_size):
+            batch = upserts[i:i + self.upsert_batch_size]
+            await self.db.upsert_inbox_rows(batch)
+            bytes_written += len(json.dumps(batch, default=str))
+            write_round_trips += 1
+        for i in range(0, len(delete_ids), self.delete_batch_size):
+            await self.db.delete_inbox_rows(delete_ids[i:i + self.delete_batch_size])
+            write_round_trips += 1
+
+        # The per-event implementation made a select plus a write for every
+        # event, one load for the delete pass, and one delete per stale row
+        legacy_round_trips = 2 * len(incoming) + 1 + len(delete_ids)
+        round_trips = load_round_trips + write_round_trips
+
+        return {
+            "synced": len(inserts),
+            "updated": len(updates),
+            "unchanged": len(incoming) - len(inserts) - len(updates),
+            "deleted": len(delete_ids),
+            "skipped_dismissed": skipped_dismissed,
+            "round_trips": round_trips,
+            "round_trips_saved": max(legacy_round_trips - round_trips, 0),
+            "bytes_written": bytes_written,
+            "bytes_saved": unchanged_bytes,
+        }
+
+
+# Singleton instance
+calendar_sync_engine = CalendarSyncEngine()
@@ -0,0 +1,198 @@
+"""In-process contact category classifier trained on CRM history."""
+
+import asyncio
+import time
+import zlib
+
+import numpy as np
+import structlog
+
+from app.company_dedup import normalize_company_name
+from app.config import get_settings
+from app.database import db
+from app.name_index import fold_name
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+DIMENSIONS = 1 << 16  # hashed feature space
+# Categories /suggest-contact-profile may return; the classifier only learns these,
+# so Inbox, Skip, Hold, System, WhatsApp Group Contact ... are never predicted
+PROFILE_CATEGORIES = (
+    "Professional Investor", "Founder", "Manager", "Advisor",
+    "Friend and Family", "Team", "Supplier", "Media",
+    "Student", "Institution", "Other",
+)
+# The narrower contact category list of /extract-deal-from-email
+DEAL_CONTACT_CATEGORIES = ("Founder", "Professional Investor", "Manager", "Advisor", "Other")
+
+
+def _bucket(feature: str) -> int:
+    # crc32 rather than hash(): stable across processes and restarts
+    return zlib.crc32(feature.encode()) & (DIMENSIONS - 1)
+
+
+def featurize(job_title: str = None, company: str = None) -> np.ndarray | None:
+    """
+    Hashed feature indices for a contact: job title words and word pairs,
+    company name tokens and a bias. None when there is nothing to go on.
+    """
+    words = fold_name(job_title or "").split()
+    company_tokens = normalize_company_name(company or "").split()
+    if not words and not company_tokens:
+        return None
+    features = ["bias"]
+    features += [f"title:{w}" for w in words]
+    features += [f"title2:{a}_{b}" for a, b in zip(words, words[1:])]
+    features += [f"company:{t}" for t in company_tokens]
+    return np.unique(np.fromiter((_bucket(f) for f in features), dtype=np.int64))
+
+
+def train_softmax(
+    rows: list[np.ndarray], labels: np.ndarray, classes: int,
+    epochs: int = 60, learning_rate: float = 0.5, l2: float = 1e-5,
+) -> np.ndarray:
+    """
+    Multinomial logistic regression over sparse hashed rows, full-batch
+    AdaGrad. Returns the DIMENSIONS x classes weight matrix.
+    """
+    lengths = np.array([len(r) for r in rows])
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    indices = np.concatenate(rows)
+    row_of = np.repeat(np.arange(len(rows)), lengths)
+    targets = np.eye(classes, dtype=np.float32)[labels]
+
+    weights = np.zeros((DIMENSIONS, classes), dtype=np.float32)
+    squared = np.zeros_like(weights)
+    for _ in range(epochs):
+        logits = np.add.reduceat(weights[indices], starts, axis=0)
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+
+        errors = (probs - targets) / len(rows)
+        grad = l2 * weights
+        np.add.at(grad, indices, errors[row_of])
+        squared += grad * grad
+        weights -= learning_rate * grad / (np.sqrt(squared) + 1e-8)
+    return weights
+
+
+def _fit(rows: list[np.ndarray], labels: np.ndarray, classes: int) -> tuple[np.ndarray, float]:
+    """train_softmax plus its accuracy on the training rows."""
+    weights = train_softmax(rows, labels, classes)
+    starts = np.concatenate(([0], np.cumsum([len(r) for r in rows])[:-1]))
+    predicted = np.add.reduceat(weights[np.concatenate(rows)], starts, axis=0).argmax(axis=1)
+    return weights, round(float((predicted == labels).mean()), 3)
+
+
+class CategoryClassifier:
+    """
+    Predicts a contact's category (Founder, Professional Investor, Manager,
+    ...) from job title and company name.
+
+    Trained on every contact that already has one of PROFILE_CATEGORIES and
+    a job_role or company: hashed word and word-pair features, a softmax regression in
+    NumPy, fitted in a worker thread. Retrained in the background once
+    category_classifier_retrain_interval has passed, while the previous
+    model keeps serving. predict_confident() only answers above
+    category_classifier_min_confidence, so callers ask the model otherwise.
+    """
+
+    def __init__(self, page_size: int = 1000):
+        self.db = db
+        self.page_size = page_size
+        self.classes: list[str] = []
+        self.weights: np.ndarray | None = None
+        self.samples = 0
+        self.trained_at: float | None = None
+        self._training: asyncio.Task | None = None
+
+    async def load_examples(self) -> tuple[list[np.ndarray], list[str]]:
+        rows, labels, after = [], [], None
+        while True:
+            page = await self.db.get_categorized_contacts_page(after, self.page_size)
+            for contact in page:
+                category = contact.get("category")
+                if category not in PROFILE_CATEGORIES:
+                    continue
+                companies = [(cc.get("companies") or {}).get("name") for cc in contact.get("contact_companies") or []]
+                features = featurize(contact.get("job_role"), " ".join(filter(None, companies)))
+                if features is not None:
+                    rows.append(features)
+                    labels.append(category)
+            if len(page) < self.page_size:
+                return rows, labels
+            after = page[-1]["contact_id"]
+
+    async def retrain(self) -> None:
+        """Refit from the current contacts."""
+        rows, labels = await self.load_examples()
+        if len(rows) < settings.category_classifier_min_samples:
+            logger.info("category_classifier_skipped", samples=len(rows))
+            self.trained_at = time.monotonic()
+            return
+
+        classes = sorted(set(labels))
+        position = {c: i for i, c in enumerate(classes)}
+        y = np.array([position[c] for c in labels])
+        weights, accuracy = await asyncio.to_thread(_fit, rows, y, len(classes))
+        self.classes, self.weights, self.samples = classes, weights, len(rows)
+        self.trained_at = time.monotonic()
+        logger.info(
+            "category_classifier_trained",
+            samples=len(rows),
+            classes=len(classes),
+            train_accuracy=accuracy,
+        )
+
+    async def _safe_retrain(self) -> None:
+        try:
+            await self.retrain()
+        except Exception as e:
+            logger.error("category_classifier_train_error", error=str(e))
+
+    async def ensure_trained(self) -> None:
+        """Train on first use; afterwards retrain in the background when due."""
+        if self.trained_at is None:
+            await self._safe_retrain()
+        elif (
+            time.monotonic() - self.trained_at >= settings.category_classifier_retrain_interval
+            and (self._training is None or self._training.done())
+        ):
+            self._training = asyncio.create_task(self._safe_retrain())
+
+    def predict(self, job_title: str = None, company: str = None) -> list[tuple[str, float]]:
+        """(category, probability) for every class, most likely first; [] without a model or features."""
+        features = featurize(job_title, company)
+        if self.weights is None or features is None:
+            return []
+        logits = self.weights[features].sum(axis=0)
+        probs = np.exp(logits - logits.max())
+        probs /= probs.sum()
+        order = np.argsort(-probs)
+        return [(self.classes[i], float(probs[i])) for i in order]
+
+    async def predict_confident(
+        self, job_title: str = None, company: str = None, allowed: tuple[str, ...] = PROFILE_CATEGORIES,
+    ) -> dict | None:
+        """
+        Category in the /suggest-contact-profile shape when the classifier is
+        sure enough and its pick is one of allowed, else None.
+        """
+        await self.ensure_trained()
+        ranked = self.predict(job_title, company)
+        if not ranked or ranked[0][1] < settings.category_classifier_min_confidence or ranked[0][0] not in allowed:
+            return None
+        category, probability = ranked[0]
+        return {
+            "value": category,
+            "confidence": "high" if probability >= 0.9 else "medium",
+            "score": round(probability, 3),
+            "alternatives": [c for c, p in ranked[1:3] if p >= 0.1 and c in allowed],
+            "source": "classifier",
+        }
+
+
+# Singleton instance
+category_classifier = CategoryClassifier()
@@ -0,0 +1,236 @@
+"""Resumable background cleanup jobs for /run-cleanup."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+
+import structlog
+
+from app.config import get_settings
+from app.database import db
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Fields reported by the status endpoint and progress stream
+PROGRESS_FIELDS = (
+    "id", "entity_type", "status", "scanned", "candidates", "suggestions_created",
+    "cursor", "error", "created_at", "updated_at", "finished_at",
+)
+
+
+def job_progress(job: dict) -> dict:
+    return {k: job.get(k) for k in PROGRESS_FIELDS}
+
+
+class CleanupJobRunner:
+    """
+    Runs full-CRM duplicate scans as background tasks.
+
+    A contact job pages through contacts by contact_id keyset, matches each page
+    against the match index (see app.match_index) and writes suggestions for
+    it, then checkpoints the cursor and counters on its cleanup_jobs row.
+    That update doubles as a heartbeat: on startup, jobs whose heartbeat is
+    older than cleanup_stale_after are claimed and resumed from their cursor,
+    so a restart (or a crashed worker) loses at most one page.
+    """
+
+    def __init__(self):
+        self.db = db
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.jobs: dict[str, dict] = {}  # latest row for jobs running here
+        self.changed: dict[str, asyncio.Event] = {}
+        self._watchdog: asyncio.Task | None = None
+
+    def _publish(self, job: dict) -> None:
+        job_id = str(job["id"])
+        self.jobs[job_id] = job
+        event = self.changed.pop(job_id, None)
+        if event:
+            event.set()
+
+    def _spawn(self, job: dict) -> None:
+        job_id = str(job["id"])
+        self.jobs[job_id] = job
+        self.tasks[job_id] = asyncio.create_task(self._run(job))
+        self.tasks[job_id].add_done_callback(lambda _: self._forget(job_id))
+
+    def _forget(self, job_id: str) -> None:
+        self.tasks.pop(job_id, None)
+        self.jobs.pop(job_id, None)
+
+    async def start(self, entity_type: str = "contact", page_size: int | None = None) -> dict:
+        """Create a job and start it in the background."""
+        job = await self.db.create_cleanup_job({
+            "entity_type": entity_type,
+            "status": "queued",
+            "page_size": page_size or settings.cleanup_page_size,
+        })
+        self._spawn(job)
+        logger.info("cleanup_job_started", job_id=job["id"], entity_type=entity_type)
+        return job
+
+    async def resume_stale(self) -> int:
+        """Claim and resume interrupted jobs and unfinished jobs whose worker stopped heartbeating."""
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.cleanup_stale_after)
+        jobs = await self.db.claim_stale_cleanup_jobs(stale_before.isoformat())
+        for job in jobs:
+            if str(job["id"]) in self.tasks:
+                # Still running here (the claim reset it to queued)
+                await self.db.update_cleanup_job(str(job["id"]), {"status": "running"})
+                continue
+            logger.info("cleanup_job_resumed", job_id=job["id"], cursor=job.get("cursor"))
+            self._spawn(job)
+        return len(jobs)
+
+    async def _watch_stale(self) -> None:
+        while True:
+            try:
+                await self.resume_stale()
+            except Exception as e:
+                logger.error("cleanup_job_resume_error", error=str(e))
+            await asyncio.sleep(settings.cleanup_stale_after)
+
+    def start_watchdog(self) -> None:
+        """Resume interrupted and stale jobs now and every cleanup_stale_after seconds."""
+        if self._watchdog is None or self._watchdog.done():
+            self._watchdog = asyncio.create_task(self._watch_stale())
+
+    async def shutdown(self) -> None:
+        """Stop local jobs and mark them 'interrupted' so the next worker resumes them right away."""
+        if self._watchdog:
+            self._watchdog.cancel()
+        job_ids = list(self.tasks)
+        for task in list(self.tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        if job_ids:
+            try:
+                await self.db.interrupt_cleanup_jobs(job_ids)
+            except Exception as e:
+                logger.error("cleanup_job_interrupt_error", error=str(e))
+
+    @asynccontextmanager
+    async def _heartbeat(self, job_id: str):
+        """Bump the job's heartbeat in the background while the block runs."""
+        async def beat():
+            while True:
+                await asyncio.sleep(settings.cleanup_stale_after / 3)
+                try:
+                    await self.db.update_cleanup_job(job_id, {})
+                except Exception as e:
+                    logger.warning("cleanup_job_heartbeat_error", job_id=job_id, error=str(e))
+
+        task = asyncio.create_task(beat())
+        try:
+            yield
+        finally:
+            task.cancel()
+
+    async def _run_contacts(self, job: dict) -> dict:
+        """Page through contacts from the job's cursor, checkpointing each page."""
+        from app.agent import agent
+        from app.match_index import match_index
+        from app.suggestion_index import suggestion_index
+
+        job_id = str(job["id"])
+        await suggestion_index.refresh()
+        while True:
+            page = await self.db.get_contacts_page(job.get("cursor"), job["page_size"])
+            if not page:
+                return job
+            edges, _ = await match_index.match_contacts(page)
+            report = await agent.suggest_duplicates(edges)
+            job = await self.db.update_cleanup_job(job_id, {
+                "cursor": page[-1]["contact_id"],
+                "scanned": job["scanned"] + len(page),
+                "candidates": job["candidates"] + report["pairs"],
+                "suggestions_created": job["suggestions_created"] + report["created"],
+            }) or job
+            self._publish(job)
+            if len(page) < job["page_size"]:
+                return job
+
+    async def _run_single_pass(self, job: dict) -> dict:
+        """
+        Company and deal dedup block across the whole table, so they run as
+        one step; a resumed job simply reruns it (existing suggestions are
+        skipped).
+        """
+        from app.company_dedup import company_dedup
+        from app.deal_dedup import deal_dedup
+
+        engine = company_dedup if job.get("entity_type") == "company" else deal_dedup
+        report = await engine.run()
+        job = await self.db.update_cleanup_job(str(job["id"]), {
+            "scanned": report["scanned"],
+            "candidates": report["pairs"],
+            "suggestions_created": report["created"],
+        }) or job
+        self._publish(job)
+        return job
+
+    async def _run(self, job: dict) -> None:
+        job_id = str(job["id"])
+        try:
+            job = await self.db.update_cleanup_job(job_id, {"status": "running"}) or job
+            self._publish(job)
+            async with self._heartbeat(job_id):
+                if job.get("entity_type") in ("company", "deal"):
+                    job = await self._run_single_pass(job)
+                else:
+                    job = await self._run_contacts(job)
+
+            job = await self.db.update_cleanup_job(job_id, {
+                "status": "completed",
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+            }) or job
+            logger.info("cleanup_job_complete", **job_progress(job))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("cleanup_job_failed", job_id=job_id, error=str(e))
+            job = await self.db.update_cleanup_job(job_id, {
+                "status": "failed",
+                "error": str(e),
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+            }) or {**job, "status": "failed", "error": str(e)}
+        finally:
+            self._publish(job)
+
+    async def get(self, job_id: str) -> dict | None:
+        """Latest state of a job: in memory if it runs here, else from the table."""
+        if job_id in self.jobs:
+            return self.jobs[job_id]
+        return await self.db.get_cleanup_job(job_id)
+
+    async def watch(self, job_id: str, poll_interval: float = 2.0) -> AsyncIterator[dict]:
+        """
+        Yield the job's progress whenever it changes, until it finishes.
+
+        Jobs running in this process wake the watcher on every checkpoint;
+        jobs on another worker are polled every poll_interval seconds.
+        """
+        last = None
+        while True:
+            job = await self.get(job_id)
+            if job is None:
+                return
+            progress = job_progress(job)
+            if progress != last:
+                yield progress
+                last = progress
+            if job.get("status") in TERMINAL_STATUSES:
+                return
+            event = self.changed.setdefault(job_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Singleton instance
+cleanup_jobs = CleanupJobRunner()
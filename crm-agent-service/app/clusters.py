@@ -0,0 +1,182 @@
+"""Transitive duplicate clustering."""
+
+from typing import Callable
+import heapq
+
+from pydantic import BaseModel
+import structlog
+
+from app.database import db
+
+logger = structlog.get_logger()
+
+
+class UnionFind:
+    """Disjoint sets over arbitrary hashable IDs (path halving + union by size)."""
+
+    def __init__(self):
+        self.parent: dict = {}
+        self.size: dict = {}
+
+    def find(self, x):
+        if x not in self.parent:
+            self.parent[x] = x
+            self.size[x] = 1
+            return x
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+    def groups(self) -> list[list]:
+        """All sets, each as a list of members (in first-seen order)."""
+        groups: dict = {}
+        for x in self.parent:
+            groups.setdefault(self.find(x), []).append(x)
+        return list(groups.values())
+
+
+class DuplicateCluster(BaseModel):
+    """A connected component of duplicate edges with its chosen survivor."""
+    survivor_id: str
+    member_ids: list[str]  # survivor first
+    edges: list[dict]  # {"a", "b", "match_type", "match_value"}
+    completeness: dict[str, float] = {}
+
+    @property
+    def merge_ids(self) -> list[str]:
+        """Members folded into the survivor."""
+        return [m for m in self.member_ids if m != self.survivor_id]
+
+
+def _completeness_key(row: dict | None) -> tuple:
+    """Sort key: completeness score, then amount of linked data."""
+    if not row:
+        return (0.0, 0)
+    linked = sum(int(row.get(k) or 0) for k in (
+        "email_count", "mobile_count", "company_count", "city_count", "tag_count"
+    ))
+    return (float(row.get("completeness_score") or 0), linked)
+
+
+def pick_survivor(member_ids: list[str], completeness: dict[str, dict]) -> str:
+    """Most complete member wins; ties go to the smallest ID so the choice is stable."""
+    return max(sorted(member_ids), key=lambda m: _completeness_key(completeness.get(m)))
+
+
+def cluster_edges(edges: list[dict]) -> list[tuple[list[str], list[dict]]]:
+    """Group duplicate edges ({"a", "b", ...}) into connected components."""
+    uf = UnionFind()
+    for edge in edges:
+        uf.union(edge["a"], edge["b"])
+
+    edges_by_root: dict = {}
+    for edge in edges:
+        edges_by_root.setdefault(uf.find(edge["a"]), []).append(edge)
+
+    return [(members, edges_by_root.get(uf.find(members[0]), [])) for members in uf.groups()]
+
+
+def merge_plan(survivor_id: str, edges: list[dict]) -> list[tuple[str, str, dict]]:
+    """
+    (keep_id, dupe_id, edge) for every other member of a cluster, each along a direct edge.
+
+    The cluster is walked breadth-first from the survivor, strongest edge
+    first within each level: members matched to the survivor merge into it,
+    the rest into a member they were matched to, so every suggestion's score
+    and match_value describe the pair it names.
+    """
+    adjacent: dict[str, list[dict]] = {}
+    for edge in edges:
+        adjacent.setdefault(edge["a"], []).append(edge)
+        adjacent.setdefault(edge["b"], []).append(edge)
+
+    plan, depth, heap, seq = [], {survivor_id: 0}, [], 0
+
+    def push(member_id: str) -> None:
+        nonlocal seq
+        for edge in adjacent.get(member_id, []):
+            heapq.heappush(heap, (depth[member_id], -(edge.get("score") or 0), seq, member_id, edge))
+            seq += 1
+
+    push(survivor_id)
+    while heap:
+        *_, keep_id, edge = heapq.heappop(heap)
+        dupe_id = edge["b"] if edge["a"] == keep_id else edge["a"]
+        if dupe_id in depth:
+            continue
+        depth[dupe_id] = depth[keep_id] + 1
+        plan.append((keep_id, dupe_id, edge))
+        push(dupe_id)
+    return plan
+
+
+async def suggest_cluster_merges(
+    edges: list[dict],
+    pick: Callable[[list[str]], str],
+    build: Callable[[str, str, dict], dict],
+    entity_type: str,
+) -> tuple[int, dict]:
+    """
+    Cluster duplicate edges and write one merge suggestion per merge_plan step.
+
+    Args:
+        pick: member IDs -> survivor ID
+        build: (keep_id, dupe_id, edge) -> suggestion row
+
+    Returns:
+        (clusters, SuggestionWriter report)
+    """
+    from app.suggestion_writer import SuggestionWriter
+
+    clusters = cluster_edges(edges)
+    async with SuggestionWriter() as writer:
+        for member_ids, component_edges in clusters:
+            for keep_id, dupe_id, edge in merge_plan(pick(member_ids), component_edges):
+                await writer.add(build(keep_id, dupe_id, edge), {
+                    "action_type": "suggestion_created",
+                    "entity_type": entity_type,
+                    "entity_id": keep_id,
+                    "triggered_by": "system",
+                })
+    return len(clusters), writer.report()
+
+
+async def resolve_clusters(edges: list[dict]) -> list[DuplicateCluster]:
+    """
+    Union duplicate edges into clusters and pick a survivor for each.
+
+    Completeness for every member is loaded in one query.
+    """
+    components = cluster_edges(edges)
+    member_ids = [m for members, _ in components for m in members]
+    completeness = {row["contact_id"]: row for row in await db.get_contacts_completeness(member_ids)}
+
+    clusters = []
+    for members, component_edges in components:
+        survivor = pick_survivor(members, completeness)
+        clusters.append(DuplicateCluster(
+            survivor_id=survivor,
+            member_ids=[survivor, *[m for m in members if m != survivor]],
+            edges=component_edges,
+            completeness={m: _completeness_key(completeness.get(m))[0] for m in members},
+        ))
+
+    logger.info(
+        "duplicate_clusters_resolved",
+        edges=len(edges),
+        clusters=len(clusters),
+        contacts=len(member_ids),
+        merges_saved=len(edges) - sum(len(c.merge_ids) for c in clusters),
+    )
+    return clusters
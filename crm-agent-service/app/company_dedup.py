@@ -0,0 +1,225 @@
+"""Bulk company duplicate detection for /run-cleanup entity_type=company."""
+
+import asyncio
+import re
+import unicodedata
+from itertools import combinations
+
+from rapidfuzz import fuzz, process
+import structlog
+
+from app.config import get_settings
+from app.database import db
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+# Trailing legal-form tokens, after dots are removed ("S.p.A." -> "spa")
+LEGAL_SUFFIXES = {
+    "srl", "srls", "spa", "snc", "sapa", "ss",
+    "ltd", "limited", "llc", "llp", "lp", "plc", "inc", "incorporated", "corp", "corporation", "co", "company",
+    "gmbh", "ag", "kg", "ug", "sa", "sarl", "sas", "bv", "nv", "sl", "slu", "ab", "oy", "as", "aps", "pty",
+}
+STOP_TOKENS = {"the", "and", "of", "di", "de", "la", "le", "il"}
+PLACEHOLDER_CATEGORIES = {None, "", "Inbox", "Not Set"}
+
+
+def normalize_company_name(name: str) -> str:
+    """
+    Lowercase, strip accents and punctuation, drop a leading "the" and
+    trailing legal forms: "Acme S.r.l." and "ACME srl" both become "acme".
+    """
+    if not name:
+        return ""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+    name = name.replace("&", " and ")
+    name = re.sub(r"[.'’]", "", name)
+    tokens = re.sub(r"[^a-z0-9]+", " ", name).split()
+    if tokens and tokens[0] == "the":
+        tokens = tokens[1:]
+    stripped = list(tokens)
+    while stripped and stripped[-1] in LEGAL_SUFFIXES:
+        stripped.pop()
+    return " ".join(stripped or tokens)
+
+
+def normalize_company_domain(domain: str) -> str:
+    """Bare host: no scheme, www. or path."""
+    if not domain:
+        return ""
+    clean = re.sub(r"^https?://", "", domain.strip().lower())
+    clean = re.sub(r"^www\.", "", clean)
+    return clean.split("/")[0].strip(".")
+
+
+def _company_rank(company: dict) -> tuple:
+    """Higher is a better merge survivor: more profile fields, then more domains."""
+    filled = sum(bool(company.get(f)) for f in ("description", "website", "linkedin"))
+    filled += company.get("category") not in PLACEHOLDER_CATEGORIES
+    return (filled, len(company.get("company_domains") or []))
+
+
+def find_company_pairs(
+    companies: list[dict], threshold: float, max_block_size: int
+) -> list[dict]:
+    """
+    Candidate duplicate pairs among companies.
+
+    Companies are blocked on each normalized domain and each name token
+    (3+ chars); only companies sharing a block are compared. A shared
+    domain is a match on its own; within name blocks, names are scored with
+    rapidfuzz token_sort_ratio, one process.extract call per company.
+    Blocks larger than max_block_size are skipped as too generic.
+
+    Returns:
+        edges {"a", "b", "match_type", "match_value", "score"}
+    """
+    names = [normalize_company_name(c.get("name")) for c in companies]
+    domain_blocks: dict[str, list[int]] = {}
+    token_blocks: dict[str, list[int]] = {}
+    for i, company in enumerate(companies):
+        for row in company.get("company_domains") or []:
+            domain = normalize_company_domain(row.get("domain"))
+            if domain:
+                block = domain_blocks.setdefault(domain, [])
+                if not block or block[-1] != i:
+                    block.append(i)
+        for token in set(names[i].split()):
+            if len(token) >= 3 and token not in STOP_TOKENS:
+                token_blocks.setdefault(token, []).append(i)
+
+    edges: dict[frozenset, dict] = {}
+
+    def add(i: int, j: int, match_type: str, match_value: str, score: float) -> None:
+        a, b = companies[i]["company_id"], companies[j]["company_id"]
+        pair = frozenset((a, b))
+        if a != b and (pair not in edges or edges[pair]["score"] < score):
+            edges[pair] = {"a": a, "b": b, "match_type": match_type, "match_value": match_value, "score": score}
+
+    for domain, members in domain_blocks.items():
+        if 1 < len(members) <= max_block_size:
+            for i, j in combinations(members, 2):
+                add(i, j, "same_domain", domain, 100.0)
+
+    for members in token_blocks.values():
+        if not 1 < len(members) <= max_block_size:
+            continue
+        block_names = [names[i] for i in members]
+        for pos, i in enumerate(members[:-1]):
+            for _, score, k in process.extract(
+                names[i], block_names[pos + 1:], scorer=fuzz.token_sort_ratio,
+                score_cutoff=threshold, limit=None,
+            ):
+                j = members[pos + 1 + k]
+                if frozenset((companies[i]["company_id"], companies[j]["company_id"])) not in edges:
+                    match_value = f"{companies[i].get('name')} ~ {companies[j].get('name')}"
+                    add(i, j, "similar_name", match_value, round(score, 1))
+
+    return list(edges.values())
+
+
+class CompanyDedupEngine:
+    """
+    One-pass duplicate scan over companies and company_domains.
+
+    Loads every company (with its domains) in keyset pages, blocks and
+    scores them in a worker thread, and writes merge_companies suggestions
+    that fold each cluster into its most complete company along direct
+    matches (see clusters.merge_plan).
+    Replaces the per-company ilike lookups audit does one company at a time.
+    """
+
+    def __init__(self, page_size: int = 1000):
+        self.db = db
+        self.page_size = page_size
+
+    async def load_companies(self) -> list[dict]:
+        companies, after = [], None
+        while True:
+            page = await self.db.get_companies_page(after, self.page_size)
+            companies.extend(page)
+            if len(page) < self.page_size:
+                return companies
+            after = page[-1]["company_id"]
+
+    async def run(self) -> dict:
+        """
+        Scan all companies and create suggestions.
+
+        Returns:
+            dict with scanned, pairs, clusters and the SuggestionWriter report
+        """
+        from app.clusters import suggest_cluster_merges
+        from app.suggestion_index import suggestion_index
+
+        companies = await self.load_companies()
+        by_id = {c["company_id"]: c for c in companies}
+        candidates = await asyncio.to_thread(
+            find_company_pairs, companies,
+            settings.company_name_match_threshold, settings.company_block_max_size,
+        )
+
+        await suggestion_index.refresh()
+        edges = [e for e in candidates if not suggestion_index.exists("duplicate", e["a"], e["b"])]
+
+        clusters, written = await suggest_cluster_merges(
+            edges,
+            pick=lambda ids: max(sorted(ids), key=lambda m: _company_rank(by_id[m])),
+            build=lambda keep, dupe, edge: _company_suggestion(by_id[keep], by_id[dupe], edge),
+            entity_type="company",
+        )
+
+        report = {"scanned": len(companies), "pairs": len(edges), "clusters": clusters, **written}
+        logger.info("company_dedup_complete", **report)
+        return report
+
+
+def _company_summary(company: dict) -> dict:
+    return {
+        "company_id": company["company_id"],
+        "name": company.get("name"),
+        "category": company.get("category"),
+        "domains": [d.get("domain") for d in company.get("company_domains") or []],
+    }
+
+
+def _company_suggestion(keep: dict, dupe: dict, edge: dict) -> dict:
+    """merge_companies suggestion folding dupe into keep."""
+    from app.actions import Action, ActionType
+
+    if edge["match_type"] == "same_domain":
+        confidence, priority, short_reason = 0.95, "high", "Same domain"
+    else:
+        confidence = round(edge["score"] / 100 * 0.9, 2)
+        priority = "high" if confidence >= 0.85 else "medium"
+        short_reason = "Similar name"
+
+    merge_action = Action(
+        type=ActionType.MERGE_COMPANIES,
+        merge_into_id=keep["company_id"],
+        delete_id=dupe["company_id"],
+        description=f"Merge company '{dupe.get('name')}' into {keep.get('name')}",
+    )
+    return {
+        "suggestion_type": "duplicate",
+        "entity_type": "company",
+        "primary_entity_id": keep["company_id"],
+        "secondary_entity_id": dupe["company_id"],
+        "confidence_score": confidence,
+        "priority": priority,
+        "suggestion_data": {
+            "match_type": edge["match_type"],
+            "match_value": edge["match_value"],
+            "score": edge["score"],
+            "short_reason": short_reason,
+            "primary_company": _company_summary(keep),
+            "duplicate_company": _company_summary(dupe),
+            "merge_action": merge_action.dict(),
+        },
+        "agent_reasoning": f"Found {edge['match_type']} match: {edge['match_value']}",
+        "source_description": "Company duplicate scan",
+    }
+
+
+# Singleton instance
+company_dedup = CompanyDedupEngine()
@@ -0,0 +1,201 @@
+"""CRM-wide contact completeness scoring and the enrichment worklist."""
+
+import asyncio
+import time
+
+import numpy as np
+import structlog
+
+from app.config import get_settings
+from app.database import db
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+# Same fields, order and rules as audit.get_missing_fields:
+# (missing field name, contact column or linked-table count, rule)
+FIELDS = (
+    ("birthday", "birthday", "value"),
+    ("linkedin", "linkedin", "value"),
+    ("job_role", "job_role", "value"),
+    ("email", "contact_emails", "count"),
+    ("mobile", "contact_mobiles", "count"),
+    ("company", "contact_companies", "count"),
+    ("city", "contact_cities", "count"),
+    ("tags", "contact_tags", "count"),
+    ("score", "score", "value"),
+)
+FIELD_NAMES = tuple(name for name, _, _ in FIELDS)
+EXCLUDED_CATEGORIES = {"Skip"}
+
+
+def _count(row: dict, table: str) -> int:
+    """PostgREST embedded count: {"contact_emails": [{"count": 2}]}."""
+    value = row.get(table)
+    if isinstance(value, list):
+        return int(value[0].get("count", 0)) if value else 0
+    return int(value or 0)
+
+
+def page_to_columns(rows: list[dict]) -> dict[str, np.ndarray]:
+    """One page of contacts as column arrays, with a bool present column per FIELDS entry."""
+    columns = {
+        "contact_id": np.array([r["contact_id"] for r in rows], dtype=object),
+        "name": np.array(
+            [" ".join(filter(None, (r.get("first_name"), r.get("last_name")))) for r in rows], dtype=object
+        ),
+        "category": np.array([r.get("category") or "" for r in rows], dtype=object),
+        "last_interaction_at": np.array([r.get("last_interaction_at") or "" for r in rows], dtype=object),
+    }
+    for name, source, rule in FIELDS:
+        if rule == "count":
+            columns[name] = np.fromiter((_count(r, source) > 0 for r in rows), dtype=bool, count=len(rows))
+        else:
+            columns[name] = np.fromiter((bool(r.get(source)) for r in rows), dtype=bool, count=len(rows))
+    return columns
+
+
+class CompletenessWorklist:
+    """
+    Completeness of every contact, computed in bulk.
+
+    Contacts are read in keyset pages with their email, mobile, company,
+    city and tag counts (PostgREST embedded counts, no row payloads) into
+    column arrays. The present/missing matrix, the score (percentage of
+    FIELDS present) and the worklist order (least complete first, then
+    most recently in touch) are computed with NumPy over the whole CRM.
+
+    The result is cached for completeness_cache_ttl seconds and recomputed
+    in the background when stale, so the worklist endpoint answers from
+    memory.
+    """
+
+    def __init__(self, page_size: int = 1000):
+        self.db = db
+        self.page_size = page_size
+        self.columns: dict[str, np.ndarray] = {}
+        self.present: np.ndarray = np.zeros((0, len(FIELDS)), dtype=bool)
+        self.scores: np.ndarray = np.zeros(0, dtype=np.int16)
+        self.order: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.computed_at: float | None = None
+        self._lock = asyncio.Lock()
+        self._refreshing: asyncio.Task | None = None
+
+    async def refresh(self) -> None:
+        """Reload all contacts and recompute."""
+        async with self._lock:
+            await self._compute()
+
+    async def _compute(self) -> None:
+        pages, after = [], None
+        while True:
+            page = await self.db.get_contact_completeness_page(after, self.page_size)
+            if page:
+                pages.append(page_to_columns(page))
+            if len(page) < self.page_size:
+                break
+            after = page[-1]["contact_id"]
+
+        pages = pages or [page_to_columns([])]
+        columns = {key: np.concatenate([p[key] for p in pages]) for key in pages[0]}
+        present = np.column_stack([columns[name] for name in FIELD_NAMES])
+        scores = np.rint(present.mean(axis=1) * 100).astype(np.int16)
+
+        # Recency rank: ISO timestamps sort as strings; missing ones ("") rank oldest
+        recency = np.empty(len(scores), dtype=np.int64)
+        recency[np.argsort(columns["last_interaction_at"].astype(str), kind="stable")] = np.arange(len(scores))
+        order = np.lexsort((-recency, scores))
+
+        self.columns, self.present, self.scores, self.order = columns, present, scores, order
+        self.computed_at = time.monotonic()
+        logger.info(
+            "completeness_computed",
+            contacts=len(scores),
+            mean_score=round(float(scores.mean()), 1) if len(scores) else None,
+            **{f"missing_{name}": int((~present[:, i]).sum()) for i, name in enumerate(FIELD_NAMES)},
+        )
+
+    async def _safe_refresh(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error("completeness_refresh_error", error=str(e))
+
+    async def ensure_loaded(self) -> None:
+        """Compute on first use; afterwards recompute in the background when stale."""
+        if self.computed_at is None:
+            async with self._lock:
+                if self.computed_at is None:
+                    await self._compute()
+        elif (
+            time.monotonic() - self.computed_at >= settings.completeness_cache_ttl
+            and (self._refreshing is None or self._refreshing.done())
+        ):
+            self._refreshing = asyncio.create_task(self._safe_refresh())
+
+    def worklist(
+        self,
+        missing: list[str] | None = None,
+        match: str = "any",
+        category: str | None = None,
+        max_score: int | None = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> dict:
+        """
+        Contacts to enrich, least complete first.
+
+        Args:
+            missing: only contacts missing these fields (FIELD_NAMES)
+            match: "any" or "all" of the missing fields
+            category: only this contact category
+            max_score: only contacts with fields_present_pct at or below this
+
+        Returns:
+            {"total", "items": [{"contact_id", "name", "category", "fields_present_pct",
+            "missing_fields", "last_interaction_at"}]}. fields_present_pct is the
+            share of FIELDS present, not the contact_completeness view score.
+        """
+        order = self.order
+        if not len(order):
+            return {"total": 0, "items": []}
+
+        keep = ~np.isin(self.columns["category"], list(EXCLUDED_CATEGORIES))
+        if missing:
+            cols = [FIELD_NAMES.index(name) for name in missing]
+            absent = ~self.present[:, cols]
+            keep &= absent.all(axis=1) if match == "all" else absent.any(axis=1)
+        if category:
+            keep &= self.columns["category"] == category
+        if max_score is not None:
+            keep &= self.scores <= max_score
+
+        selected = order[keep[order]]
+        page = selected[offset:offset + limit]
+        return {
+            "total": int(len(selected)),
+            "items": [
+                {
+                    "contact_id": self.columns["contact_id"][i],
+                    "name": self.columns["name"][i],
+                    "category": self.columns["category"][i] or None,
+                    "fields_present_pct": int(self.scores[i]),
+                    "missing_fields": [FIELD_NAMES[j] for j in np.flatnonzero(~self.present[i])],
+                    "last_interaction_at": self.columns["last_interaction_at"][i] or None,
+                }
+                for i in page
+            ],
+        }
+
+    def summary(self) -> dict:
+        """Contacts, mean fields_present_pct and how many miss each field."""
+        return {
+            "contacts": int(len(self.scores)),
+            "mean_fields_present_pct": round(float(self.scores.mean()), 1) if len(self.scores) else None,
+            "missing": {name: int((~self.present[:, i]).sum()) for i, name in enumerate(FIELD_NAMES)},
+            "age_seconds": round(time.monotonic() - self.computed_at, 1) if self.computed_at else None,
+        }
+
+
+# Singleton instance
+completeness_worklist = CompletenessWorklist()
@@ -33,6 +33,85 @@ class Settings(BaseSettings):
     duplicate_medium_confidence: float = 0.7
     enrichment_min_confidence: float = 0.6
 
+    # Email triage before the /analyze-email model loop (see app.triage)
+    triage_enabled: bool = True
+    triage_keywords: dict[str, list[str]] = {}  # extra keywords per category, added to app.triage.KEYWORDS
+    triage_automated_domains: list[str] = []  # extra sender domains that only send automated mail
+    triage_downgrade_max_loops: int = 3  # tool loops for downgraded (transactional / personal) mail
+    triage_downgrade_body_tokens: int = 400
+
+    # Email body budgets in prompts (estimated tokens, after quoted history
+    # and boilerplate are stripped; see app.email_text)
+    analyze_body_tokens: int = 1500
+    profile_body_tokens: int = 1500
+    deal_body_tokens: int = 2500
+    deal_thread_email_tokens: int = 1000  # per email of a thread
+    whatsapp_conversation_tokens: int = 2500
+
+    # Tag suggestion shortlist (see app.tag_ranker)
+    tag_ranker_ttl: float = 3600.0
+    tag_shortlist_size: int = 25  # tags shown to the model
+    tag_confident_probability: float = 0.6  # tags this likely are applied without the model...
+    tag_confident_min_support: int = 5  # ...if seen on at least this many similar contacts
+
+    # Contact category classifier (see app.category_classifier)
+    category_classifier_retrain_interval: float = 86400.0
+    category_classifier_min_confidence: float = 0.75  # below this the model decides
+    category_classifier_min_samples: int = 50
+
+    # Contact completeness worklist (see app.completeness)
+    completeness_cache_ttl: float = 900.0
+
+    # Bulk Apollo enrichment jobs (see app.apollo_enrichment)
+    apollo_base_url: str = "https://api.apollo.io"  # point at scripts/apollo_stub_server.py locally
+    apollo_bulk_batch_size: int = 10  # people per bulk_match call (Apollo's maximum)
+    apollo_requests_per_minute: int = 50
+    apollo_max_concurrency: int = 2
+    apollo_max_retries: int = 3  # per call, on 429 and 5xx
+    apollo_cache_ttl_days: int = 90
+    apollo_job_max_contacts: int = 500
+
+    # Contact name search index
+    name_index_refresh_interval: float = 30.0  # seconds between incremental catch-ups
+    name_index_rebuild_interval: float = 3600.0  # full rebuild (drops deleted contacts)
+    name_search_min_score: float = 70.0
+
+    # Domain -> company index
+    domain_index_ttl: float = 600.0
+
+    # Company dedup
+    company_name_match_threshold: float = 90.0  # rapidfuzz score (0-100) on normalized names
+    company_block_max_size: int = 200  # name-token blocks larger than this are too generic to compare
+
+    # Deal dedup
+    deal_match_threshold: float = 0.75  # weighted score (0-1)
+    deal_name_min_similarity: float = 70.0  # rapidfuzz score; below this, deals at one company are distinct
+
+    # Action execution
+    action_max_concurrency: int = 8
+
+    # Dashboard stats
+    stats_cache_ttl: float = 30.0
+
+    # Pending suggestion pair index (duplicate suppression)
+    suggestion_index_ttl: float = 300.0
+    suggestion_write_batch_size: int = 100
+
+    # Streaming file transfers
+    transfer_chunk_size: int = 64 * 1024
+    transfer_timeout: float = 60.0
+    attachment_max_bytes: int = 50 * 1024 * 1024
+    whatsapp_upload_max_bytes: int = 2 * 1024 * 1024  # TimelinesAI limit
+
+    # Background cleanup jobs
+    cleanup_page_size: int = 500
+    cleanup_stale_after: float = 120.0  # seconds without a heartbeat before another worker resumes a job
+
+    # Calendar sync
+    calendar_window_past_days: int = 30
+    calendar_window_future_days: int = 365
+    calendar_feed_max_bytes: int = 20 * 1024 * 1024
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,6 +1,7 @@
 """Supabase database client and operations."""
 
 from supabase import create_client, Client
+from datetime import datetime, timezone
 from functools import lru_cache
 import structlog
 
@@ -42,17 +43,28 @@ class Database:
         return result.data
 
     async def search_contacts_by_name(self, first_name: str, last_name: str = None) -> list:
-        """Search contacts by name (case-insensitive)."""
-        query = self.client.table("contacts").select(
-            "*, contact_emails(*), contact_mobiles(*), contact_companies(*, companies(*))"
+        """Search contacts by name (fuzzy, accent-insensitive), best match first."""
+        from app.name_index import name_index
+        return await name_index.search_contacts(
+            first_name, last_name, limit=20,
+            columns="*, contact_emails(*), contact_mobiles(*), contact_companies(*, companies(*))",
         )
 
-        if first_name:
-            query = query.ilike("first_name", f"%{first_name}%")
-        if last_name:
-            query = query.ilike("last_name", f"%{last_name}%")
+    async def get_contacts_by_ids(self, contact_ids: list[str], columns: str = "*") -> list:
+        """Fetch several contacts in one query."""
+        if not contact_ids:
+            return []
+        result = self.client.table("contacts").select(columns).in_("contact_id", contact_ids).execute()
+        return result.data or []
 
-        result = query.limit(20).execute()
+    async def get_contacts_by_emails(self, emails: list[str]) -> list:
+        """contact_emails rows (with their contact) for many lowercased addresses in one query."""
+        if not emails:
+            return []
+        result = self.client.table("contact_emails").select(
+            "contact_id, email, email_normalized, is_primary, "
+            "contacts(contact_id, first_name, last_name, category, job_role)"
+        ).in_("email_normalized", emails).execute()
         return result.data or []
 
     async def get_contacts_with_similar_email_domain(self, domain: str) -> list:
@@ -65,14 +77,30 @@ class Database:
     # ==================== COMPANIES ====================
 
     async def get_company_by_domain(self, domain: str) -> dict | None:
-        """Find a company by domain."""
-        result = self.client.table("company_domains").select(
-            "company_id, domain, companies(*)"
-        ).eq("domain", domain.lower()).execute()
+        """Find a company by domain (subdomains resolve to their registrable domain)."""
+        from app.domain_index import domain_index
+        return await domain_index.find_company(domain)
+
+    async def get_company_domains_page(self, after_id: str = None, limit: int = 1000) -> list:
+        """One page of company_domains with the owning company, ordered by id."""
+        query = self.client.table("company_domains").select(
+            "id, company_id, domain, is_primary, "
+            "companies(company_id, name, category, website, description, linkedin)"
+        )
+        if after_id:
+            query = query.gt("id", after_id)
+        result = query.order("id").limit(limit).execute()
+        return result.data or []
 
-        if result.data and len(result.data) > 0:
-            return result.data[0].get("companies")
-        return None
+    async def get_company_domains_exact(self, domains: list[str]) -> list:
+        """company_domains rows (with the owning company) whose domain is exactly one of domains."""
+        if not domains:
+            return []
+        result = self.client.table("company_domains").select(
+            "id, company_id, domain, is_primary, "
+            "companies(company_id, name, category, website, description, linkedin)"
+        ).in_("domain", domains).execute()
+        return result.data or []
 
     async def get_company_by_id(self, company_id: str) -> dict | None:
         """Get company by ID."""
@@ -88,6 +116,16 @@ class Database:
         ).ilike("name", f"%{name}%").limit(10).execute()
         return result.data or []
 
+    async def get_companies_page(self, after_id: str = None, limit: int = 1000) -> list:
+        """One page of companies with their domains, ordered by company_id."""
+        query = self.client.table("companies").select(
+            "company_id, name, category, description, website, linkedin, company_domains(domain)"
+        )
+        if after_id:
+            query = query.gt("company_id", after_id)
+        result = query.order("company_id").limit(limit).execute()
+        return result.data or []
+
     # ==================== DUPLICATES ====================
 
     async def find_potential_duplicates(self, contact_id: str) -> list:
@@ -156,12 +194,241 @@ class Database:
         ).limit(limit).execute()
         return result.data or []
 
+    # ==================== MATCH INDEX ====================
+
+    MATCH_FIELDS = "contact_id, first_name, last_name, last_modified_at, contact_emails(email), contact_mobiles(mobile)"
+
+    async def get_contacts_changed_since(
+        self, after: tuple[str, str] | None, limit: int = 500, columns: str = None
+    ) -> list:
+        """
+        Contacts ordered by (last_modified_at, contact_id), after the given position.
+
+        Args:
+            after: (last_modified_at, contact_id) watermark; None starts from the beginning.
+                Rows without last_modified_at come first (watermark timestamp None).
+            columns: select list (defaults to MATCH_FIELDS; must include last_modified_at)
+        """
+        query = self.client.table("contacts").select(columns or self.MATCH_FIELDS)
+        if after:
+            modified_at, contact_id = after
+            if modified_at is None:
+                # Still inside the rows without a timestamp (they sort first)
+                query = query.or_(
+                    f"and(last_modified_at.is.null,contact_id.gt.{contact_id}),last_modified_at.not.is.null"
+                )
+            else:
+                query = query.or_(
+                    f'last_modified_at.gt."{modified_at}",'
+                    f'and(last_modified_at.eq."{modified_at}",contact_id.gt.{contact_id})'
+                )
+        result = query.order("last_modified_at", nullsfirst=True).order("contact_id").limit(limit).execute()
+        return result.data or []
+
+    async def get_contacts_for_match(self, contact_ids: list[str]) -> list:
+        """Matching fields for specific contacts."""
+        if not contact_ids:
+            return []
+        result = self.client.table("contacts").select(self.MATCH_FIELDS).in_("contact_id", contact_ids).execute()
+        return result.data or []
+
+    async def get_child_changes_since(
+        self, table: str, id_column: str, after: tuple[str, str | None], limit: int = 500
+    ) -> list:
+        """
+        contact_emails or contact_mobiles rows ordered by (last_modified_at, id), after the given position.
+
+        Args:
+            id_column: the table's primary key (email_id / mobile_id)
+            after: (last_modified_at, id) watermark; with no id, rows strictly after the timestamp
+        """
+        modified_at, row_id = after
+        query = self.client.table(table).select(f"{id_column}, contact_id, last_modified_at")
+        if row_id is None:
+            query = query.gt("last_modified_at", modified_at)
+        else:
+            query = query.or_(
+                f'last_modified_at.gt."{modified_at}",'
+                f'and(last_modified_at.eq."{modified_at}",{id_column}.gt.{row_id})'
+            )
+        result = query.order("last_modified_at").order(id_column).limit(limit).execute()
+        return result.data or []
+
+    async def get_match_index_entries(self, block_keys: list[str]) -> list:
+        """Index rows (block_key, contact_id) for the given keys."""
+        if not block_keys:
+            return []
+        result = self.client.table("contact_match_index").select("block_key, contact_id").in_(
+            "block_key", block_keys
+        ).execute()
+        return result.data or []
+
+    async def replace_match_index_entries(self, contact_ids: list[str], rows: list[dict]) -> None:
+        """Swap the index entries of the given contacts for rows."""
+        if contact_ids:
+            self.client.table("contact_match_index").delete(returning="minimal").in_(
+                "contact_id", contact_ids
+            ).execute()
+        if rows:
+            self.client.table("contact_match_index").upsert(
+                rows, on_conflict="block_key,contact_id", ignore_duplicates=True, returning="minimal"
+            ).execute()
+
+    async def get_dedup_watermark(self, scope: str) -> dict | None:
+        """Saved position of an incremental dedup scope."""
+        result = self.client.table("dedup_watermarks").select("*").eq("scope", scope).execute()
+        return result.data[0] if result.data else None
+
+    async def set_dedup_watermark(self, scope: str, watermark_at: str | None, watermark_id: str = None) -> None:
+        """Save the position of an incremental dedup scope."""
+        self.client.table("dedup_watermarks").upsert({
+            "scope": scope,
+            "watermark_at": watermark_at,
+            "watermark_id": watermark_id,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }, on_conflict="scope", returning="minimal").execute()
+
+    async def get_contacts_page(self, after_id: str = None, limit: int = 500) -> list:
+        """One page of contacts (match fields) ordered by contact_id, after after_id."""
+        query = self.client.table("contacts").select(self.MATCH_FIELDS)
+        if after_id:
+            query = query.gt("contact_id", after_id)
+        result = query.order("contact_id").limit(limit).execute()
+        return result.data or []
+
+    # ==================== TAGS ====================
+
+    async def get_tagged_contacts_page(self, after_id: str = None, limit: int = 1000) -> list:
+        """One page of tagged contacts with job_role, category, tag IDs and company names, by contact_id."""
+        query = self.client.table("contacts").select(
+            "contact_id, job_role, category, contact_tags!inner(tag_id), contact_companies(companies(name))"
+        )
+        if after_id:
+            query = query.gt("contact_id", after_id)
+        result = query.order("contact_id").limit(limit).execute()
+        return result.data or []
+
+    async def get_categorized_contacts_page(self, after_id: str = None, limit: int = 1000) -> list:
+        """One page of contacts with a category, with job_role and company names, by contact_id."""
+        query = self.client.table("contacts").select(
+            "contact_id, job_role, category, contact_companies(companies(name))"
+        ).not_.is_("category", "null")
+        if after_id:
+            query = query.gt("contact_id", after_id)
+        result = query.order("contact_id").limit(limit).execute()
+        return result.data or []
+
+    # ==================== CLEANUP JOBS ====================
+
+    async def create_cleanup_job(self, job: dict) -> dict:
+        """Create a cleanup job row."""
+        result = self.client.table("cleanup_jobs").insert(job).execute()
+        return result.data[0] if result.data else None
+
+    async def get_cleanup_job(self, job_id: str) -> dict:
+        """Get a cleanup job by ID."""
+        result = self.client.table("cleanup_jobs").select("*").eq("id", job_id).execute()
+        return result.data[0] if result.data else None
+
+    async def update_cleanup_job(self, job_id: str, updates: dict) -> dict:
+        """Update a cleanup job (also bumps its updated_at heartbeat)."""
+        result = self.client.table("cleanup_jobs").update({
+            **updates,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }).eq("id", job_id).execute()
+        return result.data[0] if result.data else None
+
+    async def claim_stale_cleanup_jobs(self, stale_before: str) -> list:
+        """
+        Claim interrupted jobs and unfinished jobs whose heartbeat is older
+        than stale_before.
+
+        Claimed jobs go back to 'queued' with a fresh heartbeat in the same
+        conditional update, so when several workers look at once each job is
+        claimed by only one.
+        """
+        claim = {"status": "queued", "updated_at": datetime.now(timezone.utc).isoformat()}
+        interrupted = self.client.table("cleanup_jobs").update(claim).eq("status", "interrupted").execute()
+        stale = self.client.table("cleanup_jobs").update(claim).in_(
+            "status", ["queued", "running"]
+        ).lt("updated_at", stale_before).execute()
+        return (interrupted.data or []) + (stale.data or [])
+
+    async def interrupt_cleanup_jobs(self, job_ids: list[str]) -> None:
+        """Mark unfinished jobs stopped by a shutdown as 'interrupted'."""
+        self.client.table("cleanup_jobs").update({
+            "status": "interrupted",
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }).in_("id", job_ids).in_("status", ["queued", "running"]).execute()
+
+    # ==================== APOLLO ENRICHMENT ====================
+
+    async def get_contacts_for_enrichment(self, contact_ids: list[str]) -> list:
+        """Names, LinkedIn, emails and companies of several contacts in one query."""
+        if not contact_ids:
+            return []
+        result = self.client.table("contacts").select(
+            "contact_id, first_name, last_name, linkedin, job_role, "
+            "contact_emails(email, is_primary), contact_companies(is_primary, companies(name, website))"
+        ).in_("contact_id", contact_ids).execute()
+        return result.data or []
+
+    async def get_apollo_inbox_rows(self, contact_ids: list[str]) -> list:
+        """apollo_enrichment_inbox rows (contact_id, status, processed_at) of several contacts."""
+        if not contact_ids:
+            return []
+        result = self.client.table("apollo_enrichment_inbox").select(
+            "contact_id, status, processed_at"
+        ).in_("contact_id", contact_ids).execute()
+        return result.data or []
+
+    async def upsert_apollo_inbox_rows(self, rows: list[dict]) -> None:
+        """Insert or update apollo_enrichment_inbox rows by contact_id in one request."""
+        if rows:
+            self.client.table("apollo_enrichment_inbox").upsert(
+                rows, on_conflict="contact_id", returning="minimal"
+            ).execute()
+
+    async def get_apollo_match_cache(self, match_keys: list[str], fetched_after: str) -> list:
+        """Cached Apollo matches (match_key, person) fetched after fetched_after."""
+        if not match_keys:
+            return []
+        result = self.client.table("apollo_match_cache").select("match_key, person").in_(
+            "match_key", match_keys
+        ).gte("fetched_at", fetched_after).execute()
+        return result.data or []
+
+    async def upsert_apollo_match_cache(self, rows: list[dict]) -> None:
+        """Store Apollo matches (match_key, person, fetched_at) in one request."""
+        if rows:
+            self.client.table("apollo_match_cache").upsert(
+                rows, on_conflict="match_key", returning="minimal"
+            ).execute()
+
     # ==================== SUGGESTIONS ====================
 
     async def create_suggestion(self, suggestion: dict) -> dict:
         """Create a new agent suggestion."""
         result = self.client.table("agent_suggestions").insert(suggestion).execute()
-        return result.data[0] if result.data else None
+        created = result.data[0] if result.data else None
+        if created:
+            from app.stats import suggestion_stats
+            from app.suggestion_index import suggestion_index
+            suggestion_stats.record_created(created)
+            suggestion_index.record_created(created)
+        return created
+
+    async def create_suggestions(self, suggestions: list[dict]) -> list:
+        """Create several suggestions in one insert; returns the inserted rows."""
+        if not suggestions:
+            return []
+        result = self.client.table("agent_suggestions").insert(suggestions).execute()
+        from app.stats import suggestion_stats
+        from app.suggestion_index import suggestion_index
+        for created in result.data or []:
+            suggestion_stats.record_created(created)
+            suggestion_index.record_created(created)
+        return result.data or []
 
     async def get_pending_suggestions(self, limit: int = 50) -> list:
         """Get pending suggestions for review."""
@@ -171,9 +438,15 @@ class Database:
         return result.data or []
 
     async def update_suggestion_status(
-        self, suggestion_id: str, status: str, reviewed_by: str = "user", notes: str = None
+        self, suggestion_id: str, status: str, reviewed_by: str = "user", notes: str = None,
+        previous_status: str = None,
     ) -> dict:
-        """Update suggestion status."""
+        """
+        Update suggestion status.
+
+        previous_status (the status the caller read) lets the stats cache move
+        the count; without it the cache is reloaded on next use.
+        """
         update_data = {
             "status": status,
             "reviewed_at": "now()",
@@ -185,7 +458,61 @@ class Database:
         result = self.client.table("agent_suggestions").update(
             update_data
         ).eq("id", suggestion_id).execute()
-        return result.data[0] if result.data else None
+        updated = result.data[0] if result.data else None
+        if updated:
+            from app.stats import suggestion_stats
+            from app.suggestion_index import suggestion_index
+            suggestion_index.record_reviewed(updated)
+            if previous_status:
+                suggestion_stats.record_status_change({**updated, "status": previous_status}, status)
+            else:
+                suggestion_stats.invalidate()
+        return updated
+
+    # IDs per in_ filter; 100 UUIDs keep the query string near 4 KB, well under gateway URL limits
+    SUGGESTION_ID_CHUNK = 100
+
+    async def get_suggestions_by_ids(self, suggestion_ids: list[str]) -> list:
+        """Fetch several suggestions, SUGGESTION_ID_CHUNK IDs per query."""
+        rows = []
+        for i in range(0, len(suggestion_ids), self.SUGGESTION_ID_CHUNK):
+            result = self.client.table("agent_suggestions").select("*").in_(
+                "id", suggestion_ids[i:i + self.SUGGESTION_ID_CHUNK]
+            ).execute()
+            rows.extend(result.data or [])
+        return rows
+
+    async def update_pending_suggestions_status(
+        self, suggestion_ids: list[str], status: str, reviewed_by: str = "user", notes: str = None
+    ) -> list[str]:
+        """
+        Set the status of several suggestions, SUGGESTION_ID_CHUNK IDs per update.
+
+        Only rows still pending are touched, so a concurrent review can't be
+        overwritten. Returns the IDs actually updated.
+        """
+        if not suggestion_ids:
+            return []
+        update_data = {
+            "status": status,
+            "reviewed_at": datetime.now(timezone.utc).isoformat(),
+            "reviewed_by": reviewed_by,
+        }
+        if notes:
+            update_data["user_notes"] = notes
+
+        from app.stats import suggestion_stats
+        from app.suggestion_index import suggestion_index
+        updated = []
+        for i in range(0, len(suggestion_ids), self.SUGGESTION_ID_CHUNK):
+            result = self.client.table("agent_suggestions").update(update_data).in_(
+                "id", suggestion_ids[i:i + self.SUGGESTION_ID_CHUNK]
+            ).eq("status", "pending").execute()
+            for row in result.data or []:
+                suggestion_index.record_reviewed(row)
+                suggestion_stats.record_status_change({**row, "status": "pending"}, status)
+                updated.append(row["id"])
+        return updated
 
     async def check_existing_suggestion(
         self, suggestion_type: str, primary_id: str, secondary_id: str = None
@@ -201,6 +528,61 @@ class Database:
         result = query.execute()
         return len(result.data or []) > 0
 
+    async def get_pending_suggestion_keys(self, after: str = None, limit: int = 1000) -> list:
+        """
+        Type and entity IDs of pending suggestions (plus cluster_members, the
+        merged IDs of duplicate_cluster ones), one page ordered by id.
+        """
+        query = self.client.table("agent_suggestions").select(
+            "id, suggestion_type, primary_entity_id, secondary_entity_id, "
+            "cluster_members:suggestion_data->merge_action->delete_ids"
+        ).eq("status", "pending")
+        if after:
+            query = query.gt("id", after)
+        result = query.order("id").limit(limit).execute()
+        return result.data or []
+
+    async def get_suggestions_page(
+        self,
+        columns: str = "*",
+        status: str = None,
+        suggestion_type: str = None,
+        entity_type: str = None,
+        after: tuple[str, str] = None,
+        limit: int = 50,
+    ) -> list:
+        """
+        One page of suggestions, newest first, keyset-paginated on (created_at, id).
+
+        Args:
+            after: (created_at, id) of the last row of the previous page
+        """
+        query = self.client.table("agent_suggestions").select(columns)
+        if status:
+            query = query.eq("status", status)
+        if suggestion_type:
+            query = query.eq("suggestion_type", suggestion_type)
+        if entity_type:
+            query = query.eq("entity_type", entity_type)
+        if after:
+            created_at, row_id = after
+            query = query.or_(
+                f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id})'
+            )
+        result = query.order("created_at", desc=True).order("id", desc=True).limit(limit).execute()
+        return result.data or []
+
+    async def get_suggestions_version(
+        self, status: str = None, suggestion_type: str = None, entity_type: str = None
+    ) -> str:
+        """Change marker for a filtered suggestion set (row count + latest create/review time)."""
+        result = self.client.rpc("agent_suggestions_version", {
+            "p_status": status,
+            "p_suggestion_type": suggestion_type,
+            "p_entity_type": entity_type,
+        }).execute()
+        return str(result.data or "")
+
     # ==================== ACTION LOG ====================
 
     async def log_action(self, action: dict) -> dict:
@@ -208,6 +590,23 @@ class Database:
         result = self.client.table("agent_action_log").insert(action).execute()
         return result.data[0] if result.data else None
 
+    async def get_recent_actions(self, limit: int = 10) -> list:
+        """Most recent agent actions."""
+        result = self.client.table("agent_action_log").select("*").order(
+            "created_at", desc=True
+        ).limit(limit).execute()
+        return result.data or []
+
+    async def get_suggestion_stats(self) -> list:
+        """Suggestion counts grouped by status, suggestion_type and entity_type."""
+        result = self.client.rpc("agent_suggestion_stats", {}).execute()
+        return result.data or []
+
+    async def log_actions(self, actions: list[dict]) -> None:
+        """Log several agent actions in one insert."""
+        if actions:
+            self.client.table("agent_action_log").insert(actions, returning="minimal").execute()
+
     # ==================== SPAM CHECK ====================
 
     async def is_spam_email(self, email: str) -> bool:
@@ -276,6 +675,68 @@ class Database:
             "chat_id", chat_id
         ).execute()
 
+    # ==================== ATTACHMENTS ====================
+
+    async def get_attachment_by_hash(self, content_hash: str) -> dict | None:
+        """Find a stored attachment with this content hash, preferring one with extracted text."""
+        result = self.client.table("attachments").select(
+            "attachment_id, permanent_url, file_size, content_hash, text_content, processed, processed_at"
+        ).eq("content_hash", content_hash).limit(20).execute()
+        if not result.data:
+            return None
+        return max(result.data, key=lambda a: bool(a.get("text_content")))
+
+    async def get_attachment_text_by_url(self, url: str) -> str | None:
+        """Get cached extracted text for an attachment by its stored URL."""
+        result = self.client.table("attachments").select("text_content").or_(
+            f'permanent_url.eq."{url}",file_url.eq."{url}"'
+        ).not_.is_("text_content", "null").limit(1).execute()
+        return result.data[0]["text_content"] if result.data else None
+
+    async def save_attachment_text(self, content_hash: str, text: str) -> None:
+        """Cache extracted text on every attachment row sharing this content hash."""
+        from datetime import datetime
+        self.client.table("attachments").update({
+            "text_content": text,
+            "processed": True,
+            "processed_at": datetime.utcnow().isoformat(),
+        }).eq("content_hash", content_hash).is_("text_content", "null").execute()
+
+    # ==================== CALENDAR ====================
+
+    async def get_calendar_inbox_rows(self, page_size: int = 1000) -> tuple[list, int]:
+        """Load id, event_uid and content_hash of all staged calendar events. Returns (rows, round_trips)."""
+        rows = []
+        round_trips = 0
+        offset = 0
+        while True:
+            result = self.client.table("command_center_inbox").select(
+                "id, event_uid, content_hash"
+            ).eq("type", "calendar").order("id").range(offset, offset + page_size - 1).execute()
+            round_trips += 1
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows, round_trips
+            offset += page_size
+
+    async def upsert_inbox_rows(self, rows: list[dict]) -> None:
+        """Insert or update inbox rows by primary key in one request."""
+        if rows:
+            self.client.table("command_center_inbox").upsert(
+                rows, on_conflict="id", returning="minimal"
+            ).execute()
+
+    async def delete_inbox_rows(self, ids: list[str]) -> None:
+        """Delete inbox rows by ID in one request."""
+        if ids:
+            self.client.table("command_center_inbox").delete(returning="minimal").in_("id", ids).execute()
+
+    async def get_dismissed_event_uids(self) -> set[str]:
+        """Event UIDs the user dismissed from the calendar inbox."""
+        result = self.client.table("calendar_dismissed").select("event_uid").execute()
+        return {r["event_uid"] for r in result.data} if result.data else set()
+
     # ==================== ACTION EXECUTION ====================
 
     async def add_contact_email(self, contact_id: str, email: str) -> dict:
@@ -544,6 +1005,90 @@ class Database:
 
         return {"merged": True, "kept": keep_id, "deleted": delete_id}
 
+    async def merge_contact_cluster(self, keep_id: str, delete_ids: list[str]) -> dict:
+        """
+        Merge a whole duplicate cluster into keep_id in one pass.
+
+        Same rules as merge_contacts, but every table is read and re-pointed
+        once for all of delete_ids (in_ filters) instead of once per pair, so
+        the number of queries doesn't grow with the cluster size.
+        """
+        delete_ids = [d for d in dict.fromkeys(delete_ids) if d and d != keep_id]
+        if not delete_ids:
+            return {"merged": False, "kept": keep_id, "deleted": []}
+
+        def move_unique(table: str, id_column: str, key_column: str, extra: dict = None, normalize=None):
+            """Re-point rows whose key the survivor doesn't have yet; delete the rest."""
+            rows = self.client.table(table).select(f"{id_column}, contact_id, {key_column}").in_(
+                "contact_id", [keep_id, *delete_ids]
+            ).execute().data or []
+            norm = normalize or (lambda v: v)
+            seen = {norm(r[key_column]) for r in rows if r["contact_id"] == keep_id}
+            to_move, to_delete = [], []
+            for row in rows:
+                if row["contact_id"] == keep_id:
+                    continue
+                key = norm(row[key_column])
+                if key in seen:
+                    to_delete.append(row[id_column])
+                else:
+                    seen.add(key)
+                    to_move.append(row[id_column])
+            if to_move:
+                self.client.table(table).update({"contact_id": keep_id, **(extra or {})}).in_(
+                    id_column, to_move
+                ).execute()
+            if to_delete:
+                self.client.table(table).delete().in_(id_column, to_delete).execute()
+
+        def move_link(table: str, key_column: str):
+            """Link tables without a row id: delete from the duplicates, insert missing keys on the survivor."""
+            rows = self.client.table(table).select(f"contact_id, {key_column}").in_(
+                "contact_id", [keep_id, *delete_ids]
+            ).execute().data or []
+            existing = {r[key_column] for r in rows if r["contact_id"] == keep_id}
+            missing = list(dict.fromkeys(
+                r[key_column] for r in rows if r["contact_id"] != keep_id and r[key_column] not in existing
+            ))
+            self.client.table(table).delete().in_("contact_id", delete_ids).execute()
+            if missing:
+                self.client.table(table).insert(
+                    [{"contact_id": keep_id, key_column: key} for key in missing]
+                ).execute()
+
+        move_unique("contact_emails", "email_id", "email", normalize=lambda v: (v or "").lower())
+        # Unset primary to avoid multiple primaries
+        move_unique("contact_mobiles", "mobile_id", "mobile", extra={"is_primary": False})
+        move_unique("contact_companies", "contact_companies_id", "company_id")
+        move_unique("deals_contacts", "id", "deal_id")
+        move_link("contact_tags", "tag_id")
+        move_link("contact_cities", "city_id")
+
+        # Tables that simply follow the contact
+        for table in (
+            "contact_chats", "contact_email_threads", "email_receivers", "email_participants",
+            "interactions", "investments_contacts", "meeting_contacts", "notes_contacts",
+            "note_contacts", "attachments", "email_list_members", "email_campaign_logs",
+            "introduction_contacts",
+        ):
+            self.client.table(table).update({"contact_id": keep_id}).in_("contact_id", delete_ids).execute()
+
+        self.client.table("deals").update({"introducer": keep_id}).in_("introducer", delete_ids).execute()
+        self.client.table("emails").update({"sender_contact_id": keep_id}).in_(
+            "sender_contact_id", delete_ids
+        ).execute()
+
+        # Data that isn't carried over
+        self.client.table("keep_in_touch").delete().in_("contact_id", delete_ids).execute()
+        self.client.table("apollo_enrichment_inbox").delete().in_("contact_id", delete_ids).execute()
+        self.client.table("contact_duplicates").delete().in_("primary_contact_id", delete_ids).execute()
+        self.client.table("contact_duplicates").delete().in_("duplicate_contact_id", delete_ids).execute()
+
+        # Delete the duplicate contacts
+        self.client.table("contacts").delete().in_("contact_id", delete_ids).execute()
+
+        return {"merged": True, "kept": keep_id, "deleted": delete_ids}
+
     async def delete_contact(self, contact_id: str) -> dict:
         """Delete a contact and all related data."""
         # Delete all related records first (all tables with FK to contacts)
@@ -623,6 +1168,30 @@ class Database:
         ).execute()
         return result.data[0] if result.data else None
 
+    async def get_contacts_completeness(self, contact_ids: list[str]) -> list:
+        """Completeness rows for several contacts in one query."""
+        if not contact_ids:
+            return []
+        result = self.client.table("contact_completeness").select(
+            "contact_id, completeness_score, email_count, mobile_count, company_count, city_count, tag_count"
+        ).in_("contact_id", contact_ids).execute()
+        return result.data or []
+
+    async def get_contact_completeness_page(self, after_id: str = None, limit: int = 1000) -> list:
+        """
+        One page of contacts with the completeness fields and linked-row counts
+        (emails, mobiles, companies, cities, tags), ordered by contact_id.
+        """
+        query = self.client.table("contacts").select(
+            "contact_id, first_name, last_name, category, birthday, linkedin, job_role, score, "
+            "last_interaction_at, contact_emails(count), contact_mobiles(count), "
+            "contact_companies(count), contact_cities(count), contact_tags(count)"
+        )
+        if after_id:
+            query = query.gt("contact_id", after_id)
+        result = query.order("contact_id").limit(limit).execute()
+        return result.data or []
+
     async def get_contact_full_audit(self, contact_id: str) -> dict | None:
         """Get complete contact data for audit."""
         result = self.client.table("contacts").select(
@@ -646,19 +1215,13 @@ class Database:
         return result.data or []
 
     async def find_contacts_by_name_fuzzy(self, first_name: str, last_name: str = None) -> list:
-        """Find contacts with fuzzy name match."""
-        query = self.client.table("contacts").select(
-            "contact_id, first_name, last_name, category, created_at"
+        """Find contacts with fuzzy name match (see app.name_index)."""
+        from app.name_index import name_index
+        return await name_index.search_contacts(
+            first_name, last_name, limit=50,
+            columns="contact_id, first_name, last_name, category, created_at",
         )
 
-        if first_name:
-            query = query.ilike("first_name", f"%{first_name}%")
-        if last_name:
-            query = query.or_(f"last_name.ilike.%{last_name}%,last_name.ilike.%{first_name}%")
-
-        result = query.limit(50).execute()
-        return result.data or []
-
     async def get_contacts_by_mobile(self, mobile: str) -> list:
         """Find contacts with this mobile number."""
         # Normalize to last 10 digits
@@ -722,16 +1285,9 @@ class Database:
     # ==================== COMPANY AUDIT ====================
 
     async def get_company_by_domain_flexible(self, domain: str) -> list:
-        """Find companies by domain (handles malformed domains)."""
-        # Clean domain
-        clean_domain = domain.lower().replace("http://", "").replace("https://", "").replace("www.", "").strip("/")
-
-        result = self.client.table("company_domains").select(
-            "company_id, domain, is_primary, companies(*)"
-        ).or_(
-            f"domain.ilike.%{clean_domain}%,domain.ilike.%{domain}%"
-        ).execute()
-        return result.data or []
+        """Find companies by domain (handles malformed domains and subdomains)."""
+        from app.domain_index import domain_index
+        return await domain_index.find(domain)
 
     async def is_personal_email_domain(self, domain: str) -> bool:
         """Check if domain is a personal email provider (gmail, hotmail, etc.)."""
@@ -780,6 +1336,9 @@ class Database:
 
     async def update_company_domain(self, company_id: str, old_domain: str, new_domain: str) -> dict:
         """Fix a company domain - handles case where new_domain already exists."""
+        from app.domain_index import domain_index
+        domain_index.invalidate()
+
         # Check if new_domain already exists on this company
         existing = self.client.table("company_domains").select("id").eq(
             "company_id", company_id
@@ -800,6 +1359,9 @@ class Database:
 
     async def merge_companies(self, keep_id: str, delete_id: str) -> dict:
         """Merge two companies - move all data from delete_id to keep_id, then delete."""
+        from app.domain_index import domain_index
+        domain_index.invalidate()
+
         # Get existing domains on keep_id
         existing_domains = self.client.table("company_domains").select("domain").eq(
             "company_id", keep_id
@@ -849,6 +1411,17 @@ class Database:
 
         return {"merged": True, "kept": keep_id, "deleted": delete_id}
 
+    async def get_deals_page(self, after_id: str = None, limit: int = 1000) -> list:
+        """One page of deals with linked contact and company IDs, ordered by deal_id."""
+        query = self.client.table("deals").select(
+            "deal_id, opportunity, total_investment, deal_currency, stage, category, created_at, "
+            "deals_contacts(contact_id), deal_companies(company_id)"
+        )
+        if after_id:
+            query = query.gt("deal_id", after_id)
+        result = query.order("deal_id").limit(limit).execute()
+        return result.data or []
+
     async def create_deal(self, deal_data: dict) -> dict:
         """Create a new deal."""
         result = self.client.table("deals").insert(deal_data).execute()
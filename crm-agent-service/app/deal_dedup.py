@@ -0,0 +1,240 @@
+"""Bulk deal duplicate detection for /run-cleanup entity_type=deal."""
+
+import asyncio
+from itertools import combinations
+
+import numpy as np
+from rapidfuzz import fuzz, process
+import structlog
+
+from app.company_dedup import normalize_company_name
+from app.config import get_settings
+from app.database import db
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+# Weights of the pair score components (sum to 1)
+WEIGHTS = {"name": 0.45, "contacts": 0.2, "amount": 0.15, "currency": 0.1, "company": 0.1}
+MAX_BLOCK_SIZE = 200
+PLACEHOLDER_VALUES = {None, "", "Inbox", "Not Set"}
+
+
+def _linked(deal: dict, table: str, key: str) -> frozenset:
+    return frozenset(r[key] for r in deal.get(table) or [] if r.get(key))
+
+
+def candidate_pairs(names: list[str], companies: list[frozenset]) -> np.ndarray:
+    """
+    (i, j) index pairs sharing a block: an opportunity name token (3+ chars)
+    or a linked company. Blocks over MAX_BLOCK_SIZE are skipped.
+    """
+    blocks: dict[str, list[int]] = {}
+    for i, (name, company_ids) in enumerate(zip(names, companies)):
+        for token in set(name.split()):
+            if len(token) >= 3:
+                blocks.setdefault(f"name:{token}", []).append(i)
+        for company_id in company_ids:
+            blocks.setdefault(f"company:{company_id}", []).append(i)
+
+    pairs = {
+        pair
+        for members in blocks.values() if 1 < len(members) <= MAX_BLOCK_SIZE
+        for pair in combinations(members, 2)
+    }
+    return np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+
+
+def score_deal_pairs(deals: list[dict], min_name_similarity: float, threshold: float) -> list[dict]:
+    """
+    Score every blocked deal pair in one vectorized pass.
+
+    Components (0-1): opportunity name similarity (rapidfuzz cpdist over all
+    pairs), overlap of deals_contacts (Jaccard), amount proximity (1 minus the
+    relative difference, only when both amounts are set in the same
+    currency), currency agreement and a shared linked company. Unknown
+    amount/currency count as 0.5. Pairs whose names are less similar than
+    min_name_similarity are dropped even at the same company, since one
+    company can have several real deals.
+
+    Returns:
+        edges {"a", "b", "score", "components"} with score >= threshold
+    """
+    if len(deals) < 2:
+        return []
+    names = [normalize_company_name(d.get("opportunity")) for d in deals]
+    contacts = [_linked(d, "deals_contacts", "contact_id") for d in deals]
+    companies = [_linked(d, "deal_companies", "company_id") for d in deals]
+
+    pairs = candidate_pairs(names, companies)
+    if not len(pairs):
+        return []
+    i, j = pairs[:, 0], pairs[:, 1]
+
+    name_sim = process.cpdist(
+        [names[k] for k in i], [names[k] for k in j], scorer=fuzz.token_sort_ratio, workers=-1,
+    ).astype(np.float64)
+
+    amounts = np.array(
+        [float(d["total_investment"]) if d.get("total_investment") else np.nan for d in deals]
+    )
+    currencies = np.array([(d.get("deal_currency") or "").upper() for d in deals])
+    currency_known = (currencies[i] != "") & (currencies[j] != "")
+    same_currency = currencies[i] == currencies[j]
+    currency = np.where(currency_known, same_currency.astype(np.float64), 0.5)
+
+    a, b = amounts[i], amounts[j]
+    comparable = ~np.isnan(a) & ~np.isnan(b) & (same_currency | ~currency_known)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        proximity = 1.0 - np.abs(a - b) / np.maximum(np.abs(a), np.abs(b))
+    amount = np.where(comparable, np.nan_to_num(proximity, nan=1.0), 0.5)
+
+    contact_overlap = np.array([
+        len(contacts[x] & contacts[y]) / len(contacts[x] | contacts[y]) if contacts[x] | contacts[y] else 0.0
+        for x, y in pairs
+    ])
+    shared_company = np.array([bool(companies[x] & companies[y]) for x, y in pairs], dtype=np.float64)
+
+    score = (
+        WEIGHTS["name"] * name_sim / 100
+        + WEIGHTS["contacts"] * contact_overlap
+        + WEIGHTS["amount"] * amount
+        + WEIGHTS["currency"] * currency
+        + WEIGHTS["company"] * shared_company
+    )
+    keep = np.flatnonzero((score >= threshold) & (name_sim >= min_name_similarity))
+
+    return [
+        {
+            "a": deals[i[k]]["deal_id"],
+            "b": deals[j[k]]["deal_id"],
+            "score": round(float(score[k]), 3),
+            "components": {
+                "name": round(float(name_sim[k]), 1),
+                "contacts": round(float(contact_overlap[k]), 2),
+                "amount": round(float(amount[k]), 2),
+                "currency": float(currency[k]),
+                "company": bool(shared_company[k]),
+            },
+        }
+        for k in keep
+    ]
+
+
+def _deal_rank(deal: dict) -> tuple:
+    """Higher is a better merge survivor: more filled fields and links, then older."""
+    filled = sum(deal.get(f) not in PLACEHOLDER_VALUES for f in ("total_investment", "deal_currency", "category"))
+    filled += deal.get("stage") not in PLACEHOLDER_VALUES | {"Lead"}
+    links = len(deal.get("deals_contacts") or []) + len(deal.get("deal_companies") or [])
+    return (filled, links)
+
+
+class DealDedupEngine:
+    """
+    One-pass duplicate scan over all deals.
+
+    Deals extracted from email and WhatsApp often describe the same
+    opportunity. All deals (with their contact and company links) are loaded
+    in keyset pages, scored in a worker thread, and "duplicate" suggestions
+    fold each cluster into its most complete deal along direct matches
+    (see clusters.merge_plan).
+    """
+
+    def __init__(self, page_size: int = 1000):
+        self.db = db
+        self.page_size = page_size
+
+    async def load_deals(self) -> list[dict]:
+        deals, after = [], None
+        while True:
+            page = await self.db.get_deals_page(after, self.page_size)
+            deals.extend(page)
+            if len(page) < self.page_size:
+                return deals
+            after = page[-1]["deal_id"]
+
+    async def run(self) -> dict:
+        """
+        Scan all deals and create suggestions.
+
+        Returns:
+            dict with scanned, pairs, clusters and the SuggestionWriter report
+        """
+        from app.clusters import suggest_cluster_merges
+        from app.suggestion_index import suggestion_index
+
+        deals = await self.load_deals()
+        by_id = {d["deal_id"]: d for d in deals}
+        candidates = await asyncio.to_thread(
+            score_deal_pairs, deals, settings.deal_name_min_similarity, settings.deal_match_threshold,
+        )
+
+        await suggestion_index.refresh()
+        edges = [e for e in candidates if not suggestion_index.exists("duplicate", e["a"], e["b"])]
+
+        def pick(member_ids: list[str]) -> str:
+            # Ties go to the oldest deal, then the smallest ID
+            ordered = sorted(member_ids, key=lambda m: (by_id[m].get("created_at") or "", m))
+            return max(ordered, key=lambda m: _deal_rank(by_id[m]))
+
+        clusters, written = await suggest_cluster_merges(
+            edges,
+            pick=pick,
+            build=lambda keep, dupe, edge: _deal_suggestion(by_id[keep], by_id[dupe], edge),
+            entity_type="deal",
+        )
+
+        report = {"scanned": len(deals), "pairs": len(edges), "clusters": clusters, **written}
+        logger.info("deal_dedup_complete", **report)
+        return report
+
+
+def _deal_summary(deal: dict) -> dict:
+    return {
+        "deal_id": deal["deal_id"],
+        "opportunity": deal.get("opportunity"),
+        "total_investment": deal.get("total_investment"),
+        "deal_currency": deal.get("deal_currency"),
+        "stage": deal.get("stage"),
+        "created_at": deal.get("created_at"),
+        "contact_ids": sorted(_linked(deal, "deals_contacts", "contact_id")),
+        "company_ids": sorted(_linked(deal, "deal_companies", "company_id")),
+    }
+
+
+def _deal_suggestion(keep: dict, dupe: dict, edge: dict) -> dict:
+    confidence = round(min(edge["score"], 0.95), 2)
+    components = edge["components"]
+    reasons = ["Similar name"]
+    if components["contacts"]:
+        reasons.append("same contacts")
+    if components["company"]:
+        reasons.append("same company")
+    if components["amount"] >= 0.9 and components["currency"] == 1.0:
+        reasons.append("same amount")
+
+    return {
+        "suggestion_type": "duplicate",
+        "entity_type": "deal",
+        "primary_entity_id": keep["deal_id"],
+        "secondary_entity_id": dupe["deal_id"],
+        "confidence_score": confidence,
+        "priority": "high" if confidence >= 0.85 else "medium",
+        "suggestion_data": {
+            "match_type": "deal_similarity",
+            "match_value": f"{keep.get('opportunity')} ~ {dupe.get('opportunity')}",
+            "score": edge["score"],
+            "components": components,
+            "short_reason": ", ".join(reasons),
+            "primary_deal": _deal_summary(keep),
+            "duplicate_deal": _deal_summary(dupe),
+        },
+        "agent_reasoning": f"Deal similarity {edge['score']}: " + ", ".join(
+            f"{k}={v}" for k, v in components.items()
+        ),
+        "source_description": "Deal duplicate scan",
+    }
+
+
+# Singleton instance
+deal_dedup = DealDedupEngine()
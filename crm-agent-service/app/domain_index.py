@@ -0,0 +1,193 @@
+"""In-memory domain -> company index built from company_domains."""
+
+import time
+
+import structlog
+
+from app.audit import normalize_domain
+from app.config import get_settings
+from app.database import db
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+# Multi-label public suffixes (registrations happen one label below these).
+# Any single TLD is a public suffix too, so "acme.com" and "acme.it" need no entry.
+PUBLIC_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "ltd.uk", "plc.uk", "me.uk", "net.uk",
+    "com.au", "net.au", "org.au", "edu.au", "co.nz", "org.nz",
+    "co.jp", "ne.jp", "or.jp", "co.kr", "or.kr", "com.cn", "net.cn", "com.hk", "com.tw", "com.sg", "com.my",
+    "co.in", "net.in", "co.id", "co.th", "com.ph", "com.vn",
+    "co.za", "co.il", "org.il", "com.tr", "com.eg", "co.ke", "com.ng", "com.sa", "co.ae",
+    "com.br", "com.mx", "com.ar", "com.co", "com.pe", "com.uy", "cl.cl",
+    "com.pl", "net.pl", "org.pl", "co.at", "or.at", "com.es", "com.pt", "com.gr", "com.cy", "com.mt",
+    "com.ua", "com.ru", "co.hu", "com.ro", "co.rs", "com.hr",
+    "gov.it", "edu.it",
+}
+# Compared label-reversed: ("uk", "co")
+_REVERSED_SUFFIXES = {tuple(reversed(s.split("."))) for s in PUBLIC_SUFFIXES}
+
+
+def clean_host(domain: str) -> str:
+    """normalize_domain plus dropping any path, port, email local part and trailing dot."""
+    host = normalize_domain((domain or "").strip().rsplit("@", 1)[-1])
+    return host.split("/")[0].split(":")[0].strip(".")
+
+
+def registrable_domain(domain: str) -> str:
+    """
+    The registrable part of a host: one label below its public suffix.
+
+    "mail.acme.co.uk" -> "acme.co.uk", "eu.acme.com" -> "acme.com".
+    A bare public suffix is returned unchanged.
+    """
+    labels = clean_host(domain).split(".")
+    if len(labels) < 2:
+        return ".".join(labels)
+    reversed_labels = tuple(reversed(labels))
+    suffix_len = 2 if reversed_labels[:2] in _REVERSED_SUFFIXES else 1
+    return ".".join(labels[-(suffix_len + 1):])
+
+
+class _Node:
+    __slots__ = ("children", "entries")
+
+    def __init__(self):
+        self.children: dict[str, "_Node"] = {}
+        self.entries: list[dict] = []
+
+
+class DomainIndex:
+    """
+    Domain lookups without ilike scans.
+
+    Every company_domains row is normalized and filed under its registrable
+    domain; hosts below that are kept in a reversed-label trie, so
+    "mail.acme.co.uk" resolves to the most specific stored domain on its
+    path ("mail.acme.co.uk" if stored, else "acme.co.uk"). A lookup is a
+    dict hit plus a walk over the host's extra labels - constant in the
+    number of companies - and never matches unrelated domains the way
+    ilike '%ab.com%' matched grab.com.
+
+    Loaded with one paged query; refreshed after domain_index_ttl seconds,
+    invalidated when this service edits company_domains, and checked
+    against the table on a miss (see find).
+    """
+
+    def __init__(self, ttl: float | None = None, page_size: int = 1000):
+        self.db = db
+        self.ttl = ttl if ttl is not None else settings.domain_index_ttl
+        self.page_size = page_size
+        self.roots: dict[str, _Node] = {}
+        self.loaded_at: float | None = None
+
+    def _fresh(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl
+
+    def invalidate(self) -> None:
+        self.loaded_at = None
+
+    @staticmethod
+    def _path(host: str) -> tuple[str, list[str]]:
+        """(registrable domain, labels below it from the top down)."""
+        registrable = registrable_domain(host)
+        extra = host[:-len(registrable)].rstrip(".") if host != registrable else ""
+        return registrable, list(reversed(extra.split("."))) if extra else []
+
+    @classmethod
+    def _insert(cls, roots: dict[str, _Node], host: str, entry: dict) -> None:
+        registrable, labels = cls._path(host)
+        node = roots.setdefault(registrable, _Node())
+        for label in labels:
+            node = node.children.setdefault(label, _Node())
+        node.entries.append(entry)
+
+    @classmethod
+    def _insert_row(cls, roots: dict[str, _Node], row: dict) -> None:
+        """File a company_domains row (with its embedded company)."""
+        host = clean_host(row.get("domain"))
+        if host and row.get("companies"):
+            cls._insert(roots, host, {
+                "company_id": row["company_id"],
+                "domain": row["domain"],
+                "is_primary": row.get("is_primary"),
+                "companies": row["companies"],
+            })
+
+    async def refresh(self) -> None:
+        """Rebuild from company_domains."""
+        roots: dict[str, _Node] = {}
+        after, rows = None, 0
+        while True:
+            page = await self.db.get_company_domains_page(after, self.page_size)
+            for row in page:
+                self._insert_row(roots, row)
+            rows += len(page)
+            if len(page) < self.page_size:
+                break
+            after = page[-1]["id"]
+        self.roots = roots
+        self.loaded_at = time.monotonic()
+        logger.info("domain_index_loaded", domains=rows, registrable_domains=len(roots))
+
+    async def ensure_loaded(self) -> None:
+        if not self._fresh():
+            await self.refresh()
+
+    def lookup(self, domain: str) -> list[dict]:
+        """
+        company_domains matches for a domain, URL or email address, most
+        specific first: {"company_id", "domain", "is_primary", "companies"}.
+        """
+        host = clean_host(domain)
+        if not host:
+            return []
+        registrable, labels = self._path(host)
+        node = self.roots.get(registrable)
+        if node is None:
+            return []
+        levels = [node.entries]
+        for label in labels:
+            node = node.children.get(label)
+            if node is None:
+                break
+            levels.append(node.entries)
+        # Deepest (most specific) level first, primary domains first within a level.
+        # Copies, so callers can annotate results without touching the index.
+        return [
+            {**entry, "companies": dict(entry["companies"])}
+            for entries in reversed(levels)
+            for entry in sorted(entries, key=lambda e: not e.get("is_primary"))
+        ]
+
+    async def find(self, domain: str) -> list[dict]:
+        """
+        lookup(), loading the index first if needed.
+
+        The frontend writes company_domains directly, so a miss is checked
+        with an exact (indexed) query for the host and its registrable
+        domain (bare or www.) before answering "no company"; rows found are added to the
+        index.
+        """
+        await self.ensure_loaded()
+        matches = self.lookup(domain)
+        host = clean_host(domain)
+        if matches or not host:
+            return matches
+        registrable = registrable_domain(host)
+        rows = await self.db.get_company_domains_exact(sorted({host, registrable, f"www.{registrable}"}))
+        if not rows:
+            return []
+        logger.info("domain_index_miss_found", domain=host, rows=len(rows))
+        for row in rows:
+            self._insert_row(self.roots, row)
+        return self.lookup(domain)
+
+    async def find_company(self, domain: str) -> dict | None:
+        """The best-matching company for a domain, or None."""
+        matches = await self.find(domain)
+        return matches[0]["companies"] if matches else None
+
+
+# Singleton instance
+domain_index = DomainIndex()
@@ -0,0 +1,176 @@
+"""Email body preprocessing for model prompts: quoted history, boilerplate, token budgets."""
+
+import re
+
+import structlog
+
+logger = structlog.get_logger()
+
+# First line of quoted history in a reply; everything from here down is dropped
+QUOTE_HEADER = re.compile(
+    r"^(?:On .{0,200}wrote:|Il giorno .{0,200}ha scritto:|Le .{0,200}a écrit :|Am .{0,200}schrieb .{0,100}:"
+    r"|-{2,}\s*(?:Original Message|Messaggio originale)\s*-{2,})$",
+    re.IGNORECASE,
+)
+# Forwarded-message banner; the forwarded text itself is kept, its header lines are not
+FORWARD_BANNER = re.compile(
+    r"^-{2,}\s*(?:Forwarded message|Messaggio inoltrato|Begin forwarded message)\s*-{0,}:?$|^Begin forwarded message:$",
+    re.IGNORECASE,
+)
+HEADER_LINE = re.compile(r"^(?:From|To|Cc|Date|Sent|Subject|Da|A|Data|Inviato|Oggetto):\s", re.IGNORECASE)
+# Outlook puts a rule and a From:/Sent:/To:/Subject: block above both quoted
+# replies and forwards instead of a banner; the Subject tells them apart
+OUTLOOK_RULE = re.compile(r"^_{10,}$")
+FORWARD_SUBJECT = re.compile(r"^(?:Subject|Oggetto):\s*(?:fwd?|i|inoltro|tr)\s*:", re.IGNORECASE)
+# Start of a legal disclaimer; the rest of the message is dropped. Only real
+# legal phrasing counts, so "This email is a follow-up on..." is kept
+DISCLAIMER = re.compile(
+    r"^(?:(?:this|the information (?:in|contained in) this) (?:e-?mail|message|communication|transmission)\b.{0,120}?"
+    r"\b(?:confidential|privileged|intended (?:only|solely|exclusively) for|(?:named )?addressee)"
+    r"|confidential(?:ity)? (?:notice|note|statement)|disclaimer\s*(?::|$)|privileged (?:and|&) confidential"
+    r"|(?:questa (?:e-?mail|comunicazione)|il presente messaggio|le informazioni contenute)\b.{0,120}?"
+    r"\b(?:riservat|confidenzial|destinat)"
+    r"|ai sensi del(?:l['’]art|\s+(?:d\.?\s?lgs|reg|gdpr)))",
+    re.IGNORECASE,
+)
+# Single footer lines: mobile client tags, unsubscribe and tracking links
+FOOTER_LINE = re.compile(
+    r"^(?:sent from my \w+|inviato da(?:l mio)? \w+|get outlook for \w+|sent via \w+"
+    r"|.*\bunsubscribe\b.*|.*\bview (?:this email )?in (?:your )?browser\b.*|.*\bmanage (?:your )?preferences\b.*"
+    r"|please consider the environment.*)$",
+    re.IGNORECASE,
+)
+TRACKING_URL = re.compile(r"^<?https?://\S*(?:utm_|track|click|open\?|pixel|list-manage|mandrillapp|sendgrid)\S*>?$", re.IGNORECASE)
+WORD = re.compile(r"\w+|[^\w\s]")
+TRUNCATION_MARK = "[...]"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough model token count: one per punctuation mark and per word, plus one
+    for every 4 characters past the first in long words. Close enough for
+    budgeting without a tokenizer.
+    """
+    return sum(1 + (len(token) - 1) // 4 for token in WORD.findall(text or ""))
+
+
+def outlook_header_at(lines: list[str], i: int) -> bool:
+    """
+    Whether lines[i] opens an Outlook header block: a From:/Da: line followed
+    by another header line (Sent:, To:, Subject:...), or the rule above one.
+    """
+    stripped = lines[i].strip()
+    following = [j for j in range(i + 1, len(lines)) if lines[j].strip()]
+    if OUTLOOK_RULE.match(stripped):
+        return bool(following) and outlook_header_at(lines, following[0])
+    if not re.match(r"^(?:From|Da):\s", stripped, re.IGNORECASE):
+        return False
+    return bool(following) and bool(HEADER_LINE.match(lines[following[0]].strip()))
+
+
+def outlook_forward_at(lines: list[str], i: int) -> bool:
+    """Whether the Outlook header block opening at lines[i] has a FW:/Fwd:/I: subject."""
+    for line in lines[i + 1:]:
+        stripped = line.strip()
+        if FORWARD_SUBJECT.match(stripped):
+            return True
+        if stripped and not HEADER_LINE.match(stripped):
+            return False
+    return False
+
+
+def strip_quoted(text: str) -> str:
+    """
+    The newest message only: drops '>' lines and everything from the first
+    reply header ("On ... wrote:", "-----Original Message-----", an Outlook
+    header block). Forwarded messages keep their text; only the banner and
+    its From/To/Date/Subject lines go. An Outlook block counts as a forward
+    when a banner precedes it or its Subject is FW:/Fwd:/I:.
+    """
+    lines, in_forward_header = [], False
+    source = (text or "").splitlines()
+    for i, line in enumerate(source):
+        stripped = line.strip()
+        if FORWARD_BANNER.match(stripped):
+            in_forward_header = True
+            continue
+        if outlook_header_at(source, i):
+            if not (in_forward_header or outlook_forward_at(source, i)):
+                break
+            in_forward_header = True
+            continue
+        if in_forward_header:
+            if HEADER_LINE.match(stripped) or not stripped:
+                continue
+            in_forward_header = False
+        elif QUOTE_HEADER.match(stripped):
+            break
+        if stripped.startswith(">"):
+            continue
+        lines.append(line.rstrip())
+    return "\n".join(lines).strip()
+
+
+def strip_boilerplate(text: str) -> str:
+    """Drops legal disclaimers (to the end), client footers, unsubscribe and tracking lines."""
+    lines = []
+    for line in (text or "").splitlines():
+        stripped = line.strip()
+        if DISCLAIMER.match(stripped):
+            break
+        if FOOTER_LINE.match(stripped) or TRACKING_URL.match(stripped):
+            continue
+        lines.append(line.rstrip())
+    # Collapse the blank runs left behind
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def truncate_tokens(text: str, budget: int, keep: str = "both") -> str:
+    """
+    Cut text to about budget tokens on line boundaries.
+
+    keep="head" keeps the start, "tail" the end (latest messages of a chat
+    log), "both" the first three quarters of the budget from the start and
+    the rest from the end, so a sign-off and signature survive a long body.
+    """
+    if not text or estimate_tokens(text) <= budget:
+        return text or ""
+    lines = text.splitlines()
+    costs = [estimate_tokens(line) + 1 for line in lines]
+
+    def take(indices, allowance):
+        kept, used = [], 0
+        for i in indices:
+            if used + costs[i] > allowance:
+                break
+            kept.append(i)
+            used += costs[i]
+        return kept
+
+    if keep == "head":
+        head, tail = take(range(len(lines)), budget), []
+    elif keep == "tail":
+        head, tail = [], take(range(len(lines) - 1, -1, -1), budget)
+    else:
+        head = take(range(len(lines)), budget * 3 // 4)
+        tail = take(range(len(lines) - 1, head[-1] if head else -1, -1), budget - sum(costs[i] for i in head))
+
+    if not head and not tail:
+        # A single line longer than the whole budget
+        return text[:budget * 4] + " " + TRUNCATION_MARK
+    parts = [lines[i] for i in head] + [TRUNCATION_MARK] + [lines[i] for i in reversed(tail)]
+    return "\n".join(parts).strip()
+
+
+def prepare_email_body(text: str, budget: int, keep: str = "both") -> str:
+    """strip_quoted, strip_boilerplate, then truncate_tokens: the body as a prompt should see it."""
+    cleaned = strip_boilerplate(strip_quoted(text))
+    prepared = truncate_tokens(cleaned, budget, keep)
+    if text:
+        logger.debug(
+            "email_body_prepared",
+            chars_in=len(text),
+            chars_out=len(prepared),
+            tokens_out=estimate_tokens(prepared),
+        )
+    return prepared
@@ -0,0 +1,410 @@
+"""
+Windowed ICS parsing.
+
+Everything here is pure (no database, no event loop) so it can run in a
+worker process. Feeds are pre-scanned as text and only VEVENTs that can
+touch the sync window are handed to icalendar. A recurring event stays
+one record under its series UID (as the CalDAV sync writes it), dated at
+its next occurrence inside the window.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+import json
+import re
+
+from dateutil.rrule import rruleset, rrulestr
+from icalendar import Calendar
+
+_DATE_RE = re.compile(r'(\d{4})(\d{2})(\d{2})')
+
+
+# ==================== COMPONENT -> RECORD ====================
+
+def _clean_summary(raw_summary: str) -> str:
+    """Clean language prefix from summary (e.g., "LANGUAGE=en-gb:Title" -> "Title")."""
+    if raw_summary.startswith('LANGUAGE='):
+        parts = raw_summary.split(':', 1)
+        return parts[1] if len(parts) > 1 else raw_summary
+    return raw_summary
+
+
+def event_to_record(component) -> dict | None:
+    """Build a command_center_inbox record from a VEVENT component."""
+    event_uid = str(component.get('uid', ''))
+    if not event_uid:
+        return None
+
+    # Parse dates
+    dtstart = component.get('dtstart')
+    dtend = component.get('dtend')
+
+    start_dt = dtstart.dt if dtstart else None
+    end_dt = dtend.dt if dtend else None
+
+    # Convert date to datetime if needed
+    if start_dt and not hasattr(start_dt, 'hour'):
+        start_dt = datetime.combine(start_dt, time.min)
+    if end_dt and not hasattr(end_dt, 'hour'):
+        end_dt = datetime.combine(end_dt, time.max)
+
+    # Extract organizer
+    organizer = component.get('organizer')
+    organizer_email = None
+    organizer_name = None
+    if organizer:
+        organizer_str = str(organizer)
+        if organizer_str.startswith('mailto:'):
+            organizer_email = organizer_str[7:]
+        organizer_name = str(organizer.params.get('cn', '')) if hasattr(organizer, 'params') else None
+
+    # Extract attendees
+    attendees = []
+    raw_attendees = component.get('attendee')
+    if raw_attendees:
+        # Normalize to list (single attendee returns object, multiple returns list)
+        if not isinstance(raw_attendees, list):
+            raw_attendees = [raw_attendees]
+        for att in raw_attendees:
+            if att:
+                att_email = str(att)
+                if att_email.startswith('mailto:'):
+                    att_email = att_email[7:]
+                att_name = str(att.params.get('cn', '')) if hasattr(att, 'params') else ''
+                att_status = str(att.params.get('partstat', 'NEEDS-ACTION')) if hasattr(att, 'params') else 'NEEDS-ACTION'
+                attendees.append({
+                    "email": att_email,
+                    "name": att_name,
+                    "status": att_status
+                })
+
+    rrule = component.get('rrule')
+
+    record = {
+        "type": "calendar",
+        "event_uid": event_uid,
+        "subject": _clean_summary(str(component.get('summary', ''))),
+        "body_text": str(component.get('description', '')),
+        "date": start_dt.isoformat() if start_dt else None,
+        "event_end": end_dt.isoformat() if end_dt else None,
+        "event_location": str(component.get('location', '')),
+        "from_name": organizer_name,
+        "from_email": organizer_email,
+        "to_recipients": json.dumps(attendees) if attendees else None,
+        "recurrence_rule": rrule.to_ical().decode() if rrule else None,
+        "is_read": False
+    }
+
+    # Empty strings are stored as NULL. Keys are kept so every row in a bulk
+    # upsert has the same shape (and removed fields are cleared on update).
+    return {k: (None if v == '' else v) for k, v in record.items()}
+
+
+def is_cancelled(component) -> bool:
+    """Whether a VEVENT has STATUS:CANCELLED."""
+    return str(component.get('status', 'CONFIRMED')).upper() == 'CANCELLED'
+
+
+# ==================== TEXT PRE-SCAN ====================
+
+def _unfold(text: str) -> list[str]:
+    """Undo RFC 5545 line folding and split into content lines."""
+    return (
+        text.replace('\r\n ', '').replace('\r\n\t', '')
+        .replace('\n ', '').replace('\n\t', '')
+        .splitlines()
+    )
+
+
+def split_feed(text: str) -> tuple[list[str], list[list[str]]]:
+    """Split a feed into raw VTIMEZONE blocks and raw VEVENT blocks (lists of lines)."""
+    timezones, events = [], []
+    block = None
+    block_end = None
+    for line in _unfold(text):
+        if block is None:
+            if line == 'BEGIN:VEVENT':
+                block, block_end = [line], 'END:VEVENT'
+            elif line == 'BEGIN:VTIMEZONE':
+                block, block_end = [line], 'END:VTIMEZONE'
+            continue
+        block.append(line)
+        if line == block_end:
+            if block_end == 'END:VEVENT':
+                events.append(block)
+            else:
+                timezones.append('\r\n'.join(block))
+            block = None
+    return timezones, events
+
+
+def _line_date(line: str) -> date | None:
+    """Calendar date of a DTSTART/DTEND line, ignoring time and zone."""
+    match = _DATE_RE.search(line.rsplit(':', 1)[-1])
+    if not match:
+        return None
+    try:
+        return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    except ValueError:
+        return None
+
+
+def may_touch_window(lines: list[str], first_day: date, last_day: date) -> bool:
+    """
+    Cheap check on raw VEVENT lines: can this event fall inside the window?
+
+    Only compares calendar dates (so a day of slack covers time zones).
+    Recurring events and overrides are always kept - they're resolved after parsing.
+    """
+    start = end = None
+    open_ended = False
+    for line in lines:
+        name = line.split(':', 1)[0].split(';', 1)[0].upper()
+        if name in ('RRULE', 'RDATE', 'RECURRENCE-ID'):
+            return True
+        if name == 'DTSTART':
+            start = _line_date(line)
+        elif name == 'DTEND':
+            end = _line_date(line)
+        elif name == 'DURATION':
+            open_ended = True
+    if start is None:
+        return True
+    if start > last_day:
+        return False
+    if open_ended and end is None:
+        return True
+    return (end or start) >= first_day
+
+
+# ==================== WINDOWING / RECURRENCE ====================
+
+def _to_utc(value, end: bool = False) -> datetime:
+    """Comparable UTC datetime for a date or (naive/aware) datetime."""
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.max if end else time.min)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _duration(component) -> timedelta:
+    """Event length from DTEND or DURATION (zero if neither is set)."""
+    start = component['dtstart'].dt
+    if component.get('dtend') is not None:
+        end = component['dtend'].dt
+        if isinstance(start, datetime) == isinstance(end, datetime):
+            return end - start
+    if component.get('duration') is not None:
+        return component['duration'].dt
+    return timedelta(0)
+
+
+def _overlaps(start, end, window_start: datetime, window_end: datetime) -> bool:
+    return _to_utc(start) <= window_end and _to_utc(end, end=True) >= window_start
+
+
+def _date_values(component, prop: str) -> list:
+    """All date/datetime values of a multi-valued property (EXDATE, RDATE)."""
+    raw = component.get(prop)
+    if raw is None:
+        return []
+    if not isinstance(raw, list):
+        raw = [raw]
+    values = []
+    for entry in raw:
+        for item in getattr(entry, 'dts', []):
+            # RDATE may hold PERIOD values (tuples) - only plain dates are supported
+            if isinstance(item.dt, (date, datetime)):
+                values.append(item.dt)
+    return values
+
+
+def _occurrence_starts(component, window_start: datetime, window_end: datetime) -> list:
+    """Start times of a recurring event's occurrences overlapping the window."""
+    dtstart = component['dtstart'].dt
+    is_all_day = not isinstance(dtstart, datetime)
+    base = datetime.combine(dtstart, time.min) if is_all_day else dtstart
+    tz = base.tzinfo
+
+    def build(anchor: datetime) -> rruleset:
+        rules = rruleset()
+        raw_rules = component.get('rrule')
+        for raw in raw_rules if isinstance(raw_rules, list) else [raw_rules] if raw_rules else []:
+            rules.rrule(rrulestr(raw.to_ical().decode(), dtstart=anchor))
+        for value in _date_values(component, 'rdate'):
+            rules.rdate(_align(value, anchor))
+        for value in _date_values(component, 'exdate'):
+            rules.exdate(_align(value, anchor))
+        return rules
+
+    # Search from (window start - duration) so occurrences already running count
+    lookback = _duration(component)
+    try:
+        rules = build(base)
+        lo, hi = window_start - lookback, window_end
+        if tz is None:
+            lo, hi = lo.replace(tzinfo=None), hi.replace(tzinfo=None)
+        starts = rules.between(lo, hi, inc=True)
+    except (ValueError, TypeError):
+        # Mixed naive/aware values (e.g. a floating UNTIL on a zoned DTSTART):
+        # expand in the event's wall-clock time instead
+        rules = build(base.replace(tzinfo=None))
+        lo, hi = window_start - lookback, window_end
+        if tz is not None:
+            lo, hi = lo.astimezone(tz), hi.astimezone(tz)
+        starts = [
+            s.replace(tzinfo=tz)
+            for s in rules.between(lo.replace(tzinfo=None), hi.replace(tzinfo=None), inc=True)
+        ]
+
+    return [s.date() for s in starts] if is_all_day else starts
+
+
+def _align(value, anchor: datetime) -> datetime:
+    """Coerce an EXDATE/RDATE value to the anchor's type and zone awareness."""
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, anchor.time())
+    if anchor.tzinfo is None:
+        return value.replace(tzinfo=None) if value.tzinfo is None else value.astimezone(timezone.utc).replace(tzinfo=None)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=anchor.tzinfo)
+    return value
+
+
+def _occurrence_record(base: dict, start, duration: timedelta) -> dict:
+    """A series record dated at one occurrence (start is a date for all-day events)."""
+    record = dict(base)
+    if isinstance(start, datetime):
+        record["date"] = start.isoformat()
+        record["event_end"] = (start + duration).isoformat()
+    else:
+        record["date"] = datetime.combine(start, time.min).isoformat()
+        record["event_end"] = datetime.combine(start + duration, time.max).isoformat()
+    return record
+
+
+def _next_occurrence(occurrences: list[tuple], now: datetime):
+    """
+    The (start, end, override) to show for a series: the first occurrence
+    still running or upcoming, else the latest one in the window.
+    """
+    occurrences = sorted(occurrences, key=lambda o: _to_utc(o[0]))
+    upcoming = [o for o in occurrences if _to_utc(o[1], end=True) >= now]
+    return upcoming[0] if upcoming else occurrences[-1]
+
+
+def parse_feed(
+    text: str, window_start: datetime, window_end: datetime, now: datetime = None
+) -> tuple[list[dict], dict]:
+    """
+    Parse an ICS feed into inbox records for events inside [window_start, window_end].
+
+    Single events are kept if they overlap the window. A recurring event is
+    kept once, under its UID with its recurrence_rule, when any occurrence
+    falls in the window: the record carries the next occurrence from now
+    (EXDATEs and cancelled occurrences skipped; a RECURRENCE-ID override
+    supplies that occurrence's details when it was moved or edited).
+    Cancelled events are dropped.
+
+    Returns:
+        (records, stats) - stats counts the VEVENTs seen and parsed, the
+        recurring series kept and their occurrences in the window
+    """
+    now = now or datetime.now(timezone.utc)
+    first_day = window_start.date() - timedelta(days=1)
+    last_day = window_end.date() + timedelta(days=1)
+
+    timezones, blocks = split_feed(text)
+    kept = [block for block in blocks if may_touch_window(block, first_day, last_day)]
+
+    stats = {
+        "vevents_total": len(blocks),
+        "vevents_parsed": len(kept),
+        "series": 0,
+        "occurrences": 0,
+    }
+    if not kept:
+        return [], stats
+
+    # Re-parse just the candidate events (with their time zone definitions)
+    reduced = '\r\n'.join(
+        ['BEGIN:VCALENDAR', 'VERSION:2.0', *timezones]
+        + ['\r\n'.join(block) for block in kept]
+        + ['END:VCALENDAR', '']
+    )
+    components = [c for c in Calendar.from_ical(reduced).walk() if c.name == "VEVENT"]
+
+    # RECURRENCE-ID overrides, keyed by uid then original start
+    overrides: dict[str, dict] = {}
+    masters = set()
+    for component in components:
+        uid = str(component.get('uid', ''))
+        if not uid:
+            continue
+        if component.get('recurrence-id') is not None:
+            overrides.setdefault(uid, {})[_to_utc(component['recurrence-id'].dt)] = component
+        elif component.get('rrule') is not None or component.get('rdate') is not None:
+            masters.add(uid)
+
+    records = []
+    for component in components:
+        uid = str(component.get('uid', ''))
+        dtstart = component.get('dtstart')
+        if not uid or dtstart is None or is_cancelled(component):
+            continue
+
+        if component.get('recurrence-id') is not None:
+            # Handled with its series; an override without one stands alone
+            if uid in masters:
+                continue
+            start = dtstart.dt
+            if _overlaps(start, start + _duration(component), window_start, window_end):
+                record = event_to_record(component)
+                if record:
+                    records.append(record)
+            continue
+
+        # Series master: one record, at its next occurrence in the window
+        if uid in masters:
+            duration = _duration(component)
+            occurrences = []
+            for start in _occurrence_starts(component, window_start, window_end):
+                override = overrides.get(uid, {}).get(_to_utc(start))
+                if override is None:
+                    occurrences.append((start, start + duration, None))
+            for override in overrides.get(uid, {}).values():
+                if is_cancelled(override) or override.get('dtstart') is None:
+                    continue
+                start = override['dtstart'].dt
+                end = start + _duration(override)
+                if _overlaps(start, end, window_start, window_end):
+                    occurrences.append((start, end, override))
+            if not occurrences:
+                continue
+
+            base = event_to_record(component)
+            start, _, override = _next_occurrence(occurrences, now)
+            if override is not None:
+                record = event_to_record(override)
+                record["recurrence_rule"] = base["recurrence_rule"]
+            else:
+                record = _occurrence_record(base, start, duration)
+            records.append(record)
+            stats["series"] += 1
+            stats["occurrences"] += len(occurrences)
+            continue
+
+        # Single event
+        start = dtstart.dt
+        if _overlaps(start, start + _duration(component), window_start, window_end):
+            record = event_to_record(component)
+            if record:
+                records.append(record)
+
+    return records, stats
+
+
+def parse_feed_file(path: str, window_start: datetime, window_end: datetime) -> tuple[list[dict], dict]:
+    """Worker entry point: parse a downloaded feed from disk."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return parse_feed(f.read(), window_start, window_end)
@@ -1,12 +1,19 @@
 """FastAPI application for CRM Agent Service."""
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Literal
 import structlog
+import base64
+import hashlib
+import json
 import httpx
 import os
+import time
+import uuid
 
 from app.config import get_settings
 from app.models import (
@@ -14,14 +21,25 @@ from app.models import (
     AnalyzeEmailResponse,
     RunCleanupRequest,
     CleanupResponse,
+    EnrichmentJobRequest,
     SuggestionActionRequest,
+    BulkSuggestionActionRequest,
+    ResolveParticipantsRequest,
     SuggestionResponse,
     HealthResponse,
 )
 from app.agent import agent
 from app.database import db
 from app.audit import auditor, AuditResult
-from app.actions import Action, execute_action, audit_to_actions
+from app.actions import Action, action_log_entry, audit_to_actions, execute_action, execute_actions_parallel
+from app.apollo_enrichment import apollo_enrichment, job_progress as enrichment_progress
+from app.attachments import attachment_store
+from app.calendar_sync import calendar_sync_engine, shutdown_parser_pool
+from app.cleanup_jobs import cleanup_jobs, job_progress
+from app.email_text import estimate_tokens, prepare_email_body, truncate_tokens
+from app.participants import participant_resolver
+from app.stats import suggestion_stats
+from app.transfer import TransferTooLarge, download_to_tempfile, stream_file_to_timelines
 
 # Configure structured logging
 structlog.configure(
@@ -45,8 +63,12 @@ settings = get_settings()
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
     logger.info("starting_crm_agent_service", environment=settings.environment)
+    cleanup_jobs.start_watchdog()
     yield
     logger.info("shutting_down_crm_agent_service")
+    await cleanup_jobs.shutdown()
+    await apollo_enrichment.shutdown()
+    shutdown_parser_pool()
 
 
 app = FastAPI(
@@ -111,6 +133,7 @@ async def analyze_email(request: AnalyzeEmailRequest, background_tasks: Backgrou
             "body_text": request.email.body_text,
             "snippet": request.email.snippet,
             "date": str(request.email.date),
+            "headers": request.email.headers,
         }
 
         result = await agent.analyze_email(email_data)
@@ -130,6 +153,7 @@ async def analyze_email(request: AnalyzeEmailRequest, background_tasks: Backgrou
             suggestions_created=result["suggestions_created"],
             suggestions=suggestions,
             message=result["message"],
+            triage=result.get("triage"),
         )
 
     except Exception as e:
@@ -142,24 +166,42 @@ async def run_cleanup(request: RunCleanupRequest = None):
     """
     Run duplicate/cleanup scan on CRM data.
 
-    Can be triggered manually or via scheduled job.
+    Can be triggered manually or via scheduled job. For contacts this is an
+    incremental scan of contacts changed since the last run; companies and
+    deals get a one-pass scan of the whole table. With background=true it
+    starts a full-CRM job instead and returns its job_id right away; follow
+    it on GET /run-cleanup/{job_id}.
     """
     limit = request.limit if request else 100
     entity_type = request.entity_type if request else "contact"
+    background = request.background if request else False
 
-    logger.info("run_cleanup_request", entity_type=entity_type, limit=limit)
+    logger.info("run_cleanup_request", entity_type=entity_type, limit=limit, background=background)
 
     try:
-        if entity_type == "contact":
-            result = await agent.run_duplicate_scan(limit=limit)
-        else:
-            # TODO: Implement company and deal cleanup
+        if background:
+            job = await cleanup_jobs.start(entity_type, page_size=request.page_size)
             return CleanupResponse(
-                success=False,
+                success=True,
                 scanned=0,
                 suggestions_created=0,
-                message=f"Cleanup for {entity_type} not yet implemented",
+                message="Cleanup job started",
+                job_id=str(job["id"]),
             )
+        elif entity_type == "contact":
+            result = await agent.run_duplicate_scan(limit=limit)
+        else:
+            from app.company_dedup import company_dedup
+            from app.deal_dedup import deal_dedup
+            engine = company_dedup if entity_type == "company" else deal_dedup
+            report = await engine.run()
+            label = "companies" if entity_type == "company" else "deals"
+            result = {
+                "success": True,
+                "scanned": report["scanned"],
+                "suggestions_created": report["created"],
+                "message": f"Scanned {report['scanned']} {label}, created {report['created']} duplicate suggestions",
+            }
 
         return CleanupResponse(
             success=result["success"],
@@ -173,36 +215,133 @@ async def run_cleanup(request: RunCleanupRequest = None):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/run-cleanup/{job_id}")
+async def get_cleanup_job(job_id: str, request: Request, stream: str = None):
+    """
+    Status of a background cleanup job.
+
+    With ?stream=ndjson (or Accept: application/x-ndjson) progress is
+    streamed as one JSON line per checkpoint until the job finishes;
+    ?stream=sse (or Accept: text/event-stream) sends the same as
+    Server-Sent Events.
+    """
+    try:
+        job_id = str(uuid.UUID(job_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+
+    job = await cleanup_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Cleanup job not found")
+
+    accept = request.headers.get("accept", "")
+    if stream is None:
+        if "text/event-stream" in accept:
+            stream = "sse"
+        elif "application/x-ndjson" in accept:
+            stream = "ndjson"
+
+    if stream == "ndjson":
+        async def ndjson():
+            async for progress in cleanup_jobs.watch(job_id):
+                yield json.dumps(progress, default=str) + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    if stream == "sse":
+        async def sse():
+            async for progress in cleanup_jobs.watch(job_id):
+                yield f"event: progress\ndata: {json.dumps(progress, default=str)}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        return StreamingResponse(sse(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    if stream is not None:
+        raise HTTPException(status_code=400, detail="stream must be 'ndjson' or 'sse'")
+
+    return job_progress(job)
+
+
 # ==================== SUGGESTIONS ENDPOINTS ====================
 
+# Columns that can be requested with ?fields= on /suggestions
+SUGGESTION_FIELDS = {
+    "id", "suggestion_type", "entity_type", "primary_entity_id", "secondary_entity_id",
+    "confidence_score", "priority", "suggestion_data", "source_email_id", "source_description",
+    "status", "created_at", "reviewed_at", "reviewed_by", "expires_at", "user_notes",
+    "agent_reasoning",
+}
+
+
+def _encode_cursor(row: dict) -> str:
+    """Opaque cursor for the row a page ended on."""
+    payload = json.dumps([row["created_at"], row["id"]]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(created_at), str(uuid.UUID(str(row_id)))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @app.get("/suggestions")
 async def get_suggestions(
+    request: Request,
+    response: Response,
     status: str = "pending",
     suggestion_type: str = None,
     entity_type: str = None,
     limit: int = 50,
+    cursor: str = None,
+    fields: str = None,
 ):
-    """Get suggestions, optionally filtered."""
-    logger.info("get_suggestions_request", status=status, type=suggestion_type, limit=limit)
+    """
+    Get suggestions, optionally filtered, newest first.
+
+    Paginate by passing back next_cursor as ?cursor=. ?fields=id,status,...
+    limits the columns returned. Responses carry an ETag; a poll with a
+    matching If-None-Match gets 304 after a single cheap version check.
+    """
+    logger.info("get_suggestions_request", status=status, type=suggestion_type, limit=limit, cursor=bool(cursor))
 
     try:
-        query = db.client.table("agent_suggestions").select("*")
+        limit = max(1, min(limit, 500))
+        after = _decode_cursor(cursor) if cursor else None
+
+        if fields:
+            requested = [f.strip() for f in fields.split(",") if f.strip()]
+            unknown = sorted(set(requested) - SUGGESTION_FIELDS)
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+            # The cursor needs created_at and id
+            columns = ",".join(dict.fromkeys([*requested, "created_at", "id"]))
+        else:
+            columns = "*"
 
-        if status:
-            query = query.eq("status", status)
-        if suggestion_type:
-            query = query.eq("suggestion_type", suggestion_type)
-        if entity_type:
-            query = query.eq("entity_type", entity_type)
+        version = await db.get_suggestions_version(status, suggestion_type, entity_type)
+        etag_source = json.dumps([version, status, suggestion_type, entity_type, limit, cursor, columns])
+        etag = f'W/"{hashlib.sha256(etag_source.encode()).hexdigest()[:32]}"'
 
-        query = query.order("created_at", desc=True).limit(limit)
-        result = query.execute()
+        if etag in {t.strip() for t in request.headers.get("if-none-match", "").split(",")}:
+            return Response(status_code=304, headers={"ETag": etag})
 
+        # One extra row tells us whether there is another page
+        rows = await db.get_suggestions_page(
+            columns, status, suggestion_type, entity_type, after=after, limit=limit + 1
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        response.headers["ETag"] = etag
         return {
-            "suggestions": result.data or [],
-            "count": len(result.data or []),
+            "suggestions": rows,
+            "count": len(rows),
+            "next_cursor": _encode_cursor(rows[-1]) if has_more else None,
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("get_suggestions_error", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
@@ -252,6 +391,7 @@ async def suggestion_action(suggestion_id: str, request: SuggestionActionRequest
             new_status,
             reviewed_by="user",
             notes=request.notes,
+            previous_status=current.data["status"],
         )
 
         # Log the action
@@ -283,37 +423,82 @@ async def suggestion_action(suggestion_id: str, request: SuggestionActionRequest
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# ==================== STATS ENDPOINTS ====================
+@app.post("/suggestions/bulk-action")
+async def bulk_suggestion_action(request: BulkSuggestionActionRequest):
+    """
+    Accept or reject many suggestions at once.
+
+    A query per 100 IDs loads them, an update per 100 IDs (restricted to
+    rows still pending) sets the status, and one insert writes the audit
+    log. Returns an outcome per ID: accepted/rejected, not_found,
+    already_processed, or conflict (reviewed concurrently between the load
+    and the update).
+    """
+    suggestion_ids = list(dict.fromkeys(str(i) for i in request.suggestion_ids))
+    new_status = "accepted" if request.action == "accept" else "rejected"
+    logger.info("bulk_suggestion_action", count=len(suggestion_ids), action=request.action)
 
-@app.get("/stats")
-async def get_stats():
-    """Get agent statistics."""
     try:
-        # Count suggestions by status
-        pending = db.client.table("agent_suggestions").select(
-            "id", count="exact"
-        ).eq("status", "pending").execute()
+        current = {row["id"]: row for row in await db.get_suggestions_by_ids(suggestion_ids)}
+        pending_ids = [i for i in suggestion_ids if current.get(i, {}).get("status") == "pending"]
+
+        updated_ids = set(await db.update_pending_suggestions_status(
+            pending_ids, new_status, reviewed_by="user", notes=request.notes,
+        ))
+
+        log_rows = []
+        results = []
+        for suggestion_id in suggestion_ids:
+            row = current.get(suggestion_id)
+            if row is None:
+                outcome = "not_found"
+            elif suggestion_id in updated_ids:
+                outcome = new_status
+                log_rows.append({
+                    "action_type": f"suggestion_{new_status}",
+                    "suggestion_id": suggestion_id,
+                    "entity_type": row["entity_type"],
+                    "entity_id": row.get("primary_entity_id"),
+                    "before_data": row,
+                    "after_data": {"status": new_status, "notes": request.notes},
+                    "triggered_by": "user",
+                })
+            elif row.get("status") != "pending":
+                outcome = "already_processed"
+            else:
+                outcome = "conflict"
+            results.append({"suggestion_id": suggestion_id, "success": outcome == new_status, "outcome": outcome})
 
-        accepted = db.client.table("agent_suggestions").select(
-            "id", count="exact"
-        ).eq("status", "accepted").execute()
+        try:
+            await db.log_actions(log_rows)
+        except Exception as log_error:
+            logger.warning("action_log_failed", error=str(log_error), count=len(log_rows))
 
-        rejected = db.client.table("agent_suggestions").select(
-            "id", count="exact"
-        ).eq("status", "rejected").execute()
+        return {
+            "success": True,
+            "new_status": new_status,
+            "total": len(results),
+            "updated": len(updated_ids),
+            "results": results,
+        }
+
+    except Exception as e:
+        logger.error("bulk_suggestion_action_error", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Recent actions
-        recent_actions = db.client.table("agent_action_log").select("*").order(
-            "created_at", desc=True
-        ).limit(10).execute()
 
+# ==================== STATS ENDPOINTS ====================
+
+@app.get("/stats")
+async def get_stats():
+    """Get agent statistics (cached; see SuggestionStatsCache), email triage and signature parser counts."""
+    try:
+        from app.triage import email_triage
+        from app.signature import signature_parser
         return {
-            "suggestions": {
-                "pending": pending.count or 0,
-                "accepted": accepted.count or 0,
-                "rejected": rejected.count or 0,
-            },
-            "recent_actions": recent_actions.data or [],
+            **await suggestion_stats.snapshot(),
+            "triage": email_triage.stats(),
+            "signature_parser": signature_parser.stats(),
         }
 
     except Exception as e:
@@ -343,7 +528,7 @@ async def search_apollo_person(first_name: str, last_name: str, email: str = Non
             if email:
                 print(f"[APOLLO] People Match: searching for {email}", flush=True)
                 response = await client.post(
-                    "https://api.apollo.io/api/v1/people/match",
+                    f"{settings.apollo_base_url}/api/v1/people/match",
                     json={
                         "api_key": api_key,
                         "email": email,
@@ -400,7 +585,7 @@ async def search_apollo_person(first_name: str, last_name: str, email: str = Non
                 search_payload["q_organization_name"] = company
 
             response = await client.post(
-                "https://api.apollo.io/api/v1/mixed_people/search",
+                f"{settings.apollo_base_url}/api/v1/mixed_people/search",
                 json=search_payload
             )
             logger.info(f"Apollo People Search response: status={response.status_code}")
@@ -458,23 +643,18 @@ async def search_company_in_db(name: str = None, domain: str = None):
     try:
         # First try by domain (most accurate)
         if domain:
-            domain_result = db.client.table("company_domains").select(
-                "company_id, domain, companies(company_id, name, category, website)"
-            ).ilike("domain", domain).limit(1).execute()
-
-            if domain_result.data and len(domain_result.data) > 0:
-                match = domain_result.data[0]
-                company = match.get("companies", {})
-                if company:
-                    logger.info(f"Company found by domain: {company.get('name')}")
-                    return {
-                        "company_id": company.get("company_id"),
-                        "name": company.get("name"),
-                        "category": company.get("category"),
-                        "website": company.get("website"),
-                        "matched_by": "domain",
-                        "matched_domain": domain
-                    }
+            from app.domain_index import domain_index
+            company = await domain_index.find_company(domain)
+            if company:
+                logger.info(f"Company found by domain: {company.get('name')}")
+                return {
+                    "company_id": company.get("company_id"),
+                    "name": company.get("name"),
+                    "category": company.get("category"),
+                    "website": company.get("website"),
+                    "matched_by": "domain",
+                    "matched_domain": domain
+                }
 
         # Fallback: search by name
         if name:
@@ -531,12 +711,32 @@ def parse_name_from_email(email: str) -> tuple:
     return local_part.capitalize(), None
 
 
+async def _predict_category(profile: dict, allowed: tuple[str, ...] = None) -> dict | None:
+    """
+    Classifier category for a profile result (job_title / company fields), if
+    confident and one of allowed (default: the profile categories).
+    """
+    from app.category_classifier import PROFILE_CATEGORIES, category_classifier
+
+    job_title = (profile.get("job_title") or {}).get("value") if isinstance(profile.get("job_title"), dict) else None
+    company = (profile.get("company") or {}).get("name") if isinstance(profile.get("company"), dict) else None
+    if not job_title and not company:
+        return None
+    try:
+        return await category_classifier.predict_confident(job_title, company, allowed or PROFILE_CATEGORIES)
+    except Exception as e:
+        logger.warning("category_prediction_error", error=str(e))
+        return None
+
+
 @app.post("/suggest-contact-profile")
 async def suggest_contact_profile(request: dict):
     """
     Generate AI suggestions for contact profile based on email content.
     Returns ALL suggested fields: name, job title, company, phones, city, category, description.
     Works with or without email body - Apollo enrichment always runs.
+    When the signature parses completely (see SignatureParser) the model is
+    skipped and the result has no description.
     """
     logger.info("suggest_contact_profile_request", from_email=request.get("from_email"))
 
@@ -544,7 +744,8 @@ async def suggest_contact_profile(request: dict):
         from_name = request.get("from_name", "")
         from_email = request.get("from_email", "")
         subject = request.get("subject", "")
-        body_text = request.get("body_text", "")[:5000]  # Increased limit for signature extraction
+        raw_body = request.get("body_text", "") or ""
+        body_text = prepare_email_body(raw_body, settings.profile_body_tokens)
 
         # Manual names provided by user (for re-analyze with user input)
         manual_first_name = request.get("manual_first_name", "").strip()
@@ -553,12 +754,9 @@ async def suggest_contact_profile(request: dict):
         if manual_first_name or manual_last_name:
             logger.info(f"Manual names provided: {manual_first_name} {manual_last_name}")
 
-        # Category options from the CRM
-        category_options = [
-            "Professional Investor", "Founder", "Manager", "Advisor",
-            "Friend and Family", "Team", "Supplier", "Media",
-            "Student", "Institution", "Other"
-        ]
+        # Category options from the CRM (the classifier learns the same set)
+        from app.category_classifier import PROFILE_CATEGORIES
+        category_options = list(PROFILE_CATEGORIES)
 
         # Initialize result - will be populated by Claude or fallback
         result = {}
@@ -568,8 +766,22 @@ async def suggest_contact_profile(request: dict):
 
         import anthropic
         import json as json_lib
+        from app.signature import signature_parser
+
+        client = anthropic.Anthropic()
 
+        # Standard signatures are parsed locally (city included); the model is
+        # only asked when the local parse is missing something. Descriptions
+        # come from the model only.
+        local = signature_parser.parse(raw_body, from_email, from_name) if has_content else {}
+        predicted = await _predict_category(local)
+        if predicted:
+            local["category"] = predicted
+        use_model = has_content and not signature_parser.is_complete(local)
         if has_content:
+            signature_parser.record(model_called=use_model)
+
+        if use_model:
             prompt = f"""You are analyzing an email thread to extract contact information for a CRM.
 
 The email address being added is: {from_email}
@@ -620,9 +832,6 @@ For confidence:
 - "medium": inferred from context or partial match
 - "low": guessed or uncertain"""
 
-            # Use the agent's Claude client
-            client = anthropic.Anthropic()
-
             response = client.messages.create(
                 model="claude-sonnet-4-20250514",
                 max_tokens=1000,
@@ -648,6 +857,14 @@ For confidence:
                 response_text = "\n".join(json_lines)
 
             result = json_lib.loads(response_text)
+
+            # Fill what the model left out from the local parse
+            for field, value in local.items():
+                if value and not result.get(field):
+                    result[field] = value
+        elif has_content:
+            logger.info("signature_parsed_locally", from_email=from_email, phones=len(local.get("phones", [])))
+            result = local
         else:
             # No email content - create basic result from name parsing
             logger.info("No email content, using name parsing and Apollo enrichment only")
@@ -685,6 +902,17 @@ For confidence:
                     "confidence": "low"
                 }
 
+        # The trained classifier's category wins when it is confident; the
+        # model's differing pick is kept as an alternative
+        predicted = await _predict_category(result)
+        if predicted:
+            model_category = result.get("category") if isinstance(result.get("category"), dict) else {}
+            if model_category.get("value") and model_category.get("value") != predicted["value"]:
+                predicted["alternatives"] = [model_category["value"]] + [
+                    c for c in predicted["alternatives"] if c != model_category["value"]
+                ]
+            result["category"] = predicted
+
         # -------------------- Apollo Enrichment --------------------
         # Call Apollo to get LinkedIn URL and photo
         # Prefer manual names (from user input) over parsed names
@@ -775,15 +1003,33 @@ For confidence:
                     }
 
         # -------------------- Tags Suggestion --------------------
-        # Get all tags and ask Claude to suggest relevant ones
+        # Shortlist tags from how similar contacts are tagged; Claude picks
+        # from the shortlist unless the ranker is already confident
         all_tags = await get_all_tags()
         suggested_tags = []
+        confident_tags = None
 
         if all_tags:
-            tag_names = [t["name"] for t in all_tags]
+            from app.tag_ranker import tag_ranker
+
             job_title_val = result.get("job_title", {}).get("value", "") if isinstance(result.get("job_title"), dict) else ""
             category_val = result.get("category", {}).get("value", "") if isinstance(result.get("category"), dict) else ""
 
+            await tag_ranker.ensure_loaded()
+            shortlist = tag_ranker.rank(
+                all_tags, job_title_val, company_name, category_val, limit=settings.tag_shortlist_size
+            )
+            tag_names = [t["name"] for t in shortlist]
+            confident_tags = tag_ranker.confident(shortlist)
+            logger.info("tags_shortlisted", candidates=len(all_tags), shortlist=len(shortlist),
+                        confident=bool(confident_tags))
+
+        if confident_tags:
+            suggested_tags = [
+                {"tag_id": t["tag_id"], "name": t["name"], "confidence": t["score"], "source": "tag_ranker"}
+                for t in confident_tags
+            ]
+        elif all_tags:
             tags_prompt = f"""Given this contact information, suggest the most relevant tags from the available list.
 
 Contact: {first_name_val} {last_name_val}
@@ -895,11 +1141,15 @@ async def audit_email(request: AnalyzeEmailRequest):
         # Convert to actions
         actions = audit_to_actions(audit_result.dict())
 
+        # Everyone else on the thread (one query for all of them)
+        resolved = await participant_resolver.resolve_emails([email_data])
+
         return {
             "success": True,
             "audit": audit_result.dict(),
             "actions": [a.dict() for a in actions],
             "action_count": len(actions),
+            "participants": resolved[0]["participants"],
         }
 
     except Exception as e:
@@ -907,6 +1157,34 @@ async def audit_email(request: AnalyzeEmailRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/resolve-participants")
+async def resolve_participants(request: ResolveParticipantsRequest):
+    """
+    Resolve every from/to/cc address on a batch of emails to contacts and companies.
+
+    All addresses are matched in one contact_emails query and all domains
+    against the domain index, however many emails and recipients there are.
+    """
+    logger.info("resolve_participants_request", emails=len(request.emails))
+
+    try:
+        emails = [
+            {
+                "id": str(e.id),
+                "from_email": e.from_email,
+                "from_name": e.from_name,
+                "to_recipients": e.to_recipients,
+                "cc_recipients": e.cc_recipients,
+            }
+            for e in request.emails
+        ]
+        return {"success": True, "emails": await participant_resolver.resolve_emails(emails)}
+
+    except Exception as e:
+        logger.error("resolve_participants_error", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/execute-action")
 async def execute_single_action(action_data: dict):
     """
@@ -925,30 +1203,7 @@ async def execute_single_action(action_data: dict):
 
         # Log the action (in separate try-catch so logging failures don't break the action)
         try:
-            # Determine entity_type and entity_id based on action type
-            if action.type.value in ['merge_contacts', 'delete_contact']:
-                entity_type = "contact"
-                entity_id = action.merge_into_id or action.delete_id or action.contact_id
-            elif action.type.value in ['merge_companies', 'fix_company_domain']:
-                entity_type = "company"
-                entity_id = action.company_id or action.merge_into_id
-            elif action.contact_id:
-                entity_type = "contact"
-                entity_id = action.contact_id
-            elif action.company_id:
-                entity_type = "company"
-                entity_id = action.company_id
-            else:
-                entity_type = "contact"
-                entity_id = None
-
-            await db.log_action({
-                "action_type": action.type.value,
-                "entity_type": entity_type,
-                "entity_id": entity_id,
-                "after_data": action.dict(),
-                "triggered_by": "user",
-            })
+            await db.log_action(action_log_entry(action))
         except Exception as log_error:
             logger.warning("action_log_failed", error=str(log_error), action_type=action.type.value)
 
@@ -968,57 +1223,30 @@ async def execute_multiple_actions(actions_data: list[dict]):
     """
     Execute multiple actions from an audit.
 
-    Takes list of action data and executes them in order.
+    Actions on different entities run concurrently; actions on the same entity
+    keep their order and merges/deletes run last (see execute_actions_parallel).
+    Results are returned in request order with per-action timings.
     """
     logger.info("execute_actions_request", count=len(actions_data))
 
-    results = []
-    for action_data in actions_data:
+    # Parse up front - invalid entries fail without blocking the rest
+    results: list[dict | None] = [None] * len(actions_data)
+    actions, positions = [], []
+    for position, action_data in enumerate(actions_data):
         try:
-            action = Action(**action_data)
-            result = await execute_action(action)
-
-            # Log (in separate try-catch so logging failures don't break the action)
-            try:
-                # Determine entity_type and entity_id based on action type
-                if action.type.value in ['merge_contacts', 'delete_contact']:
-                    entity_type = "contact"
-                    entity_id = action.merge_into_id or action.delete_id or action.contact_id
-                elif action.type.value in ['merge_companies', 'fix_company_domain']:
-                    entity_type = "company"
-                    entity_id = action.company_id or action.merge_into_id
-                elif action.contact_id:
-                    entity_type = "contact"
-                    entity_id = action.contact_id
-                elif action.company_id:
-                    entity_type = "company"
-                    entity_id = action.company_id
-                else:
-                    entity_type = "contact"
-                    entity_id = None
-
-                await db.log_action({
-                    "action_type": action.type.value,
-                    "entity_type": entity_type,
-                    "entity_id": entity_id,
-                    "after_data": action.dict(),
-                    "triggered_by": "user",
-                })
-            except Exception as log_error:
-                logger.warning("action_log_failed", error=str(log_error), action_type=action.type.value)
-
-            results.append({
-                "action": action.description,
-                "success": result.success,
-                "message": result.message,
-            })
-
+            actions.append(Action(**action_data))
+            positions.append(position)
         except Exception as e:
-            results.append({
+            results[position] = {
                 "action": action_data.get("description", "Unknown"),
                 "success": False,
                 "message": str(e),
-            })
+            }
+
+    started = time.perf_counter()
+    executed = await execute_actions_parallel(actions)
+    for position, result in zip(positions, executed):
+        results[position] = result
 
     successful = sum(1 for r in results if r["success"])
     return {
@@ -1026,10 +1254,104 @@ async def execute_multiple_actions(actions_data: list[dict]):
         "total": len(results),
         "successful": successful,
         "failed": len(results) - successful,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
         "results": results,
     }
 
 
+@app.get("/enrichment-worklist")
+async def enrichment_worklist(
+    missing: str = None,
+    match: Literal["any", "all"] = "any",
+    category: str = None,
+    max_score: int = None,
+    limit: int = 100,
+    offset: int = 0,
+    refresh: bool = False,
+):
+    """
+    Contacts ranked for enrichment: least complete first, then most recently in touch.
+
+    Each item's fields_present_pct is the share of the get_missing_fields
+    fields present (not the contact_completeness view score), computed in
+    bulk over the whole CRM and cached (see CompletenessWorklist);
+    ?max_score caps it. ?missing=linkedin,job_role
+    keeps contacts missing any (or with match=all, all) of those fields;
+    ?refresh=true recomputes before answering.
+    """
+    from app.completeness import FIELD_NAMES, completeness_worklist
+
+    fields = [f.strip() for f in missing.split(",") if f.strip()] if missing else []
+    unknown = sorted(set(fields) - set(FIELD_NAMES))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    try:
+        if refresh:
+            await completeness_worklist.refresh()
+        else:
+            await completeness_worklist.ensure_loaded()
+        result = completeness_worklist.worklist(
+            missing=fields, match=match, category=category, max_score=max_score,
+            limit=max(1, min(limit, 1000)), offset=max(offset, 0),
+        )
+        return {**result, "summary": completeness_worklist.summary()}
+
+    except Exception as e:
+        logger.error("enrichment_worklist_error", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/enrichment-jobs")
+async def start_enrichment_job(request: EnrichmentJobRequest = None):
+    """
+    Enrich worklist contacts from Apollo in the background.
+
+    Takes up to limit contacts missing any of the given fields (least
+    complete first, see /enrichment-worklist), matches them with Apollo's
+    bulk people match in rate-limited batches and writes the results to
+    apollo_enrichment_inbox. Returns the job's progress right away; follow
+    it on GET /enrichment-jobs/{job_id}.
+    """
+    from app.completeness import FIELD_NAMES
+
+    request = request or EnrichmentJobRequest()
+    unknown = sorted(set(request.missing) - set(FIELD_NAMES))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if not settings.apollo_api_key:
+        raise HTTPException(status_code=503, detail="Apollo API not configured")
+
+    logger.info("start_enrichment_job_request", missing=request.missing, limit=request.limit, force=request.force)
+    job = await apollo_enrichment.start(
+        missing=request.missing, category=request.category, limit=request.limit, force=request.force
+    )
+    return enrichment_progress(job)
+
+
+@app.get("/enrichment-jobs/{job_id}")
+async def get_enrichment_job(job_id: str, stream: str = None):
+    """
+    Progress of a bulk enrichment job on this worker.
+
+    With ?stream=ndjson progress is streamed as one JSON line per chunk
+    until the job finishes.
+    """
+    job = await apollo_enrichment.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Enrichment job not found")
+
+    if stream == "ndjson":
+        async def ndjson():
+            async for progress in apollo_enrichment.watch(job_id):
+                yield json.dumps(progress, default=str) + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+    if stream is not None:
+        raise HTTPException(status_code=400, detail="stream must be 'ndjson'")
+
+    return enrichment_progress(job)
+
+
 @app.get("/audit-contact/{contact_id}")
 async def audit_contact(contact_id: str):
     """
@@ -1090,37 +1412,86 @@ async def extract_attachment_text(attachment: dict, max_pages: int = 3) -> str:
 
     import base64
 
-    content_bytes = None
-    if file_content_b64:
-        content_bytes = base64.b64decode(file_content_b64)
-    elif file_url:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.get(file_url)
-            if resp.status_code == 200:
-                content_bytes = resp.content
-                logger.info("attachment_downloaded", file_name=file_name, size_bytes=len(content_bytes))
-
-    if not content_bytes:
+    # Only PDFs are parsed - don't download anything else
+    if not ("pdf" in file_type.lower() or file_name.lower().endswith(".pdf")):
         return ""
 
-    if "pdf" in file_type.lower() or file_name.lower().endswith(".pdf"):
+    if file_content_b64:
+        content_bytes = base64.b64decode(file_content_b64)
+        content_hash = hashlib.sha256(content_bytes).hexdigest()
+        cached = await _cached_attachment_text(content_hash=content_hash)
+        if cached is not None:
+            return cached
+        return await _cache_attachment_text(content_hash, _extract_pdf_text(content_bytes, file_name, max_pages))
+
+    if file_url:
+        # Copies stored by the webhook may already have extracted text
+        cached = await _cached_attachment_text(url=file_url)
+        if cached is not None:
+            return cached
+
+        # Stream to disk so large decks never sit in memory; fitz reads pages lazily
         try:
-            import fitz  # pymupdf
-            doc = fitz.open(stream=content_bytes, filetype="pdf")
-            # Only read first N pages (pitch decks have key info upfront)
-            pages_to_read = min(len(doc), max_pages)
-            text = "\n".join(doc[i].get_text() for i in range(pages_to_read))
-            logger.info("pdf_text_extracted", file_name=file_name,
-                        total_pages=len(doc), pages_read=pages_to_read, text_length=len(text))
-            doc.close()
-            return text[:6000]
+            async with download_to_tempfile(file_url, suffix=".pdf") as (temp_path, metrics):
+                logger.info("attachment_downloaded", file_name=file_name, size_bytes=metrics.bytes_transferred)
+                cached = await _cached_attachment_text(content_hash=metrics.content_hash)
+                if cached is not None:
+                    return cached
+                text = _extract_pdf_text(temp_path, file_name, max_pages)
+            return await _cache_attachment_text(metrics.content_hash, text)
         except Exception as e:
-            logger.error("pdf_extraction_error", error=str(e))
-            return ""
+            logger.error("attachment_download_error", file_name=file_name, error=str(e))
 
     return ""
 
 
+async def _cached_attachment_text(url: str = None, content_hash: str = None) -> str | None:
+    """Look up previously extracted text for the same attachment content."""
+    try:
+        if content_hash:
+            existing = await db.get_attachment_by_hash(content_hash)
+            text = existing.get("text_content") if existing else None
+        else:
+            text = await db.get_attachment_text_by_url(url)
+    except Exception as e:
+        logger.warning("attachment_text_cache_error", error=str(e))
+        return None
+    if text:
+        logger.info("attachment_text_cache_hit", content_hash=content_hash, length=len(text))
+        return text[:6000]
+    return None
+
+
+async def _cache_attachment_text(content_hash: str, text: str) -> str:
+    """Store extracted text on attachment rows with this content hash, then return it."""
+    if text and content_hash:
+        try:
+            await db.save_attachment_text(content_hash, text)
+        except Exception as e:
+            logger.warning("attachment_text_cache_error", error=str(e))
+    return text
+
+
+def _extract_pdf_text(source, file_name: str, max_pages: int) -> str:
+    """Extract text from the first max_pages pages of a PDF given as bytes or a file path."""
+    try:
+        import fitz  # pymupdf
+        if isinstance(source, bytes):
+            doc = fitz.open(stream=source, filetype="pdf")
+        else:
+            doc = fitz.open(source, filetype="pdf")
+        # Only read first N pages (pitch decks have key info upfront)
+        pages_to_read = min(len(doc), max_pages)
+        text = "\n".join(doc[i].get_text() for i in range(pages_to_read))
+        logger.info("pdf_text_extracted", file_name=file_name,
+                    total_pages=len(doc), pages_read=pages_to_read, text_length=len(text))
+        doc.close()
+        return text[:6000]
+    except Exception as e:
+        logger.error("pdf_extraction_error", error=str(e))
+        return ""
+
+
 # ==================== DEAL EXTRACTION ENDPOINT ====================
 
 @app.post("/extract-deal-from-email")
@@ -1147,12 +1518,15 @@ async def extract_deal_from_email(request: dict):
     try:
         import anthropic
         import json as json_lib
+        from app.category_classifier import DEAL_CONTACT_CATEGORIES
 
         # Handle both email and WhatsApp sources
         if source_type == "whatsapp":
             contact_phone = request.get("contact_phone", "")
             contact_name = request.get("contact_name", "")
-            conversation_text = request.get("conversation_text", "")[:8000]
+            conversation_text = truncate_tokens(
+                request.get("conversation_text", "") or "", settings.whatsapp_conversation_tokens, keep="tail"
+            )
             message_date = request.get("date", "")
             from_email = ""
             email_domain = None
@@ -1162,7 +1536,7 @@ async def extract_deal_from_email(request: dict):
             from_name = request.get("from_name", "")
             from_email = request.get("from_email", "")
             subject = request.get("subject", "")
-            body_text = request.get("body_text", "")[:8000]
+            body_text = prepare_email_body(request.get("body_text", "") or "", settings.deal_body_tokens)
             message_date = request.get("date", "")
             contact_phone = ""
             contact_name = from_name
@@ -1197,12 +1571,9 @@ async def extract_deal_from_email(request: dict):
         # 2. Find company by domain (only for email)
         existing_company = None
         if email_domain and email_domain not in ['gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'icloud.com']:
-            domain_result = db.client.table("company_domains").select(
-                "company_id, domain, companies(company_id, name, category, website, description)"
-            ).ilike("domain", email_domain).limit(1).execute()
-
-            if domain_result.data and domain_result.data[0].get("companies"):
-                existing_company = domain_result.data[0]["companies"]
+            from app.domain_index import domain_index
+            existing_company = await domain_index.find_company(email_domain)
+            if existing_company:
                 existing_company["domain"] = email_domain
                 logger.info(f"Found existing company by domain: {existing_company.get('name')}")
 
@@ -1243,7 +1614,7 @@ CONTACT'S LINKED COMPANIES:
                     f"--- Email {i+1} ({te.get('date', 'no date')}) ---\n"
                     f"From: {te.get('from_name', '')} <{te.get('from_email', '')}>\n"
                     f"Subject: {te.get('subject', '')}\n\n"
-                    f"{(te.get('body_text', '') or '')[:4000]}"
+                    f"{prepare_email_body(te.get('body_text', '') or '', settings.deal_thread_email_tokens)}"
                 )
             thread_context = f"""
 FULL EMAIL THREAD ({len(thread_emails)} emails, oldest first):
@@ -1251,7 +1622,7 @@ FULL EMAIL THREAD ({len(thread_emails)} emails, oldest first):
 {"".join(thread_parts)}
 """
             logger.info("thread_context_built", email_count=len(thread_emails),
-                        total_chars=len(thread_context))
+                        total_chars=len(thread_context), est_tokens=estimate_tokens(thread_context))
 
         # --- EXTRACT ATTACHMENT TEXT (supports single or multiple) ---
         all_attachment_texts = []
@@ -1320,7 +1691,7 @@ Return JSON:
     "phone": "{contact_phone}",
     "job_role": "extracted if mentioned or null",
     "linkedin": null,
-    "category": "Founder|Professional Investor|Manager|Advisor|Other"
+    "category": "{'|'.join(DEAL_CONTACT_CATEGORIES)}"
   }},
   "company": {{
     "use_existing": true/false,
@@ -1389,7 +1760,7 @@ Return JSON:
     "email": "{from_email}",
     "job_role": "extracted from signature or attachment",
     "linkedin": "extracted from signature or null",
-    "category": "Founder|Professional Investor|Manager|Advisor|Other"
+    "category": "{'|'.join(DEAL_CONTACT_CATEGORIES)}"
   }},
   "company": {{
     "use_existing": true/false,
@@ -1452,6 +1823,19 @@ RULES:
 
         extracted = json_lib.loads(response_text)
 
+        # Contact category: the trained classifier overrides the model when confident
+        extracted_contact = extracted.get("contact") if isinstance(extracted.get("contact"), dict) else None
+        if extracted_contact and not extracted_contact.get("use_existing"):
+            company_name = (extracted.get("company") or {}).get("name") if isinstance(extracted.get("company"), dict) else None
+            predicted = await _predict_category({
+                "job_title": {"value": extracted_contact.get("job_role")},
+                "company": {"name": company_name},
+            }, allowed=DEAL_CONTACT_CATEGORIES)
+            if predicted:
+                extracted_contact["category"] = predicted["value"]
+                extracted_contact["category_confidence"] = predicted["score"]
+                extracted_contact["category_source"] = "classifier"
+
         return {
             "success": True,
             "extracted": extracted,
@@ -1666,8 +2050,6 @@ async def whatsapp_webhook(request: Request):
         # Download and store attachments permanently in Supabase Storage
         message_uid = message.get('message_uid')
         if attachments_list and len(attachments_list) > 0 and message_uid:
-            chat_id_external = str(chat.get('chat_id')) if chat.get('chat_id') else 'unknown'
-
             for att in attachments_list:
                 temp_url = att.get('temporary_download_url')
                 filename = att.get('filename') or 'attachment'
@@ -1676,39 +2058,27 @@ async def whatsapp_webhook(request: Request):
 
                 if temp_url:
                     try:
-                        # Download from temporary URL
-                        async with httpx.AsyncClient() as http_client:
-                            download_response = await http_client.get(temp_url, timeout=60.0)
-                            if download_response.status_code == 200:
-                                file_content = download_response.content
-
-                                # Upload to Supabase Storage
-                                storage_path = f"{chat_id_external}/{message_uid}/{filename}"
-
-                                db.client.storage.from_('whatsapp-attachments').upload(
-                                    storage_path,
-                                    file_content,
-                                    {"content-type": mimetype}
-                                )
-
-                                # Get public URL
-                                permanent_url = db.client.storage.from_('whatsapp-attachments').get_public_url(storage_path)
-
-                                # Insert into attachments table (use permanent_url for file_url since temp expires)
-                                insert_result = db.client.table('attachments').insert({
-                                    "file_name": filename,
-                                    "file_url": permanent_url,  # temp_url expires in 15min, use permanent
-                                    "permanent_url": permanent_url,
-                                    "file_type": mimetype,
-                                    "file_size": filesize,
-                                    "external_reference": message_uid,
-                                    "processing_status": "completed"
-                                }).execute()
-                                logger.info("attachment_db_insert", result=str(insert_result.data) if insert_result.data else "no data", permanent_url=permanent_url)
-
-                                logger.info("attachment_stored", message_uid=message_uid, filename=filename, permanent_url=permanent_url)
-                            else:
-                                logger.warning("attachment_download_failed", message_uid=message_uid, status=download_response.status_code)
+                        # Store by content hash - forwarded copies reuse the existing object and text
+                        stored = await attachment_store.store_from_url(temp_url, filename, mimetype)
+                        permanent_url = stored["permanent_url"]
+
+                        # Insert into attachments table (use permanent_url for file_url since temp expires)
+                        insert_result = db.client.table('attachments').insert({
+                            **stored,
+                            "file_name": filename,
+                            "file_url": permanent_url,  # temp_url expires in 15min, use permanent
+                            "file_type": mimetype,
+                            "file_size": stored["file_size"] or filesize,
+                            "external_reference": message_uid,
+                            "processing_status": "completed"
+                        }).execute()
+                        logger.info("attachment_db_insert", result=str(insert_result.data) if insert_result.data else "no data", permanent_url=permanent_url)
+
+                        logger.info("attachment_stored", message_uid=message_uid, filename=filename, permanent_url=permanent_url,
+                                    content_hash=stored["content_hash"], size_bytes=stored["file_size"])
+                    except httpx.HTTPStatusError as http_error:
+                        logger.warning("attachment_download_failed", message_uid=message_uid,
+                                       status=http_error.response.status_code, url=str(http_error.request.url).split("?")[0])
                     except Exception as att_error:
                         logger.error("attachment_storage_error", error=str(att_error), filename=filename, message_uid=message_uid)
 
@@ -1730,153 +2100,20 @@ async def calendar_sync():
     """
     Sync calendar events from Fastmail ICS feed to command_center_inbox.
 
-    Fetches all events from the ICS feed and upserts them into staging.
-    Events are stored with type='calendar' for frontend filtering.
+    The feed is revalidated with ETag/If-Modified-Since and skipped when unchanged.
+    Otherwise events inside the sync window (a recurring event as one row under
+    its UID, at its next occurrence) are parsed in a worker process and only the changes are applied
+    to staging (see CalendarSyncEngine). Events are stored with type='calendar'
+    for frontend filtering.
     """
     try:
-        from icalendar import Calendar
-        import json as json_lib
-
         logger.info("calendar_sync_started")
 
-        # Load dismissed event_uids to skip
-        dismissed_result = db.client.table('calendar_dismissed').select('event_uid').execute()
-        dismissed_uids = {r['event_uid'] for r in dismissed_result.data} if dismissed_result.data else set()
-        logger.info("calendar_sync_dismissed_loaded", count=len(dismissed_uids))
-
-        # Fetch ICS feed
-        async with httpx.AsyncClient() as client:
-            response = await client.get(CALENDAR_ICS_URL, timeout=30.0)
-            response.raise_for_status()
-
-        ics_content = response.text
-        cal = Calendar.from_ical(ics_content)
-
-        synced_count = 0
-        updated_count = 0
-        deleted_count = 0
-        skipped_dismissed = 0
-        current_uids = set()
-
-        for component in cal.walk():
-            if component.name == "VEVENT":
-                # Extract event data
-                event_uid = str(component.get('uid', ''))
-                if not event_uid:
-                    continue
-
-                current_uids.add(event_uid)
-
-                # Skip dismissed events
-                if event_uid in dismissed_uids:
-                    skipped_dismissed += 1
-                    continue
-
-                # Skip cancelled events
-                status = str(component.get('status', 'CONFIRMED')).upper()
-                if status == 'CANCELLED':
-                    continue
-
-                # Parse dates
-                dtstart = component.get('dtstart')
-                dtend = component.get('dtend')
-
-                start_dt = dtstart.dt if dtstart else None
-                end_dt = dtend.dt if dtend else None
-
-                # Convert date to datetime if needed
-                if start_dt and not hasattr(start_dt, 'hour'):
-                    from datetime import datetime as dt_module, time
-                    start_dt = dt_module.combine(start_dt, time.min)
-                if end_dt and not hasattr(end_dt, 'hour'):
-                    from datetime import datetime as dt_module, time
-                    end_dt = dt_module.combine(end_dt, time.max)
-
-                # Extract organizer
-                organizer = component.get('organizer')
-                organizer_email = None
-                organizer_name = None
-                if organizer:
-                    organizer_str = str(organizer)
-                    if organizer_str.startswith('mailto:'):
-                        organizer_email = organizer_str[7:]
-                    organizer_name = str(organizer.params.get('cn', '')) if hasattr(organizer, 'params') else None
-
-                # Extract attendees
-                attendees = []
-                raw_attendees = component.get('attendee')
-                if raw_attendees:
-                    # Normalize to list (single attendee returns object, multiple returns list)
-                    if not isinstance(raw_attendees, list):
-                        raw_attendees = [raw_attendees]
-                    for att in raw_attendees:
-                        if att:
-                            att_email = str(att)
-                            if att_email.startswith('mailto:'):
-                                att_email = att_email[7:]
-                            att_name = str(att.params.get('cn', '')) if hasattr(att, 'params') else ''
-                            att_status = str(att.params.get('partstat', 'NEEDS-ACTION')) if hasattr(att, 'params') else 'NEEDS-ACTION'
-                            attendees.append({
-                                "email": att_email,
-                                "name": att_name,
-                                "status": att_status
-                            })
+        stats = await calendar_sync_engine.sync_feed(CALENDAR_ICS_URL)
 
-                # Clean language prefix from summary (e.g., "LANGUAGE=en-gb:Title" -> "Title")
-                raw_summary = str(component.get('summary', ''))
-                if raw_summary.startswith('LANGUAGE='):
-                    # Strip "LANGUAGE=xx-XX:" prefix
-                    parts = raw_summary.split(':', 1)
-                    clean_summary = parts[1] if len(parts) > 1 else raw_summary
-                else:
-                    clean_summary = raw_summary
-
-                # Build record
-                record = {
-                    "type": "calendar",
-                    "event_uid": event_uid,
-                    "subject": clean_summary,
-                    "body_text": str(component.get('description', '')),
-                    "date": start_dt.isoformat() if start_dt else None,
-                    "event_end": end_dt.isoformat() if end_dt else None,
-                    "event_location": str(component.get('location', '')),
-                    "from_name": organizer_name,
-                    "from_email": organizer_email,
-                    "to_recipients": json_lib.dumps(attendees) if attendees else None,
-                    "is_read": False
-                }
+        logger.info("calendar_sync_completed", **stats)
 
-                # Remove None/empty values
-                record = {k: v for k, v in record.items() if v is not None and v != ''}
-
-                # Check if event exists
-                existing = db.client.table('command_center_inbox').select('id').eq('event_uid', event_uid).execute()
-
-                if existing.data:
-                    # Update existing
-                    db.client.table('command_center_inbox').update(record).eq('event_uid', event_uid).execute()
-                    updated_count += 1
-                else:
-                    # Insert new
-                    db.client.table('command_center_inbox').insert(record).execute()
-                    synced_count += 1
-
-        # Delete events no longer in feed (cancelled or removed)
-        existing_events = db.client.table('command_center_inbox').select('id, event_uid').eq('type', 'calendar').execute()
-        for event in existing_events.data:
-            if event['event_uid'] and event['event_uid'] not in current_uids:
-                db.client.table('command_center_inbox').delete().eq('id', event['id']).execute()
-                deleted_count += 1
-
-        logger.info("calendar_sync_completed", synced=synced_count, updated=updated_count, deleted=deleted_count, skipped_dismissed=skipped_dismissed)
-
-        return {
-            "success": True,
-            "synced": synced_count,
-            "updated": updated_count,
-            "deleted": deleted_count,
-            "skipped_dismissed": skipped_dismissed
-        }
+        return {"success": True, **stats}
 
     except Exception as e:
         logger.error("calendar_sync_error", error=str(e), exc_info=True)
@@ -1891,7 +2128,8 @@ async def calendar_sync_status():
         return {
             "status": "ready",
             "total_events": result.count,
-            "ics_url": CALENDAR_ICS_URL
+            "ics_url": CALENDAR_ICS_URL,
+            "feed": calendar_sync_engine.feed_state,
         }
     except Exception as e:
         logger.error("calendar_sync_status_error", error=str(e))
@@ -2213,68 +2451,65 @@ async def whatsapp_upload_file(request: Request):
         if not file:
             raise HTTPException(status_code=400, detail="No file provided")
 
-        # Read file content
-        file_content = await file.read()
         file_name = file.filename
         content_type = file.content_type or "application/octet-stream"
 
-        # Check file size (max 2MB for TimelinesAI)
-        max_size = 2 * 1024 * 1024  # 2MB
-        if len(file_content) > max_size:
+        # Check file size (max 2MB for TimelinesAI) - the form parser has already
+        # spooled the upload, so the size is known without reading it into memory
+        max_size = settings.whatsapp_upload_max_bytes
+        if file.size is not None and file.size > max_size:
             raise HTTPException(status_code=400, detail="File too large. Maximum size is 2MB")
 
-        logger.info("whatsapp_upload_file", filename=file_name, size=len(file_content), content_type=content_type)
+        logger.info("whatsapp_upload_file", filename=file_name, size=file.size, content_type=content_type)
 
-        # Upload to TimelinesAI
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            # Use multipart form upload
-            files = {
-                "file": (file_name, file_content, content_type)
-            }
-
-            response = await client.post(
+        # Stream to TimelinesAI as multipart (cap is enforced again while streaming)
+        try:
+            response, metrics = await stream_file_to_timelines(
                 f"{TIMELINES_API_BASE}/files_upload",
-                headers={
-                    "Authorization": f"Bearer {timelines_api_key}"
-                },
-                files=files
+                file.file,
+                file_name,
+                content_type,
+                timelines_api_key,
+                max_bytes=max_size,
             )
+        except TransferTooLarge:
+            raise HTTPException(status_code=400, detail="File too large. Maximum size is 2MB")
 
-            logger.info("timelines_upload_response", status=response.status_code)
+        logger.info("timelines_upload_response", status=response.status_code, duration_ms=metrics.duration_ms)
 
-            if response.status_code in [200, 201]:
-                response_data = response.json()
-                logger.info("timelines_upload_response_data", response_data=response_data)
-
-                # Try different possible response structures
-                file_uid = (
-                    response_data.get("data", {}).get("file_uid") or
-                    response_data.get("data", {}).get("uid") or
-                    response_data.get("file_uid") or
-                    response_data.get("uid") or
-                    response_data.get("id")
-                )
+        if response.status_code in [200, 201]:
+            response_data = response.json()
+            logger.info("timelines_upload_response_data", response_data=response_data)
 
-                if not file_uid:
-                    logger.error("timelines_upload_no_uid", response=response_data)
-                    raise HTTPException(status_code=500, detail=f"Upload succeeded but no file_uid returned. Response: {response_data}")
+            # Try different possible response structures
+            file_uid = (
+                response_data.get("data", {}).get("file_uid") or
+                response_data.get("data", {}).get("uid") or
+                response_data.get("file_uid") or
+                response_data.get("uid") or
+                response_data.get("id")
+            )
 
-                logger.info("whatsapp_file_uploaded", file_uid=file_uid, filename=file_name)
+            if not file_uid:
+                logger.error("timelines_upload_no_uid", response=response_data)
+                raise HTTPException(status_code=500, detail=f"Upload succeeded but no file_uid returned. Response: {response_data}")
 
-                return {
-                    "success": True,
-                    "file_uid": file_uid,
-                    "file_name": file_name,
-                    "file_size": len(file_content),
-                    "content_type": content_type
-                }
-            else:
-                error_text = response.text[:500]
-                logger.error("timelines_upload_error", status=response.status_code, error=error_text)
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"TimelinesAI upload error: {error_text}"
-                )
+            logger.info("whatsapp_file_uploaded", file_uid=file_uid, filename=file_name)
+
+            return {
+                "success": True,
+                "file_uid": file_uid,
+                "file_name": file_name,
+                "file_size": metrics.bytes_transferred,
+                "content_type": content_type
+            }
+        else:
+            error_text = response.text[:500]
+            logger.error("timelines_upload_error", status=response.status_code, error=error_text)
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"TimelinesAI upload error: {error_text}"
+            )
 
     except HTTPException:
         raise
@@ -2408,7 +2643,7 @@ async def enrich_contact(request: dict):
         async with httpx.AsyncClient(timeout=20.0) as client:
             # Apollo People Match with LinkedIn URL
             response = await client.post(
-                "https://api.apollo.io/api/v1/people/match",
+                f"{settings.apollo_base_url}/api/v1/people/match",
                 json={
                     "api_key": api_key,
                     "linkedin_url": linkedin_url,
@@ -0,0 +1,186 @@
+"""Persistent blocking index for incremental duplicate detection."""
+
+from datetime import datetime, timezone
+
+import structlog
+
+from app.database import db
+from app.tools import normalize_email, normalize_name, normalize_phone
+
+logger = structlog.get_logger()
+
+# Block key prefix -> match_type reported on the duplicate edge
+MATCH_TYPES = {
+    "email": "exact_email",
+    "mobile": "mobile",
+    "name": "exact_name",
+}
+
+WATERMARK_SCOPE = "contacts"
+# Child table -> primary key, for the (last_modified_at, id) watermark
+CHILD_TABLES = {"contact_emails": "email_id", "contact_mobiles": "mobile_id"}
+
+
+def blocking_keys(contact: dict) -> dict[str, str]:
+    """
+    Blocking keys for a contact, mapped to the value shown as match_value.
+
+    Mirrors find_potential_duplicates: same email (case-insensitive), same
+    last 10 phone digits (7+ digits), same first + last name.
+    """
+    keys = {}
+    for row in contact.get("contact_emails") or []:
+        email = normalize_email(row.get("email"))
+        if email:
+            keys[f"email:{email}"] = row.get("email")
+    for row in contact.get("contact_mobiles") or []:
+        digits = normalize_phone(row.get("mobile"))[-10:]
+        if len(digits) >= 7:
+            keys[f"mobile:{digits}"] = row.get("mobile")
+    first, last = normalize_name(contact.get("first_name")), normalize_name(contact.get("last_name"))
+    if first and last:
+        keys[f"name:{first}|{last}"] = f"{contact.get('first_name')} {contact.get('last_name')}"
+    return keys
+
+
+class ContactMatchIndex:
+    """
+    Finds duplicate edges for contacts that changed since the last run.
+
+    contact_match_index maps blocking keys to contact IDs. Each run reads the
+    contacts modified after the saved (last_modified_at, contact_id)
+    watermark, plus contacts whose emails/mobiles changed, looks their keys
+    up in the index, and then replaces their index entries. Unchanged
+    contacts are never re-read, so a run costs O(changes), not O(CRM).
+    """
+
+    def __init__(self, page_size: int = 500, key_chunk_size: int = 200):
+        self.db = db
+        self.page_size = page_size
+        self.key_chunk_size = key_chunk_size
+
+    async def _lookup(self, keys: list[str]) -> dict[str, set[str]]:
+        """block_key -> contact IDs already in the index."""
+        index: dict[str, set[str]] = {}
+        for i in range(0, len(keys), self.key_chunk_size):
+            for row in await self.db.get_match_index_entries(keys[i:i + self.key_chunk_size]):
+                index.setdefault(row["block_key"], set()).add(row["contact_id"])
+        return index
+
+    async def _changed_children(self, limit: int) -> tuple[set[str], dict[str, tuple[str, str]]]:
+        """Contacts whose emails/mobiles changed since the per-table watermarks (up to limit rows per table)."""
+        contact_ids, new_marks = set(), {}
+        for table, id_column in CHILD_TABLES.items():
+            mark = await self.db.get_dedup_watermark(table)
+            if not mark or not mark.get("watermark_at"):
+                continue
+            after, taken = (mark["watermark_at"], mark.get("watermark_id")), 0
+            while taken < limit:
+                rows = await self.db.get_child_changes_since(
+                    table, id_column, after, min(self.page_size, limit - taken)
+                )
+                if not rows:
+                    break
+                taken += len(rows)
+                contact_ids.update(r["contact_id"] for r in rows if r.get("contact_id"))
+                after = (rows[-1]["last_modified_at"], str(rows[-1][id_column]))
+                new_marks[table] = after
+                if len(rows) < self.page_size:
+                    break
+        return contact_ids, new_marks
+
+    async def match_contacts(self, contacts: list[dict]) -> tuple[list[dict], int]:
+        """
+        Match contacts against the index (and each other), then replace their entries.
+
+        Returns:
+            (duplicate edges {"a", "b", "match_type", "match_value"}, keys checked)
+        """
+        keys_by_contact = {c["contact_id"]: blocking_keys(c) for c in contacts}
+        all_keys = sorted({k for keys in keys_by_contact.values() for k in keys})
+        index = await self._lookup(all_keys)
+
+        # Drop the contacts' old entries, then let them match each other
+        for contact_ids in index.values():
+            contact_ids.difference_update(keys_by_contact)
+        for contact_id, keys in keys_by_contact.items():
+            for key in keys:
+                index.setdefault(key, set()).add(contact_id)
+
+        edges = {}
+        for contact_id, keys in keys_by_contact.items():
+            for key, match_value in keys.items():
+                for other_id in index.get(key, ()):
+                    pair = frozenset((contact_id, other_id))
+                    if other_id == contact_id or pair in edges:
+                        continue
+                    edges[pair] = {
+                        "a": contact_id,
+                        "b": other_id,
+                        "match_type": MATCH_TYPES[key.split(":", 1)[0]],
+                        "match_value": match_value,
+                    }
+
+        # Replace the contacts' entries
+        await self.db.replace_match_index_entries(
+            list(keys_by_contact),
+            [{"block_key": k, "contact_id": cid} for cid, keys in keys_by_contact.items() for k in keys],
+        )
+        return list(edges.values()), len(all_keys)
+
+    async def process_changes(self, limit: int = 1000) -> tuple[list[dict], dict]:
+        """
+        Compare new/changed contacts against the index and update it.
+
+        Args:
+            limit: max changed contacts to take this run (the watermark only
+                moves past what was processed, so the rest comes next run)
+
+        Returns:
+            (duplicate edges {"a", "b", "match_type", "match_value"}, stats)
+        """
+        run_started = datetime.now(timezone.utc).isoformat()
+        mark = await self.db.get_dedup_watermark(WATERMARK_SCOPE)
+        after = (mark["watermark_at"], mark["watermark_id"]) if mark and mark.get("watermark_id") else None
+        first_run = after is None
+
+        # Contacts changed since the watermark, in (last_modified_at, contact_id) order
+        changed = []
+        while len(changed) < limit:
+            page = await self.db.get_contacts_changed_since(after, min(self.page_size, limit - len(changed)))
+            if not page:
+                break
+            changed.extend(page)
+            after = (page[-1].get("last_modified_at"), page[-1]["contact_id"])
+            if len(page) < self.page_size:
+                break
+
+        # Contacts whose emails/mobiles changed without touching the contact row
+        child_ids, child_marks = (set(), {}) if first_run else await self._changed_children(limit)
+        child_ids -= {c["contact_id"] for c in changed}
+        if child_ids:
+            changed.extend(await self.db.get_contacts_for_match(list(child_ids)))
+
+        edges, keys_checked = await self.match_contacts(changed)
+
+        # Advance the watermarks
+        if after:
+            await self.db.set_dedup_watermark(WATERMARK_SCOPE, after[0], after[1])
+        for table in CHILD_TABLES:
+            if first_run:
+                await self.db.set_dedup_watermark(table, run_started)
+            elif table in child_marks:
+                await self.db.set_dedup_watermark(table, *child_marks[table])
+
+        stats = {
+            "changed_contacts": len(changed),
+            "keys_checked": keys_checked,
+            "candidate_pairs": len(edges),
+            "first_run": first_run,
+        }
+        logger.info("match_index_processed", **stats)
+        return edges, stats
+
+
+# Singleton instance
+match_index = ContactMatchIndex()
@@ -20,6 +20,7 @@ class EmailPayload(BaseModel):
     body_text: Optional[str] = None
     snippet: Optional[str] = None
     date: Optional[datetime] = None
+    headers: Optional[dict[str, str]] = None  # raw headers (List-Unsubscribe, Precedence, ...) for triage
 
 
 class AnalyzeEmailRequest(BaseModel):
@@ -31,6 +32,16 @@ class RunCleanupRequest(BaseModel):
     """Request to run cleanup/dedup scan."""
     entity_type: Literal["contact", "company", "deal"] = "contact"
     limit: int = Field(default=100, ge=1, le=1000)
+    background: bool = False  # full-CRM scan as a resumable job (see /run-cleanup/{job_id})
+    page_size: Optional[int] = Field(default=None, ge=10, le=5000)
+
+
+class EnrichmentJobRequest(BaseModel):
+    """Request to start a bulk Apollo enrichment job."""
+    missing: list[str] = ["linkedin", "job_role"]  # worklist contacts missing any of these
+    category: Optional[str] = None
+    limit: Optional[int] = Field(default=None, ge=1, le=10000)
+    force: bool = False  # also redo contacts already processed in apollo_enrichment_inbox
 
 
 class SuggestionActionRequest(BaseModel):
@@ -40,6 +51,18 @@ class SuggestionActionRequest(BaseModel):
     modifications: Optional[dict] = None  # User can modify the suggestion before accepting
 
 
+class BulkSuggestionActionRequest(BaseModel):
+    """Request to accept/reject many suggestions at once."""
+    suggestion_ids: list[UUID] = Field(min_length=1, max_length=500)
+    action: Literal["accept", "reject"]
+    notes: Optional[str] = None
+
+
+class ResolveParticipantsRequest(BaseModel):
+    """Request to resolve the from/to/cc participants of one or more emails."""
+    emails: list[EmailPayload] = Field(min_length=1, max_length=200)
+
+
 # ==================== RESPONSE MODELS ====================
 
 class SuggestionResponse(BaseModel):
@@ -67,6 +90,7 @@ class AnalyzeEmailResponse(BaseModel):
     suggestions_created: int
     suggestions: list[SuggestionResponse] = []
     message: str
+    triage: Optional[dict] = None  # {"category", "action", "reasons", "keywords"}
 
 
 class CleanupResponse(BaseModel):
@@ -75,6 +99,7 @@ class CleanupResponse(BaseModel):
     scanned: int
     suggestions_created: int
     message: str
+    job_id: Optional[str] = None
 
 
 class HealthResponse(BaseModel):
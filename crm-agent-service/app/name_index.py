@@ -0,0 +1,185 @@
+"""In-process fuzzy contact-name search index."""
+
+import asyncio
+import time
+import unicodedata
+
+import numpy as np
+from rapidfuzz import fuzz, process
+import structlog
+
+from app.config import get_settings
+from app.database import db
+from app.tools import normalize_name
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+NAME_COLUMNS = "contact_id, first_name, last_name, last_modified_at"
+
+
+def fold_name(name: str) -> str:
+    """normalize_name with accents stripped: "José Müller" -> "jose muller"."""
+    if not name:
+        return ""
+    return normalize_name(unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode())
+
+
+def trigrams(text: str) -> set[str]:
+    """Character trigrams of each token, padded so short names still get some."""
+    grams = set()
+    for token in text.split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class ContactNameIndex:
+    """
+    Trigram index over contact names, ranked with rapidfuzz.
+
+    Names are folded (lowercase, no accents or punctuation) and split into
+    character trigrams; a query collects the contacts sharing the most
+    trigrams with it, then rapidfuzz ranks that shortlist. Unlike
+    ilike '%first%', this finds "Jose" for "José", "Jonh" for "John" and
+    "Smith John" for "John Smith".
+
+    Loaded with one keyset scan of contacts. Before a search it catches up on
+    contacts modified since the newest one it has seen (a single, usually
+    empty, query at most every name_index_refresh_interval seconds), and it
+    is rebuilt from scratch every name_index_rebuild_interval to drop
+    deleted contacts. Matches are then read back from the table by ID.
+    """
+
+    def __init__(self, page_size: int = 1000, shortlist_size: int = 200):
+        self.db = db
+        self.page_size = page_size
+        self.shortlist_size = shortlist_size
+        self.ids: list[str] = []
+        self.first: list[str] = []
+        self.full: list[str] = []
+        self.grams: list[set[str]] = []
+        self.position: dict[str, int] = {}
+        self.postings: dict[str, set[int]] = {}
+        self.arrays: dict[str, np.ndarray] = {}  # postings as arrays, built on first query
+        self.watermark: tuple[str, str] | None = None
+        self.built_at: float | None = None
+        self.synced_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    def _upsert(self, row: dict) -> None:
+        contact_id = row["contact_id"]
+        first = fold_name(row.get("first_name"))
+        full = " ".join(filter(None, (first, fold_name(row.get("last_name")))))
+        grams = trigrams(full)
+
+        pos = self.position.get(contact_id)
+        if pos is None:
+            pos = len(self.ids)
+            self.position[contact_id] = pos
+            self.ids.append(contact_id)
+            self.first.append(first)
+            self.full.append(full)
+            self.grams.append(set())
+        else:
+            self.first[pos], self.full[pos] = first, full
+        for gram in self.grams[pos] - grams:
+            self.postings[gram].discard(pos)
+            self.arrays.pop(gram, None)
+        for gram in grams - self.grams[pos]:
+            self.postings.setdefault(gram, set()).add(pos)
+            self.arrays.pop(gram, None)
+        self.grams[pos] = grams
+
+    def _posting_array(self, gram: str) -> np.ndarray:
+        array = self.arrays.get(gram)
+        if array is None:
+            array = self.arrays[gram] = np.fromiter(self.postings.get(gram, ()), dtype=np.int32)
+        return array
+
+    async def _catch_up(self) -> int:
+        """Apply contacts modified after the watermark."""
+        applied = 0
+        while True:
+            page = await self.db.get_contacts_changed_since(self.watermark, self.page_size, columns=NAME_COLUMNS)
+            for row in page:
+                self._upsert(row)
+            applied += len(page)
+            if page:
+                self.watermark = (page[-1].get("last_modified_at"), page[-1]["contact_id"])
+            if len(page) < self.page_size:
+                self.synced_at = time.monotonic()
+                return applied
+
+    async def ensure_current(self) -> None:
+        """Build, rebuild or catch up, depending on how stale the index is."""
+        now = time.monotonic()
+        if self.synced_at and now - self.synced_at < settings.name_index_refresh_interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            if self.synced_at and now - self.synced_at < settings.name_index_refresh_interval:
+                return
+            if self.built_at is None or now - self.built_at >= settings.name_index_rebuild_interval:
+                # Build off to the side so searches keep using the old index meanwhile
+                fresh = ContactNameIndex(self.page_size, self.shortlist_size)
+                fresh.db = self.db
+                await fresh._catch_up()
+                for gram in fresh.postings:
+                    fresh._posting_array(gram)
+                for attr in ("ids", "first", "full", "grams", "position", "postings", "arrays", "watermark", "synced_at"):
+                    setattr(self, attr, getattr(fresh, attr))
+                self.built_at = now
+                logger.info("name_index_built", contacts=len(self.ids), trigrams=len(self.postings))
+            else:
+                applied = await self._catch_up()
+                if applied:
+                    logger.info("name_index_caught_up", changed=applied)
+
+    def search(
+        self, first_name: str, last_name: str = None, limit: int = 20, min_score: float = None
+    ) -> list[tuple[str, float]]:
+        """
+        (contact_id, score 0-100) for the best name matches, best first.
+
+        With a last name the full names are compared (token order ignored);
+        with only a first name, the query is matched against first names.
+        """
+        query = " ".join(filter(None, (fold_name(first_name), fold_name(last_name))))
+        if not query:
+            return []
+        min_score = settings.name_search_min_score if min_score is None else min_score
+
+        # Shortlist: the contacts sharing the most trigrams with the query
+        hits = [self._posting_array(gram) for gram in trigrams(query)]
+        hits = np.concatenate(hits) if hits else np.empty(0, dtype=np.int32)
+        if not len(hits):
+            return []
+        overlap = np.bincount(hits, minlength=len(self.ids))
+        candidates = np.flatnonzero(overlap)
+        if len(candidates) > self.shortlist_size:
+            top = np.argpartition(overlap[candidates], -self.shortlist_size)[-self.shortlist_size:]
+            candidates = candidates[top]
+        shortlist = candidates.tolist()
+
+        if last_name:
+            choices = {pos: self.full[pos] for pos in shortlist}
+            scorer = fuzz.token_sort_ratio
+        else:
+            choices = {pos: self.first[pos] for pos in shortlist}
+            scorer = fuzz.WRatio
+        matches = process.extract(query, choices, scorer=scorer, limit=limit, score_cutoff=min_score)
+        return [(self.ids[pos], score) for _, score, pos in matches]
+
+    async def search_contacts(
+        self, first_name: str, last_name: str = None, limit: int = 20, columns: str = "*"
+    ) -> list:
+        """search(), then the matching contact rows in rank order (one query)."""
+        await self.ensure_current()
+        ranked = self.search(first_name, last_name, limit=limit)
+        rows = {r["contact_id"]: r for r in await self.db.get_contacts_by_ids([i for i, _ in ranked], columns)}
+        return [rows[contact_id] for contact_id, _ in ranked if contact_id in rows]
+
+
+# Singleton instance
+name_index = ContactNameIndex()
@@ -0,0 +1,124 @@
+"""Batch identity resolution for email participants (from / to / cc)."""
+
+from email.utils import getaddresses
+
+import structlog
+
+from app.database import db
+from app.domain_index import domain_index
+from app.tools import extract_domain_from_email, normalize_email
+
+logger = structlog.get_logger()
+
+ROLES = (("from", "from_email"), ("to", "to_recipients"), ("cc", "cc_recipients"))
+
+
+def _recipients(value) -> list[tuple[str, str]]:
+    """(name, address) pairs from a recipients field: strings ("Name <a@b>") or {"email", "name"} dicts."""
+    if not value:
+        return []
+    if isinstance(value, (str, dict)):
+        value = [value]
+    pairs = []
+    for item in value:
+        if isinstance(item, dict):
+            address = item.get("email") or item.get("address")
+            if address:
+                pairs.append((item.get("name") or "", address))
+        elif isinstance(item, str):
+            pairs.extend(getaddresses([item]))
+    return pairs
+
+
+def email_participants(email_data: dict) -> list[dict]:
+    """
+    Every distinct address on an email with its role.
+
+    An address listed more than once keeps its first role (from, then to, then cc).
+    """
+    participants, seen = [], set()
+    for role, field in ROLES:
+        value = email_data.get(field)
+        if role == "from":
+            value = [{"email": value, "name": email_data.get("from_name")}] if value else []
+        for name, address in _recipients(value):
+            address = normalize_email(address)
+            if "@" not in address or address in seen:
+                continue
+            seen.add(address)
+            participants.append({"email": address, "name": name or None, "role": role})
+    return participants
+
+
+class ParticipantResolver:
+    """
+    Resolves all participants of one or many emails at once.
+
+    Every address is looked up in a single contact_emails query on the
+    lowercased email_normalized column, and every domain in the in-memory
+    domain index, instead of one get_contact_by_email ilike per sender.
+    """
+
+    def __init__(self, chunk_size: int = 500):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    async def resolve_addresses(self, addresses: list[str]) -> dict[str, dict]:
+        """
+        address -> {"contact": {...} | None, "company": {...} | None, "personal_domain": bool}
+        for lowercased addresses.
+        """
+        addresses = list(dict.fromkeys(normalize_email(a) for a in addresses if a))
+        contacts: dict[str, dict] = {}
+        for i in range(0, len(addresses), self.chunk_size):
+            for row in await self.db.get_contacts_by_emails(addresses[i:i + self.chunk_size]):
+                # Two contacts sharing an address: prefer the one holding it as primary
+                address = row.get("email_normalized") or normalize_email(row.get("email"))
+                if row.get("contacts") and (address not in contacts or row.get("is_primary")):
+                    contacts[address] = row["contacts"]
+
+        await domain_index.ensure_loaded()
+        resolved = {}
+        for address in addresses:
+            domain = extract_domain_from_email(address)
+            personal = bool(domain) and await self.db.is_personal_email_domain(domain)
+            company = None
+            if domain and not personal:
+                matches = domain_index.lookup(domain)
+                company = matches[0]["companies"] if matches else None
+            resolved[address] = {
+                "contact": contacts.get(address),
+                "company": company,
+                "personal_domain": personal,
+            }
+        return resolved
+
+    async def resolve_emails(self, emails: list[dict]) -> list[dict]:
+        """
+        Participants of each email, resolved.
+
+        Returns:
+            [{"email_id", "participants": [{"email", "name", "role", "contact", "company", "personal_domain"}]}]
+        """
+        per_email = [(e, email_participants(e)) for e in emails]
+        resolved = await self.resolve_addresses([p["email"] for _, ps in per_email for p in ps])
+
+        results = []
+        for email_data, participants in per_email:
+            results.append({
+                "email_id": email_data.get("id"),
+                "participants": [{**p, **resolved[p["email"]]} for p in participants],
+            })
+
+        logger.info(
+            "participants_resolved",
+            emails=len(emails),
+            addresses=len(resolved),
+            contacts=sum(1 for r in resolved.values() if r["contact"]),
+            companies=sum(1 for r in resolved.values() if r["company"]),
+        )
+        return results
+
+
+# Singleton instance
+participant_resolver = ParticipantResolver()
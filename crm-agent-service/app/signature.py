@@ -0,0 +1,293 @@
+"""Local email signature parsing for /suggest-contact-profile."""
+
+from collections import Counter
+import re
+import unicodedata
+
+import structlog
+
+from app.company_dedup import LEGAL_SUFFIXES
+from app.email_text import FORWARD_BANNER, QUOTE_HEADER, outlook_header_at
+from app.tools import extract_domain_from_email, normalize_email
+
+logger = structlog.get_logger()
+
+SIGN_OFF = re.compile(
+    r"^(?:best|best regards|kind regards|warm regards|regards|many thanks|thanks|thank you|cheers|all the best"
+    r"|sincerely|cordiali saluti|distinti saluti|saluti|un saluto|a presto|grazie|buona giornata)[\s,.!]*$",
+    re.IGNORECASE,
+)
+SIGNATURE_END = re.compile(
+    r"^(?:sent from my|inviato da|this (?:e-?mail|message) (?:and any|is|may)|confidential|"
+    r"questa (?:e-?mail|comunicazione)|il presente messaggio|disclaimer|please consider the environment)",
+    re.IGNORECASE,
+)
+MAX_SIGNATURE_LINES = 12
+
+PHONE = re.compile(
+    r"(?:\b(?P<label>mobile|mob|cell(?:ulare)?|cell|m|tel(?:efono)?|phone|office|direct|t|ph|fax|f|w|work)"
+    r"\s*[.:]?\s*)?(?P<number>\+?\(?\d[\d\s().\-/]{6,}\d)",
+    re.IGNORECASE,
+)
+PHONE_TYPES = {
+    "mobile": "mobile", "mob": "mobile", "cell": "mobile", "cellulare": "mobile", "m": "mobile",
+    "tel": "office", "telefono": "office", "phone": "office", "office": "office", "direct": "office",
+    "t": "office", "ph": "office", "w": "office", "work": "office",
+    "fax": "fax", "f": "fax",
+}
+# Company registry numbers that look like phones: P.IVA / VAT, codice fiscale, REA, CAP
+REGISTRY_MARKER = re.compile(
+    r"\b(?:p\.?\s?iva|partita iva|vat(?:\s?(?:no|nr|number|id|reg))?|c\.?\s?f|cod(?:ice)?\.? fiscale|"
+    r"rea|cap|reg(?:istro)?\.? imprese|capitale sociale|company (?:no|number)|iscr)(?![a-z])",
+    re.IGNORECASE,
+)
+REGISTRY_WINDOW = 25  # chars before a number searched for a registry marker
+# Unlabelled numbers: international prefix, or Italian mobile (3xx) / landline (0x)
+UNLABELLED_PHONE = re.compile(r"^(?:00|3\d{8,9}$|0\d{5,10}$)")
+LINKEDIN = re.compile(r"(?:https?://)?(?:[a-z]{2,3}\.)?linkedin\.com/in/([A-Za-z0-9_%\-]+)", re.IGNORECASE)
+URL_OR_EMAIL = re.compile(r"https?://|www\.|\S+@\S+\.\w+|\.(?:com|it|io|co|net|org)\b", re.IGNORECASE)
+# City from an address: after a 5-digit postal code ("20121 Milano (MI)"), or
+# before a country ("Milan, Italy")
+POSTAL_CITY = re.compile(r"\b\d{5}\s+([^\W\d_]+(?:[ '’-][^\W\d_]+){0,2})")
+COUNTRY_CITY = re.compile(
+    r"(?:^|[|,·•–-]\s*)([^\W\d_]+(?: [^\W\d_]+){0,2}),\s*(?:italy|italia|uk|united kingdom|england|usa|"
+    r"united states|switzerland|svizzera|france|germany|spain|netherlands|luxembourg)\b",
+    re.IGNORECASE,
+)
+PROVINCE_SUFFIX = re.compile(r"\s+[A-Z]{2}$")  # "Milano MI"
+TITLE_WORDS = re.compile(
+    r"\b(?:ceo|cfo|coo|cto|cmo|founder|co-founder|cofounder|partner|managing director|director|manager|head|"
+    r"vp|vice president|president|chairman|chair|associate|analyst|principal|officer|engineer|consultant|"
+    r"advisor|adviser|investor|owner|lead|counsel|lawyer|avvocato|amministratore|responsabile|socio|"
+    r"presidente|direttore|fondatore|journalist|editor|reporter|student|professor)\b",
+    re.IGNORECASE,
+)
+TITLE_SEPARATORS = re.compile(r"\s+(?:\||@|at|presso|-|–|,)\s+", re.IGNORECASE)
+
+# Job-title keywords -> CRM category, first match wins
+TITLE_CATEGORIES = [
+    (re.compile(r"\b(?:journalist|editor|reporter)\b", re.I), "Media"),
+    (re.compile(r"\b(?:student)\b", re.I), "Student"),
+    (re.compile(r"\b(?:founder|co-founder|cofounder|fondatore)\b", re.I), "Founder"),
+    (re.compile(r"\b(?:investor|general partner|venture partner|principal)\b", re.I), "Professional Investor"),
+    (re.compile(r"\b(?:advisor|adviser)\b", re.I), "Advisor"),
+    (re.compile(r"\b(?:ceo|cfo|coo|cto|cmo|director|manager|head|vp|direttore|responsabile)\b", re.I), "Manager"),
+]
+
+PERSONAL_DOMAINS = {"gmail.com", "yahoo.com", "hotmail.com", "outlook.com", "icloud.com"}
+
+
+def _fold(text: str) -> str:
+    return unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode().lower()
+
+
+def latest_message(body: str) -> str:
+    """
+    The sender's own text: everything above the first quoted-reply header,
+    forward banner, Outlook header block or '>' line.
+    """
+    lines = []
+    source = (body or "").splitlines()
+    for i, line in enumerate(source):
+        stripped = line.strip()
+        if (QUOTE_HEADER.match(stripped) or FORWARD_BANNER.match(stripped) or stripped.startswith(">")
+                or outlook_header_at(source, i)):
+            break
+        lines.append(line.rstrip())
+    return "\n".join(lines).strip()
+
+
+def find_signature(message: str, from_name: str = "") -> list[str]:
+    """
+    The signature block of a message, as non-empty lines.
+
+    Starts after a "-- " delimiter or a sign-off line ("Best,", "Cordiali
+    saluti"), else at the last line carrying the sender's name; ends at a
+    disclaimer or "Sent from my iPhone", or after MAX_SIGNATURE_LINES lines.
+    """
+    lines = message.splitlines()
+    start = None
+    for i in range(len(lines) - 1, -1, -1):
+        stripped = lines[i].strip()
+        if stripped in ("--", "-- ", "__") or SIGN_OFF.match(stripped):
+            start = i + 1
+            break
+    if start is None and from_name:
+        name_tokens = [t for t in _fold(from_name).split() if len(t) > 1]
+        for i in range(len(lines) - 1, -1, -1):
+            folded = _fold(lines[i])
+            if name_tokens and all(t in folded for t in name_tokens) and len(lines[i].split()) <= 6:
+                start = i
+                break
+    if start is None:
+        return []
+
+    block = []
+    for line in lines[start:]:
+        stripped = line.strip()
+        if SIGNATURE_END.match(stripped):
+            break
+        if stripped:
+            block.append(stripped)
+        if len(block) >= MAX_SIGNATURE_LINES:
+            break
+    return block
+
+
+class SignatureParser:
+    """
+    Pulls contact details out of an email signature without a model call.
+
+    The sender's latest message is cut from the quoted thread, its signature
+    block isolated, and phones (typed by their M. / T. / Cell / Fax labels),
+    LinkedIn URL, name, job title, company and city (from a postal-code or
+    "City, Country" address line) are read from it, each with a high /
+    medium / low confidence like the model's output. A parse with a full
+    name, title, company, city, category hint and a phone or LinkedIn is
+    complete; /suggest-contact-profile then skips the model and only calls
+    it (filling its gaps from this parse) otherwise. A signature holds no
+    description, so locally served results have none.
+
+    Counts how many requests were served without a model call.
+    """
+
+    def __init__(self):
+        self.outcomes: Counter = Counter()
+
+    def parse(self, body: str, from_email: str = "", from_name: str = "") -> dict:
+        """Signature fields in the /suggest-contact-profile result shape."""
+        block = find_signature(latest_message(body), from_name)
+        result: dict = {"signature_found": bool(block), "signature_text": "\n".join(block) or None}
+        if not block:
+            return result
+
+        phones, seen = [], set()
+        used = set()  # lines holding phones, links or the name, not candidates for title/company
+        for i, line in enumerate(block):
+            if LINKEDIN.search(line):
+                result["linkedin"] = {"value": f"linkedin.com/in/{LINKEDIN.search(line).group(1)}", "confidence": "high"}
+                used.add(i)
+            for match in PHONE.finditer(line):
+                digits = re.sub(r"\D", "", match.group("number"))
+                if not 8 <= len(digits) <= 15 or digits in seen:
+                    continue
+                if REGISTRY_MARKER.search(line[max(0, match.start("number") - REGISTRY_WINDOW):match.start("number")]):
+                    continue
+                label = (match.group("label") or "").lower()
+                number = match.group("number").strip()
+                if not (label or number.startswith("+") or UNLABELLED_PHONE.match(digits)):
+                    continue
+                seen.add(digits)
+                used.add(i)
+                value = ("+" + digits) if number.startswith("+") else ("+" + digits[2:]) if digits.startswith("00") else digits
+                if label:
+                    phones.append({"value": value, "type": PHONE_TYPES.get(label, "office"), "confidence": "high"})
+                else:
+                    # Italian mobiles start with 3 after the country code
+                    mobile = re.match(r"^(?:\+?39)?3\d{8,9}$", value.lstrip("+")) is not None
+                    phones.append({"value": value, "type": "mobile" if mobile else "office", "confidence": "medium"})
+            if URL_OR_EMAIL.search(line):
+                used.add(i)
+        if phones:
+            result["phones"] = phones
+
+        # Name: the line carrying the header name, else the first short line of words
+        name_tokens = [t for t in _fold(from_name).split() if len(t) > 1]
+        name_line = None
+        for i, line in enumerate(block):
+            if i in used:
+                continue
+            if name_tokens and all(t in _fold(line) for t in name_tokens):
+                name_line = i
+                break
+        if name_line is None and block and 0 not in used and 2 <= len(block[0].split()) <= 4 \
+                and not TITLE_WORDS.search(block[0]) and re.fullmatch(r"[^\W\d_][\w'’. -]+", block[0]):
+            name_line = 0
+        if name_line is not None:
+            used.add(name_line)
+            name = re.split(r"\s*[|,–]\s*", block[name_line])[0].strip()
+            parts = name.split()
+            if len(parts) >= 2:
+                result["first_name"] = {"value": parts[0], "confidence": "high"}
+                result["last_name"] = {"value": " ".join(parts[1:]), "confidence": "high"}
+        if "first_name" not in result and from_name and len(from_name.split()) >= 2:
+            parts = from_name.strip().split()
+            result["first_name"] = {"value": parts[0], "confidence": "medium"}
+            result["last_name"] = {"value": " ".join(parts[1:]), "confidence": "medium"}
+
+        # Title and company from the remaining lines, in order after the name
+        candidates = [(i, block[i]) for i in range(len(block)) if i not in used and (name_line is None or i > name_line)]
+        domain = extract_domain_from_email(normalize_email(from_email))
+        domain_label = domain.split(".")[0] if domain and domain not in PERSONAL_DOMAINS else None
+        for i, line in candidates[:4]:
+            if "job_title" not in result and TITLE_WORDS.search(line):
+                parts = TITLE_SEPARATORS.split(line, maxsplit=1)
+                result["job_title"] = {"value": parts[0].strip(" ,|"), "confidence": "high"}
+                if len(parts) > 1 and "company" not in result:
+                    result["company"] = self._company(parts[1], domain, domain_label, "high")
+                continue
+            if "company" not in result and self._looks_like_company(line, domain_label):
+                confidence = "high" if domain_label and domain_label in _fold(line).replace(" ", "") else "medium"
+                result["company"] = self._company(line, domain, domain_label, confidence)
+
+        if "company" not in result and domain_label:
+            result["company"] = {"name": None, "domain": domain, "confidence": "low"}
+
+        city = self._city(block[i] for i in range(len(block)) if i != name_line)
+        if city:
+            result["city"] = {"value": city, "confidence": "medium"}
+
+        title = result.get("job_title", {}).get("value") or ""
+        for pattern, category in TITLE_CATEGORIES:
+            if pattern.search(title):
+                result["category"] = {"value": category, "confidence": "medium", "alternatives": []}
+                break
+        return result
+
+    @staticmethod
+    def _city(lines) -> str | None:
+        for line in lines:
+            match = POSTAL_CITY.search(line) or COUNTRY_CITY.search(line)
+            if match:
+                return PROVINCE_SUFFIX.sub("", match.group(1)).strip()
+        return None
+
+    @staticmethod
+    def _looks_like_company(line: str, domain_label: str | None) -> bool:
+        tokens = re.sub(r"[.,]", "", _fold(line)).split()
+        if not tokens or len(tokens) > 6 or any(ch.isdigit() for ch in line):
+            return False
+        return tokens[-1] in LEGAL_SUFFIXES or (domain_label is not None and domain_label in "".join(tokens))
+
+    @staticmethod
+    def _company(name: str, domain: str | None, domain_label: str | None, confidence: str) -> dict:
+        company = {"name": name.strip(" ,|"), "confidence": confidence}
+        if domain_label:
+            company["domain"] = domain
+        return company
+
+    @staticmethod
+    def is_complete(result: dict) -> bool:
+        """Everything the model would be asked for that a signature can hold."""
+        company = result.get("company") or {}
+        return (
+            all(result.get(f) for f in ("first_name", "last_name", "job_title", "category", "city"))
+            and bool(company.get("name"))
+            and bool(result.get("phones") or result.get("linkedin"))
+        )
+
+    def record(self, model_called: bool) -> None:
+        self.outcomes["model" if model_called else "local"] += 1
+
+    def stats(self) -> dict:
+        total = sum(self.outcomes.values())
+        return {
+            "requests": total,
+            "served_locally": self.outcomes["local"],
+            "model_calls": self.outcomes["model"],
+            "local_rate": round(self.outcomes["local"] / total, 3) if total else 0.0,
+        }
+
+
+# Singleton instance
+signature_parser = SignatureParser()
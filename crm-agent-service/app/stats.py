@@ -0,0 +1,99 @@
+"""Cached agent statistics for the dashboard."""
+
+from collections import defaultdict
+import time
+
+import structlog
+
+from app.config import get_settings
+from app.database import db
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+# Always reported, even when zero
+SUGGESTION_STATUSES = ("pending", "accepted", "rejected")
+
+
+class SuggestionStatsCache:
+    """
+    Suggestion counts grouped by (status, suggestion_type, entity_type).
+
+    Loaded with one grouped aggregate (the agent_suggestion_stats RPC) and
+    kept in process for stats_cache_ttl seconds. Creates and status changes
+    made through this service adjust the counts in place, so the numbers
+    stay current between refreshes; the TTL only has to catch writes made
+    elsewhere (e.g. the frontend) and new entries in the recent actions.
+    """
+
+    def __init__(self, ttl: float | None = None):
+        self.db = db
+        self.ttl = ttl if ttl is not None else settings.stats_cache_ttl
+        self.counts: dict[tuple[str, str, str], int] = {}
+        self.recent_actions: list = []
+        self.loaded_at: float | None = None
+
+    def _fresh(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl
+
+    async def refresh(self) -> None:
+        """Reload the aggregate and recent actions."""
+        rows = await self.db.get_suggestion_stats()
+        self.counts = {
+            (row["status"], row["suggestion_type"], row["entity_type"]): row["total"]
+            for row in rows
+        }
+        self.recent_actions = await self.db.get_recent_actions(limit=10)
+        self.loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        self.loaded_at = None
+
+    def _adjust(self, status: str, suggestion_type: str, entity_type: str, delta: int) -> None:
+        key = (status, suggestion_type, entity_type)
+        self.counts[key] = max(self.counts.get(key, 0) + delta, 0)
+
+    def record_created(self, suggestion: dict) -> None:
+        """A suggestion was inserted."""
+        if self.loaded_at is None:
+            return
+        self._adjust(suggestion.get("status") or "pending", suggestion.get("suggestion_type"),
+                     suggestion.get("entity_type"), 1)
+
+    def record_status_change(self, suggestion: dict, new_status: str) -> None:
+        """A suggestion (row as it was before the update) moved to new_status."""
+        if self.loaded_at is None:
+            return
+        suggestion_type, entity_type = suggestion.get("suggestion_type"), suggestion.get("entity_type")
+        self._adjust(suggestion.get("status"), suggestion_type, entity_type, -1)
+        self._adjust(new_status, suggestion_type, entity_type, 1)
+
+    async def snapshot(self) -> dict:
+        """Stats payload for /stats, refreshing first if the cache expired."""
+        cached = self._fresh()
+        if not cached:
+            await self.refresh()
+
+        by_status = {status: 0 for status in SUGGESTION_STATUSES}
+        by_type = defaultdict(lambda: defaultdict(int))
+        by_entity_type = defaultdict(lambda: defaultdict(int))
+        for (status, suggestion_type, entity_type), total in self.counts.items():
+            if not total:
+                continue
+            status = status or "unknown"
+            by_status[status] = by_status.get(status, 0) + total
+            by_type[suggestion_type or "unknown"][status] += total
+            by_entity_type[entity_type or "unknown"][status] += total
+
+        return {
+            "suggestions": by_status,
+            "by_suggestion_type": {k: dict(v) for k, v in by_type.items()},
+            "by_entity_type": {k: dict(v) for k, v in by_entity_type.items()},
+            "recent_actions": self.recent_actions,
+            "cached": cached,
+            "age_seconds": round(time.monotonic() - self.loaded_at, 1),
+        }
+
+
+# Singleton instance
+suggestion_stats = SuggestionStatsCache()
@@ -0,0 +1,110 @@
+"""In-memory index of pending suggestions, for duplicate suppression."""
+
+from collections import Counter
+from itertools import combinations
+import time
+
+import structlog
+
+from app.config import get_settings
+from app.database import db
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+
+def pair_key(suggestion_type: str, primary_id: str | None, secondary_id: str | None) -> tuple:
+    """(type, unordered entity pair) - A/B and B/A are the same pair."""
+    return (suggestion_type, frozenset(str(i) for i in (primary_id, secondary_id) if i))
+
+
+def cluster_member_ids(suggestion: dict) -> list[str]:
+    """Every contact of a duplicate_cluster suggestion: the survivor plus its merge_action delete_ids."""
+    members = suggestion.get("cluster_members")
+    if members is None:
+        members = ((suggestion.get("suggestion_data") or {}).get("merge_action") or {}).get("delete_ids")
+    return [str(i) for i in (suggestion.get("primary_entity_id"), *(members or [])) if i]
+
+
+class SuggestionPairIndex:
+    """
+    Pending suggestions keyed by (suggestion_type, unordered entity pair).
+
+    Replaces a check_existing_suggestion round-trip (two, for pairs checked
+    in both directions) with a set lookup. A pending duplicate_cluster also
+    covers every pair of its members as a "duplicate" pair, so rescans that
+    re-find any edge of the cluster don't suggest it again. Loaded with one
+    paged query of the key columns; suggestions created or reviewed through Database are applied
+    in place, and suggestion_index_ttl bounds how long writes made elsewhere
+    (e.g. the frontend) can go unseen.
+    """
+
+    def __init__(self, ttl: float | None = None, page_size: int = 1000):
+        self.db = db
+        self.ttl = ttl if ttl is not None else settings.suggestion_index_ttl
+        self.page_size = page_size
+        self.pairs: Counter = Counter()
+        self.primaries: Counter = Counter()  # (type, primary_id), for checks without a secondary
+        self.loaded_at: float | None = None
+
+    def _fresh(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl
+
+    @staticmethod
+    def _apply(pairs: Counter, primaries: Counter, suggestion: dict, delta: int) -> None:
+        suggestion_type = suggestion.get("suggestion_type")
+        primary_id = suggestion.get("primary_entity_id")
+        keys = [
+            (pairs, pair_key(suggestion_type, primary_id, suggestion.get("secondary_entity_id"))),
+            (primaries, (suggestion_type, str(primary_id) if primary_id else None)),
+        ]
+        if suggestion_type == "duplicate_cluster":
+            keys += [(pairs, pair_key("duplicate", a, b)) for a, b in combinations(cluster_member_ids(suggestion), 2)]
+        for counter, key in keys:
+            counter[key] += delta
+            if counter[key] <= 0:
+                del counter[key]
+
+    async def refresh(self) -> None:
+        """Reload every pending suggestion's keys."""
+        pairs, primaries = Counter(), Counter()
+        after = None
+        while True:
+            page = await self.db.get_pending_suggestion_keys(after=after, limit=self.page_size)
+            for row in page:
+                self._apply(pairs, primaries, row, 1)
+            if len(page) < self.page_size:
+                break
+            after = page[-1]["id"]
+        self.pairs, self.primaries = pairs, primaries
+        self.loaded_at = time.monotonic()
+        logger.info("suggestion_index_loaded", pairs=len(self.pairs))
+
+    async def ensure_loaded(self) -> None:
+        if not self._fresh():
+            await self.refresh()
+
+    def exists(self, suggestion_type: str, primary_id: str, secondary_id: str = None) -> bool:
+        """
+        Whether a pending suggestion covers this pair.
+
+        Without a secondary ID, any pending suggestion of this type with this
+        primary entity counts (same as check_existing_suggestion).
+        """
+        if not secondary_id:
+            return (suggestion_type, str(primary_id) if primary_id else None) in self.primaries
+        return pair_key(suggestion_type, primary_id, secondary_id) in self.pairs
+
+    def record_created(self, suggestion: dict) -> None:
+        """A suggestion was inserted."""
+        if self.loaded_at is not None and (suggestion.get("status") or "pending") == "pending":
+            self._apply(self.pairs, self.primaries, suggestion, 1)
+
+    def record_reviewed(self, suggestion: dict) -> None:
+        """A pending suggestion was accepted/rejected."""
+        if self.loaded_at is not None and suggestion.get("status") != "pending":
+            self._apply(self.pairs, self.primaries, suggestion, -1)
+
+
+# Singleton instance
+suggestion_index = SuggestionPairIndex()
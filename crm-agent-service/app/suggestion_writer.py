@@ -0,0 +1,113 @@
+"""Buffered bulk writer for agent suggestions and their action-log rows."""
+
+from collections import defaultdict, deque
+
+import structlog
+
+from app.config import get_settings
+from app.database import db
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+
+def _row_key(suggestion: dict) -> tuple:
+    """Identifies a suggestion in the insert's returned representation."""
+    return tuple(
+        str(suggestion.get(k)) if suggestion.get(k) is not None else None
+        for k in ("suggestion_type", "entity_type", "primary_entity_id", "secondary_entity_id")
+    )
+
+
+class SuggestionWriter:
+    """
+    Accumulates suggestions and flushes them in bulk inserts.
+
+    Each suggestion can carry an agent_action_log row; once the batch is
+    inserted, the row's suggestion_id is filled from the returned
+    representation and all the batch's log rows go out in one more insert.
+    So N suggestions cost about 2 * N / batch_size writes instead of 2 * N.
+
+    If a batch insert fails, its rows are retried one at a time so a single
+    bad row doesn't lose the rest; rows that still fail are reported in
+    `failed`. Use as an async context manager, or call flush() at the end.
+    """
+
+    def __init__(self, batch_size: int | None = None):
+        self.db = db
+        self.batch_size = batch_size or settings.suggestion_write_batch_size
+        self.buffer: list[tuple[dict, dict | None]] = []
+        self.created: list[dict] = []
+        self.failed: list[dict] = []
+        self.logs_written = 0
+        self.logs_failed = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.flush()
+
+    async def add(self, suggestion: dict, log_row: dict | None = None) -> None:
+        """Queue a suggestion (and its log row); flushes when the buffer is full."""
+        self.buffer.append((suggestion, log_row))
+        if len(self.buffer) >= self.batch_size:
+            await self.flush()
+
+    async def _insert(self, batch: list[tuple[dict, dict | None]]) -> list[tuple[dict, dict | None]]:
+        """Insert a batch; returns (inserted row, log row) for what made it in."""
+        try:
+            rows = await self.db.create_suggestions([s for s, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                self.failed.append({"suggestion": batch[0][0], "error": str(e)})
+                return []
+            logger.warning("suggestion_batch_failed", size=len(batch), error=str(e))
+            inserted = []
+            for item in batch:
+                inserted.extend(await self._insert([item]))
+            return inserted
+
+        # Correlate returned rows to the queued log rows
+        pending = defaultdict(deque)
+        for suggestion, log_row in batch:
+            pending[_row_key(suggestion)].append(log_row)
+        inserted = []
+        for row in rows:
+            queue = pending.get(_row_key(row))
+            inserted.append((row, queue.popleft() if queue else None))
+        if len(rows) < len(batch):
+            returned = {_row_key(row) for row in rows}
+            self.failed.extend(
+                {"suggestion": s, "error": "not returned by insert"}
+                for s, _ in batch if _row_key(s) not in returned
+            )
+        return inserted
+
+    async def flush(self) -> None:
+        """Write everything buffered."""
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        inserted = await self._insert(batch)
+        self.created.extend(row for row, _ in inserted)
+
+        log_rows = [
+            {**log_row, "suggestion_id": row["id"]}
+            for row, log_row in inserted if log_row is not None
+        ]
+        try:
+            await self.db.log_actions(log_rows)
+            self.logs_written += len(log_rows)
+        except Exception as e:
+            self.logs_failed += len(log_rows)
+            logger.warning("suggestion_log_batch_failed", size=len(log_rows), error=str(e))
+
+    def report(self) -> dict:
+        return {
+            "created": len(self.created),
+            "failed": len(self.failed),
+            "errors": [f["error"] for f in self.failed][:10],
+            "logs_written": self.logs_written,
+            "logs_failed": self.logs_failed,
+        }
@@ -0,0 +1,154 @@
+"""Tag shortlist ranking for the /suggest-contact-profile tags step."""
+
+import asyncio
+from collections import Counter
+import math
+import time
+
+import structlog
+
+from app.company_dedup import STOP_TOKENS, normalize_company_name
+from app.config import get_settings
+from app.database import db
+from app.name_index import fold_name
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+PLACEHOLDER_CATEGORIES = {None, "", "Inbox", "Not Set", "Skip"}
+
+
+def contact_features(job_title: str = None, company: str = None, category: str = None) -> set[str]:
+    """Prefixed features of a contact: "title:founder", "company:acme", "category:Founder"."""
+    features = set()
+    for token in fold_name(job_title or "").split():
+        if len(token) >= 2 and token not in STOP_TOKENS:
+            features.add(f"title:{token}")
+    for token in normalize_company_name(company or "").split():
+        if len(token) >= 3 and token not in STOP_TOKENS:
+            features.add(f"company:{token}")
+    if category not in PLACEHOLDER_CATEGORIES:
+        features.add(f"category:{category}")
+    return features
+
+
+class TagRanker:
+    """
+    Co-occurrence model from existing contact_tags assignments.
+
+    Every tagged contact contributes its job title tokens, company name
+    tokens and category as features; for a feature f the model keeps how
+    often each tag appears on contacts having f. A query's tags are scored
+    by P(tag | f) averaged over its known features, each weighted by the
+    feature's IDF so "category:Founder" counts for less than a rare company
+    token, plus a small popularity prior so every tag has a rank.
+
+    The shortlist goes into the tag prompt instead of the whole vocabulary;
+    when the top tags are both probable and well supported the model is not
+    asked at all. Loaded with one keyset scan and rebuilt in the background
+    (stale-while-revalidate) after tag_ranker_ttl seconds.
+    """
+
+    def __init__(self, ttl: float | None = None, page_size: int = 1000, prior_weight: float = 0.05):
+        self.db = db
+        self.ttl = ttl if ttl is not None else settings.tag_ranker_ttl
+        self.page_size = page_size
+        self.prior_weight = prior_weight
+        self.tag_counts: Counter = Counter()
+        self.feature_counts: Counter = Counter()
+        self.cooccurrence: dict[str, Counter] = {}
+        self.contacts = 0
+        self.loaded_at: float | None = None
+        self._refreshing: asyncio.Task | None = None
+
+    def _fresh(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl
+
+    async def refresh(self) -> None:
+        """Rebuild from every tagged contact."""
+        tag_counts, feature_counts, cooccurrence = Counter(), Counter(), {}
+        after, contacts = None, 0
+        while True:
+            page = await self.db.get_tagged_contacts_page(after, self.page_size)
+            for row in page:
+                tag_ids = {t["tag_id"] for t in row.get("contact_tags") or [] if t.get("tag_id")}
+                if not tag_ids:
+                    continue
+                companies = [
+                    (cc.get("companies") or {}).get("name") for cc in row.get("contact_companies") or []
+                ]
+                features = contact_features(row.get("job_role"), " ".join(filter(None, companies)), row.get("category"))
+                contacts += 1
+                tag_counts.update(tag_ids)
+                for feature in features:
+                    feature_counts[feature] += 1
+                    cooccurrence.setdefault(feature, Counter()).update(tag_ids)
+            if len(page) < self.page_size:
+                break
+            after = page[-1]["contact_id"]
+
+        self.tag_counts, self.feature_counts, self.cooccurrence = tag_counts, feature_counts, cooccurrence
+        self.contacts = contacts
+        self.loaded_at = time.monotonic()
+        logger.info("tag_ranker_loaded", contacts=contacts, tags=len(tag_counts), features=len(feature_counts))
+
+    async def _background_refresh(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error("tag_ranker_refresh_error", error=str(e))
+
+    async def ensure_loaded(self) -> None:
+        """Load on first use; afterwards a stale model keeps serving while it rebuilds."""
+        if self.loaded_at is None:
+            await self.refresh()
+        elif not self._fresh() and (self._refreshing is None or self._refreshing.done()):
+            self._refreshing = asyncio.create_task(self._background_refresh())
+
+    def rank(self, tags: list[dict], job_title: str = None, company: str = None,
+             category: str = None, limit: int = 25) -> list[dict]:
+        """
+        The limit best of tags ({"tag_id", "name"}) for a contact, best first.
+
+        Returns:
+            [{"tag_id", "name", "score", "support"}]; score is the estimated
+            P(tag | contact) and support the most contacts sharing one of
+            its features that carry the tag
+        """
+        features = [f for f in contact_features(job_title, company, category) if f in self.cooccurrence]
+        weights = {f: math.log(1 + self.contacts / self.feature_counts[f]) for f in features}
+        total_weight = sum(weights.values())
+
+        ranked = []
+        for tag in tags:
+            tag_id = tag["tag_id"]
+            prior = self.tag_counts[tag_id] / self.contacts if self.contacts else 0.0
+            if total_weight:
+                likelihood = sum(
+                    weights[f] * self.cooccurrence[f][tag_id] / self.feature_counts[f] for f in features
+                ) / total_weight
+                support = max(self.cooccurrence[f][tag_id] for f in features)
+            else:
+                likelihood, support = 0.0, 0
+            score = (1 - self.prior_weight) * likelihood + self.prior_weight * prior
+            ranked.append({"tag_id": tag_id, "name": tag["name"], "score": round(score, 4), "support": support})
+
+        ranked.sort(key=lambda r: (-r["score"], r["name"]))
+        return ranked[:limit]
+
+    @staticmethod
+    def confident(ranked: list[dict], max_tags: int = 5) -> list[dict] | None:
+        """
+        The tags to apply without asking the model, or None when the
+        shortlist is not clear-cut (no tag above tag_confident_probability
+        seen on at least tag_confident_min_support similar contacts).
+        """
+        picked = [
+            r for r in ranked
+            if r["score"] >= settings.tag_confident_probability and r["support"] >= settings.tag_confident_min_support
+        ][:max_tags]
+        return picked or None
+
+
+# Singleton instance
+tag_ranker = TagRanker()
@@ -315,7 +315,9 @@ async def execute_tool(name: str, input_data: dict) -> dict:
 
         elif name == "create_suggestion":
             # Check if similar suggestion exists
-            exists = await db.check_existing_suggestion(
+            from app.suggestion_index import suggestion_index
+            await suggestion_index.ensure_loaded()
+            exists = suggestion_index.exists(
                 input_data["suggestion_type"],
                 input_data.get("primary_entity_id"),
                 input_data.get("secondary_entity_id")
@@ -0,0 +1,237 @@
+"""Streaming file transfers between remote URLs, Supabase Storage and TimelinesAI."""
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, BinaryIO, Optional
+from urllib.parse import quote
+import hashlib
+import os
+import tempfile
+import time
+
+from pydantic import BaseModel
+import httpx
+import structlog
+
+from app.config import get_settings
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+
+class TransferTooLarge(Exception):
+    """Raised when a transfer goes over its size cap while streaming."""
+
+    def __init__(self, max_bytes: int, received: int):
+        self.max_bytes = max_bytes
+        self.received = received
+        super().__init__(f"Transfer exceeded {max_bytes} bytes (received {received})")
+
+
+class TransferMetrics(BaseModel):
+    """Byte and latency metrics for a single transfer."""
+    source: str
+    destination: str
+    bytes_transferred: int = 0
+    chunks: int = 0
+    content_hash: Optional[str] = None  # sha256 hex, when computed
+    duration_ms: float = 0.0
+    success: bool = False
+    error: Optional[str] = None
+
+
+class _Timer:
+    """Tracks a transfer from start to finish and logs the metrics once."""
+
+    def __init__(self, metrics: TransferMetrics):
+        self.metrics = metrics
+        self.started = time.perf_counter()
+
+    def finish(self, error: Exception = None) -> TransferMetrics:
+        self.metrics.duration_ms = round((time.perf_counter() - self.started) * 1000, 2)
+        self.metrics.success = error is None
+        self.metrics.error = str(error) if error else None
+        log = logger.info if error is None else logger.warning
+        log("transfer_complete", **self.metrics.dict())
+        return self.metrics
+
+
+def _count(metrics: TransferMetrics, chunk: bytes, max_bytes: int | None) -> None:
+    """Account for a chunk and enforce the size cap."""
+    metrics.bytes_transferred += len(chunk)
+    metrics.chunks += 1
+    if max_bytes is not None and metrics.bytes_transferred > max_bytes:
+        raise TransferTooLarge(max_bytes, metrics.bytes_transferred)
+
+
+async def iter_url(
+    client: httpx.AsyncClient,
+    url: str,
+    metrics: TransferMetrics,
+    max_bytes: int | None = None,
+    chunk_size: int | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Yield a URL's body in chunks, never holding more than one chunk in memory.
+
+    Rejects up front when the server announces a Content-Length over the cap,
+    and again mid-stream for servers that lie or use chunked encoding.
+    """
+    chunk_size = chunk_size or settings.transfer_chunk_size
+
+    async with client.stream("GET", url) as response:
+        response.raise_for_status()
+
+        declared = response.headers.get("content-length")
+        if max_bytes is not None and declared and declared.isdigit() and int(declared) > max_bytes:
+            raise TransferTooLarge(max_bytes, int(declared))
+
+        async for chunk in response.aiter_bytes(chunk_size):
+            _count(metrics, chunk, max_bytes)
+            yield chunk
+
+
+def storage_object_url(bucket: str, path: str) -> str:
+    """REST endpoint for an object in Supabase Storage."""
+    return f"{settings.supabase_url}/storage/v1/object/{bucket}/{quote(path, safe='/')}"
+
+
+@asynccontextmanager
+async def download_to_tempfile(
+    url: str,
+    max_bytes: int | None = None,
+    suffix: str = "",
+) -> AsyncIterator[tuple[str, TransferMetrics]]:
+    """
+    Stream a remote file to a temporary file on disk and yield its path.
+
+    Used where the consumer needs random access (e.g. PDF parsing) but the
+    whole file should not sit in memory. The sha256 of the content is
+    recorded on the metrics. The file is removed on exit.
+    """
+    max_bytes = max_bytes if max_bytes is not None else settings.attachment_max_bytes
+    metrics = TransferMetrics(source=url.split("?")[0], destination="tempfile")
+    timer = _Timer(metrics)
+
+    fd, temp_path = tempfile.mkstemp(suffix=suffix)
+    try:
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, "wb") as out:
+                async with httpx.AsyncClient(timeout=settings.transfer_timeout) as client:
+                    async for chunk in iter_url(client, url, metrics, max_bytes):
+                        digest.update(chunk)
+                        out.write(chunk)
+            metrics.content_hash = digest.hexdigest()
+        except Exception as e:
+            timer.finish(e)
+            raise
+        timer.finish()
+        yield temp_path, metrics
+    finally:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+
+
+async def _iter_file(path: str, chunk_size: int) -> AsyncIterator[bytes]:
+    """Yield a local file in chunks (httpx's async client needs an async body)."""
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+async def upload_file_to_storage(
+    path: str,
+    bucket: str,
+    object_path: str,
+    content_type: str = "application/octet-stream",
+    upsert: bool = False,
+) -> tuple[bool, TransferMetrics]:
+    """
+    Stream a local file into Supabase Storage.
+
+    Returns (created, metrics). created is False when the object already
+    existed and upsert was off - for content-addressed paths that means the
+    bytes are already there.
+    """
+    metrics = TransferMetrics(source=f"file://{os.path.basename(path)}", destination=f"storage://{bucket}/{object_path}")
+    timer = _Timer(metrics)
+
+    async def body() -> AsyncIterator[bytes]:
+        async for chunk in _iter_file(path, settings.transfer_chunk_size):
+            _count(metrics, chunk, None)
+            yield chunk
+
+    try:
+        async with httpx.AsyncClient(timeout=settings.transfer_timeout) as client:
+            response = await client.post(
+                storage_object_url(bucket, object_path),
+                headers={
+                    "Authorization": f"Bearer {settings.supabase_service_key}",
+                    "apikey": settings.supabase_service_key,
+                    "Content-Type": content_type,
+                    "Content-Length": str(os.path.getsize(path)),
+                    "cache-control": "max-age=3600",
+                    "x-upsert": "true" if upsert else "false",
+                },
+                content=body(),
+            )
+        # Storage reports an existing object as 409, or as 400 with a "Duplicate" body on older versions
+        if response.status_code == 409 or (response.status_code == 400 and "Duplicate" in response.text):
+            timer.finish()
+            return False, metrics
+        response.raise_for_status()
+    except Exception as e:
+        timer.finish(e)
+        raise
+
+    return True, timer.finish()
+
+
+class _CappedReader:
+    """File-like wrapper that counts bytes read and enforces a size cap."""
+
+    def __init__(self, fileobj: BinaryIO, metrics: TransferMetrics, max_bytes: int | None):
+        self._fileobj = fileobj
+        self._metrics = metrics
+        self._max_bytes = max_bytes
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._fileobj.read(size)
+        if chunk:
+            _count(self._metrics, chunk, self._max_bytes)
+        return chunk
+
+
+async def stream_file_to_timelines(
+    upload_url: str,
+    fileobj: BinaryIO,
+    file_name: str,
+    content_type: str,
+    api_key: str,
+    max_bytes: int | None = None,
+) -> tuple[httpx.Response, TransferMetrics]:
+    """
+    Upload a local file object to TimelinesAI as multipart without reading it into memory.
+
+    httpx pulls the file in fixed-size chunks while encoding the multipart body.
+    """
+    max_bytes = max_bytes if max_bytes is not None else settings.whatsapp_upload_max_bytes
+    metrics = TransferMetrics(source=f"upload://{file_name}", destination=upload_url)
+    timer = _Timer(metrics)
+
+    reader = _CappedReader(fileobj, metrics, max_bytes)
+    try:
+        async with httpx.AsyncClient(timeout=settings.transfer_timeout) as client:
+            response = await client.post(
+                upload_url,
+                headers={"Authorization": f"Bearer {api_key}"},
+                files={"file": (file_name, reader, content_type)},
+            )
+    except Exception as e:
+        timer.finish(e)
+        raise
+
+    timer.finish(None if response.status_code in (200, 201) else Exception(f"HTTP {response.status_code}"))
+    return response, metrics
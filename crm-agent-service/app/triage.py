@@ -0,0 +1,226 @@
+"""Rule-based email triage run before the /analyze-email model loop."""
+
+from collections import Counter
+import re
+
+import structlog
+
+from app.config import get_settings
+from app.database import db
+from app.email_text import strip_boilerplate, strip_quoted
+from app.tools import extract_domain_from_email, normalize_email
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+# Keyword sets per category; settings.triage_keywords adds to them.
+# A keyword may sit in several categories ("receipt" is personal and transactional).
+KEYWORDS = {
+    "deal": [
+        "investment", "funding", "round", "valuation", "term sheet",
+        "equity", "shares", "capital", "pitch", "deck", "proposal",
+        "partnership", "contract", "agreement", "deal",
+    ],
+    "intro": [
+        "introduction", "introduce", "meet", "connect you with",
+        "putting you in touch", "cc'ing", "looping in", "wanted to connect",
+    ],
+    "personal": [
+        "family", "birthday", "christmas", "holiday", "vacation",
+        "dinner", "lunch", "kids", "school", "receipt", "order",
+    ],
+    "transactional": [
+        "receipt", "invoice", "payment", "order", "confirmation",
+        "subscription", "renewal", "stripe", "paypal",
+        "shipped", "tracking number", "password reset",
+        "verification code", "verify your email", "security alert",
+    ],
+    "newsletter": [
+        "unsubscribe", "newsletter", "view in browser", "view this email in your browser",
+        "manage preferences", "email preferences", "you are receiving this", "weekly digest",
+    ],
+}
+
+# Local parts of automated senders: noreply@, notifications+abc@, billing@ ...
+AUTOMATED_SENDER = re.compile(
+    r"^(?:no-?reply|do-?not-?reply|donotreply|notifications?|notify|alerts?|billing|receipts?|"
+    r"invoices?|orders?|newsletters?|news|marketing|mailer-daemon|mailer|postmaster|bounces?)"
+    r"(?:[+._-].*)?$"
+)
+# Bulk-mail platforms and senders that only send automated mail
+AUTOMATED_DOMAINS = {
+    "mcsv.net", "mcdlv.net", "list-manage.com", "sendgrid.net", "amazonses.com", "mailgun.org",
+    "substack.com", "beehiiv.com", "hubspotemail.net", "mailchimpapp.net", "sendinblue.com",
+    "stripe.com", "paypal.com", "paypal.it", "linkedin.com", "facebookmail.com", "accounts.google.com",
+}
+# First label of a dedicated sending subdomain (news.acme.com, email.acme.com)
+BULK_SUBDOMAINS = {"email", "mailer", "news", "newsletter", "em", "e", "info", "marketing", "notifications"}
+
+# Categories whose keyword hits make an email worth the full analysis
+BUSINESS_CATEGORIES = ("deal", "intro")
+
+# action -> what /analyze-email does: full model loop, a shorter one, or none
+ACTIONS = ("full", "downgrade", "skip")
+
+
+class EmailTriage:
+    """
+    Decides how much model analysis an email deserves, without a model.
+
+    Subject and body are scanned once with a single compiled regex over
+    every keyword set (each hit maps back to its categories); sender local
+    part, sender domain and List-Unsubscribe / Precedence / Auto-Submitted
+    headers mark automated and bulk mail. The body is scanned without
+    quoted history and boilerplate, and its keywords alone are a weak
+    signal: nothing is skipped unless the sender or headers say it is
+    automated. Newsletters and automated mail skip the model loop;
+    newsletter, transactional or personal mail from a person gets a
+    shorter one, and anything mentioning a deal or an introduction gets
+    the full analysis.
+
+    Decisions are counted so /stats can report the rate of skipped model calls.
+    """
+
+    def __init__(self, keywords: dict[str, list[str]] | None = None, automated_domains: set[str] | None = None):
+        self.db = db
+        keywords = keywords if keywords is not None else _merged_keywords()
+        self.categories: dict[str, set[str]] = {}
+        for category, words in keywords.items():
+            for word in words:
+                self.categories.setdefault(word.lower(), set()).add(category)
+        # Longest first, so a keyword extending another ("term sheet" over a configured
+        # "term") is the one reported; the leading \b keeps "round" out of "around"
+        # while "meet" still matches "meeting"
+        alternatives = sorted(self.categories, key=len, reverse=True)
+        self.pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, alternatives)) + ")")
+        self.automated_domains = (
+            automated_domains if automated_domains is not None
+            else AUTOMATED_DOMAINS | {d.lower() for d in settings.triage_automated_domains}
+        )
+        self.decisions: Counter = Counter()
+        self.by_category: Counter = Counter()
+
+    def scan(self, text: str) -> dict[str, list[str]]:
+        """category -> distinct keywords found in text."""
+        hits: dict[str, list[str]] = {}
+        for match in self.pattern.finditer((text or "").lower()):
+            word = match.group(0)
+            for category in self.categories[word]:
+                found = hits.setdefault(category, [])
+                if word not in found:
+                    found.append(word)
+        return hits
+
+    def _sender_signals(self, from_email: str, headers: dict) -> list[str]:
+        """Reasons the sender looks automated or bulk ("bulk:" prefix for mailing lists)."""
+        signals = []
+        address = normalize_email(from_email)
+        local_part = address.split("@", 1)[0]
+        domain = extract_domain_from_email(address)
+
+        if AUTOMATED_SENDER.match(local_part):
+            signals.append(f"automated_sender:{local_part}")
+        if domain:
+            labels = domain.split(".")
+            if any(".".join(labels[i:]) in self.automated_domains for i in range(len(labels) - 1)):
+                signals.append(f"automated_domain:{domain}")
+            elif len(labels) > 2 and labels[0] in BULK_SUBDOMAINS:
+                signals.append(f"bulk:sending_subdomain:{domain}")
+
+        headers = {str(k).lower(): str(v).lower() for k, v in (headers or {}).items()}
+        if "list-unsubscribe" in headers or "list-id" in headers:
+            signals.append("bulk:list_header")
+        if headers.get("precedence") in ("bulk", "list", "junk"):
+            signals.append(f"bulk:precedence:{headers['precedence']}")
+        if headers.get("auto-submitted", "no") != "no":
+            signals.append("automated_header:auto-submitted")
+        return signals
+
+    def classify(self, email_data: dict, personal_domain: bool = False) -> dict:
+        """
+        Triage decision for an email dict (as built by /analyze-email).
+
+        Returns:
+            {"category", "action", "reasons", "keywords"}; category is one of
+            business / newsletter / transactional / notification / personal
+        """
+        raw_body = email_data.get("body_text") or email_data.get("snippet") or ""
+        # Keywords count only in the sender's own text, not in quoted history or footers
+        body = strip_boilerplate(strip_quoted(raw_body))
+        hits = self.scan(f"{email_data.get('subject') or ''}\n{body}")
+        signals = self._sender_signals(email_data.get("from_email"), email_data.get("headers"))
+
+        # Sender and header signals are strong; newsletter words in a person's
+        # text are weak ("sign up for our newsletter" in a signature) and only
+        # shorten the analysis
+        bulk = any(s.startswith("bulk:") for s in signals)
+        automated = bool(signals)
+        business = any(c in hits for c in BUSINESS_CATEGORIES)
+
+        if business and not automated:
+            category, action = "business", "full"
+        elif bulk:
+            category, action = "newsletter", "skip"
+        elif automated:
+            # Unsubscribe / view-in-browser footers were stripped above, so look at the raw body
+            if "newsletter" in hits or "newsletter" in self.scan(raw_body):
+                category = "newsletter"
+            else:
+                category = "transactional" if "transactional" in hits else "notification"
+            action = "skip"
+        elif "newsletter" in hits:
+            category, action = "newsletter", "downgrade"
+        elif "transactional" in hits:
+            # A person sending an invoice may still be a contact worth a look
+            category, action = "transactional", "downgrade"
+        elif "personal" in hits and personal_domain:
+            category, action = "personal", "downgrade"
+        else:
+            category, action = "business", "full"
+
+        reasons = list(signals)
+        if category == "newsletter" and not bulk:
+            reasons.append("newsletter_keywords")
+        if personal_domain:
+            reasons.append("personal_domain")
+        return {"category": category, "action": action, "reasons": reasons, "keywords": hits}
+
+    async def triage(self, email_data: dict) -> dict:
+        """classify() with the personal-domain lookup, counted in stats()."""
+        domain = extract_domain_from_email(email_data.get("from_email") or "")
+        personal = bool(domain) and await self.db.is_personal_email_domain(domain)
+        decision = self.classify(email_data, personal_domain=personal)
+
+        self.decisions[decision["action"]] += 1
+        self.by_category[decision["category"]] += 1
+        logger.info(
+            "email_triaged",
+            email_id=email_data.get("id"),
+            category=decision["category"],
+            action=decision["action"],
+            reasons=decision["reasons"],
+        )
+        return decision
+
+    def stats(self) -> dict:
+        """Triage counts since startup and the share of model loops skipped or shortened."""
+        total = sum(self.decisions.values())
+        return {
+            "triaged": total,
+            "by_action": {action: self.decisions[action] for action in ACTIONS},
+            "by_category": dict(self.by_category),
+            "model_calls_skipped": self.decisions["skip"],
+            "skip_rate": round(self.decisions["skip"] / total, 3) if total else 0.0,
+            "downgrade_rate": round(self.decisions["downgrade"] / total, 3) if total else 0.0,
+        }
+
+
+def _merged_keywords() -> dict[str, list[str]]:
+    merged = {category: list(words) for category, words in KEYWORDS.items()}
+    for category, words in settings.triage_keywords.items():
+        merged.setdefault(category, []).extend(words)
+    return merged
+
+
+# Singleton instance
+email_triage = EmailTriage()
@@ -0,0 +1,134 @@
+"""
+Local stand-in for Apollo's people match API, for trying enrichment without credits.
+
+Answers /api/v1/people/bulk_match (and /api/v1/people/match) with
+deterministic fake people: a request matches unless its email or last name
+contains "nomatch". Enforces the 10-per-call bulk limit and a per-minute
+request limit (429 with Retry-After), and counts calls on GET /_stats.
+tests/test_apollo_enrichment.py runs the enrichment job against it in
+process through httpx.ASGITransport.
+
+Usage (from crm-agent-service/):
+    python -m scripts.apollo_stub_server --port 8099 --rate-limit 30
+    APOLLO_BASE_URL=http://localhost:8099 APOLLO_API_KEY=stub uvicorn app.main:app
+"""
+
+from collections import Counter, deque
+import argparse
+import hashlib
+import math
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import uvicorn
+
+MAX_BULK_DETAILS = 10
+
+app = FastAPI(title="Apollo stub")
+calls: Counter = Counter()
+recent: deque = deque()  # request times within the current window
+rate_limit = 0  # requests per window, 0 = unlimited
+window = 60.0  # rate limit window in seconds (tests shorten it)
+
+
+def fake_person(details: dict) -> dict | None:
+    email = (details.get("email") or "").lower()
+    last_name = details.get("last_name") or ""
+    if "nomatch" in email or "nomatch" in last_name.lower():
+        return None
+    first_name = details.get("first_name") or email.split("@")[0].split(".")[0].title() or "Alex"
+    last_name = last_name or "Stub"
+    slug = f"{first_name}-{last_name}".lower().replace(" ", "-")
+    domain = details.get("domain") or (email.split("@")[1] if "@" in email else "example.com")
+    person_id = hashlib.md5(f"{email}|{slug}".encode()).hexdigest()[:24]
+    return {
+        "id": person_id,
+        "first_name": first_name,
+        "last_name": last_name,
+        "title": "Founder & CEO",
+        "linkedin_url": details.get("linkedin_url") or f"http://www.linkedin.com/in/{slug}",
+        "photo_url": f"https://static.example.com/photos/{person_id}.jpg",
+        "email": email or None,
+        "city": "Milan",
+        "state": "Lombardy",
+        "country": "Italy",
+        "seniority": "founder",
+        "departments": ["master_executive"],
+        "phone_numbers": [],
+        "organization": {
+            "name": details.get("organization_name") or domain.split(".")[0].title(),
+            "website_url": f"http://www.{domain}",
+            "primary_domain": domain,
+            "linkedin_url": None,
+            "industry": "venture capital & private equity",
+            "estimated_num_employees": 25,
+        },
+    }
+
+
+def reset(limit: int = 0, window_seconds: float = 60.0) -> None:
+    """Clear counters and set the rate limit (used by tests between runs)."""
+    global rate_limit, window
+    calls.clear()
+    recent.clear()
+    rate_limit, window = limit, window_seconds
+
+
+def check_request(api_key: str | None) -> JSONResponse | None:
+    """401 without an API key, 429 over the rate limit."""
+    if not api_key:
+        return JSONResponse({"error": "api_key missing"}, status_code=401)
+    now = time.monotonic()
+    while recent and now - recent[0] >= window:
+        recent.popleft()
+    if rate_limit and len(recent) >= rate_limit:
+        calls["rate_limited"] += 1
+        retry_after = max(1, math.ceil(window - (now - recent[0])))
+        return JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": str(retry_after)})
+    recent.append(now)
+    return None
+
+
+@app.post("/api/v1/people/bulk_match")
+async def bulk_match(request: Request):
+    rejected = check_request(request.headers.get("x-api-key"))
+    if rejected:
+        return rejected
+    details = (await request.json()).get("details") or []
+    if len(details) > MAX_BULK_DETAILS:
+        return JSONResponse({"error": f"at most {MAX_BULK_DETAILS} details per request"}, status_code=422)
+    calls["bulk_match"] += 1
+    calls["people"] += len(details)
+    matches = [fake_person(d) for d in details]
+    return {
+        "status": "success",
+        "matches": matches,
+        "missing_records": sum(1 for m in matches if m is None),
+        "credits_consumed": sum(1 for m in matches if m),
+    }
+
+
+@app.post("/api/v1/people/match")
+async def match(request: Request):
+    body = await request.json()
+    # The single-person endpoints in app.main send the key in the body
+    rejected = check_request(request.headers.get("x-api-key") or body.get("api_key"))
+    if rejected:
+        return rejected
+    calls["match"] += 1
+    return {"person": fake_person(body)}
+
+
+@app.get("/_stats")
+async def stats():
+    return dict(calls)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--rate-limit", type=int, default=0, help="requests per minute, 0 = unlimited")
+    args = parser.parse_args()
+    reset(args.rate_limit)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
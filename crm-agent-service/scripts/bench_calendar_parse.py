@@ -0,0 +1,132 @@
+"""
+Benchmark ICS parsing: full-feed parse (previous /calendar-sync) vs windowed parse.
+
+Generates a synthetic feed with years of history plus recurring series, then
+times both paths. No network or database needed.
+
+Usage (from crm-agent-service/):
+    python -m scripts.bench_calendar_parse --events 20000 --years 8
+"""
+
+from datetime import datetime, timedelta, timezone
+import argparse
+import random
+import time
+
+from icalendar import Calendar
+
+from app.ics_parser import event_to_record, is_cancelled, parse_feed
+
+VTIMEZONE = """BEGIN:VTIMEZONE
+TZID:Europe/London
+BEGIN:STANDARD
+DTSTART:19701025T020000
+TZOFFSETFROM:+0100
+TZOFFSETTO:+0000
+RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU
+END:STANDARD
+BEGIN:DAYLIGHT
+DTSTART:19700329T010000
+TZOFFSETFROM:+0000
+TZOFFSETTO:+0100
+RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU
+END:DAYLIGHT
+END:VTIMEZONE"""
+
+
+def _event(uid: str, start: datetime, extra: list[str] = ()) -> str:
+    end = start + timedelta(minutes=random.choice((30, 45, 60, 90)))
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{start:%Y%m%dT%H%M%S}Z",
+        f"DTSTART;TZID=Europe/London:{start:%Y%m%dT%H%M%S}",
+        f"DTEND;TZID=Europe/London:{end:%Y%m%dT%H%M%S}",
+        f"SUMMARY:Meeting {uid[:8]}",
+        "DESCRIPTION:" + "Agenda item. " * random.randint(1, 20),
+        "LOCATION:Office",
+        "ORGANIZER;CN=Organizer:mailto:organizer@example.com",
+        "ATTENDEE;CN=Guest;PARTSTAT=ACCEPTED:mailto:guest@example.com",
+        *extra,
+        "END:VEVENT",
+    ]
+    return "\r\n".join(lines)
+
+
+def build_feed(events: int, years: int, series: int) -> str:
+    random.seed(42)
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    first = now - timedelta(days=365 * years)
+    span = (now + timedelta(days=365)) - first
+
+    blocks = [VTIMEZONE]
+    for i in range(events):
+        start = first + timedelta(seconds=random.randrange(int(span.total_seconds())))
+        blocks.append(_event(f"single-{i:06d}@bench", start.replace(minute=0)))
+
+    for i in range(series):
+        start = first + timedelta(days=random.randrange(365 * years))
+        uid = f"series-{i:04d}@bench"
+        skipped = start + timedelta(weeks=2)
+        blocks.append(_event(uid, start, [
+            "RRULE:FREQ=WEEKLY;INTERVAL=1",
+            f"EXDATE;TZID=Europe/London:{skipped:%Y%m%dT%H%M%S}",
+        ]))
+        moved = start + timedelta(weeks=3)
+        blocks.append(_event(uid, moved + timedelta(hours=2), [
+            f"RECURRENCE-ID;TZID=Europe/London:{moved:%Y%m%dT%H%M%S}",
+        ]))
+
+    return "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//bench//EN\r\n" + "\r\n".join(blocks) + "\r\nEND:VCALENDAR\r\n"
+
+
+def full_parse(text: str) -> list[dict]:
+    """What /calendar-sync did before: parse everything, keep every VEVENT."""
+    records = []
+    for component in Calendar.from_ical(text).walk():
+        if component.name == "VEVENT" and not is_cancelled(component):
+            record = event_to_record(component)
+            if record:
+                records.append(record)
+    return records
+
+
+def _time(fn, repeat: int):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=20000, help="single events in the feed")
+    parser.add_argument("--series", type=int, default=200, help="weekly recurring series")
+    parser.add_argument("--years", type=int, default=8, help="years of history")
+    parser.add_argument("--past-days", type=int, default=30)
+    parser.add_argument("--future-days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = build_feed(args.events, args.years, args.series)
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    window_start = today - timedelta(days=args.past_days)
+    window_end = today + timedelta(days=args.future_days)
+
+    full_s, full_records = _time(lambda: full_parse(text), args.repeat)
+    windowed_s, (records, stats) = _time(lambda: parse_feed(text, window_start, window_end), args.repeat)
+
+    print(f"feed: {len(text) / 1024 / 1024:.1f} MiB, {stats['vevents_total']} VEVENTs")
+    print(f"window: {window_start:%Y-%m-%d} .. {window_end:%Y-%m-%d}")
+    print(f"full parse:     {full_s * 1000:8.1f} ms  -> {len(full_records)} records")
+    print(f"windowed parse: {windowed_s * 1000:8.1f} ms  -> {len(records)} records "
+          f"({stats['vevents_parsed']} VEVENTs parsed, {stats['series']} series, "
+          f"{stats['occurrences']} occurrences in window)")
+    print(f"speedup: {full_s / windowed_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
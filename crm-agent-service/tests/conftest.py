@@ -0,0 +1,17 @@
+"""
+Test setup: the service root on sys.path and placeholder settings, so app
+modules import without a .env (nothing here talks to Supabase or Anthropic).
+
+Run from crm-agent-service/:
+    pip install -r requirements.txt pytest
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test")
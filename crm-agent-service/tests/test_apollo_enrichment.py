@@ -0,0 +1,181 @@
+"""Bulk Apollo enrichment against scripts/apollo_stub_server.py, in process."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app import apollo_enrichment as enrichment
+from scripts import apollo_stub_server as stub
+
+AsyncClient = httpx.AsyncClient  # before any test patches it
+
+
+class FakeDB:
+    """The Database methods the enrichment job uses, over dicts."""
+
+    def __init__(self, contacts: list[dict]):
+        self.contacts = {c["contact_id"]: c for c in contacts}
+        self.inbox: dict[str, dict] = {}
+        self.cache: dict[str, dict] = {}
+
+    async def get_contacts_for_enrichment(self, contact_ids):
+        return [self.contacts[i] for i in contact_ids if i in self.contacts]
+
+    async def get_apollo_inbox_rows(self, contact_ids):
+        return [self.inbox[i] for i in contact_ids if i in self.inbox]
+
+    async def upsert_apollo_inbox_rows(self, rows):
+        for row in rows:
+            self.inbox[row["contact_id"]] = row
+
+    async def get_apollo_match_cache(self, match_keys, fetched_after):
+        return [
+            {"match_key": k, "person": self.cache[k]["person"]}
+            for k in match_keys if k in self.cache and self.cache[k]["fetched_at"] >= fetched_after
+        ]
+
+    async def upsert_apollo_match_cache(self, rows):
+        for row in rows:
+            self.cache[row["match_key"]] = row
+
+
+class FakeWorklist:
+    """completeness_worklist stand-in: contact IDs in worklist order."""
+
+    def __init__(self, contact_ids: list[str]):
+        self.contact_ids = contact_ids
+
+    async def ensure_loaded(self):
+        pass
+
+    def worklist(self, missing=None, match="any", category=None, max_score=None, limit=100, offset=0):
+        page = self.contact_ids[offset:offset + limit]
+        return {"total": len(self.contact_ids), "items": [{"contact_id": c} for c in page]}
+
+
+def make_contacts(count: int) -> list[dict]:
+    contacts = []
+    for i in range(count):
+        contacts.append({
+            "contact_id": f"c{i:03d}",
+            "first_name": f"Anna{i}",
+            # The stub answers no match for last names containing "nomatch"
+            "last_name": "Nomatch" if i % 5 == 0 else f"Rossi{i}",
+            "linkedin": None,
+            "contact_emails": [{"email": f"anna{i}@alpha{i % 3}.com", "is_primary": True}],
+            "contact_companies": [{"is_primary": True, "companies": {"name": f"Alpha {i % 3}", "website": None}}],
+        })
+    # Nothing to match on
+    contacts.append({"contact_id": "c999", "first_name": "Solo", "last_name": None,
+                     "contact_emails": [], "contact_companies": []})
+    return contacts
+
+
+def new_job(force: bool = False) -> dict:
+    return {"id": "test", "force": force, **{counter: 0 for counter in enrichment.COUNTERS}}
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    stub.reset()
+    monkeypatch.setattr(enrichment.settings, "apollo_api_key", "stub")
+    monkeypatch.setattr(enrichment.settings, "apollo_bulk_batch_size", 10)
+    monkeypatch.setattr(enrichment.settings, "apollo_max_retries", 3)
+    jobs = enrichment.ApolloEnrichmentJobs(chunk_size=100)
+    jobs.limiter = enrichment.RateLimiter(60_000)
+    return jobs
+
+
+def stub_client() -> httpx.AsyncClient:
+    return AsyncClient(transport=httpx.ASGITransport(app=stub.app), base_url="http://apollo.test")
+
+
+def run_chunk(runner, job, contact_ids):
+    async def go():
+        async with stub_client() as client:
+            await runner._run_chunk(client, job, contact_ids)
+    asyncio.run(go())
+
+
+def test_batches_and_writes_inbox_rows(runner):
+    contacts = make_contacts(25)
+    runner.db = FakeDB(contacts)
+    job = new_job()
+
+    run_chunk(runner, job, [c["contact_id"] for c in contacts])
+
+    # 25 lookups in groups of at most 10
+    assert stub.calls["bulk_match"] == 3
+    assert stub.calls["people"] == 25
+    assert job["api_calls"] == 3
+    assert (job["matched"], job["no_match"], job["unmatchable"], job["failed"]) == (20, 5, 1, 0)
+    assert job["written"] == 26
+
+    enriched = runner.db.inbox["c001"]
+    assert enriched["status"] == "enriched" and enriched["processed_at"]
+    assert enriched["apollo_data"]["linkedin_url"] == "http://www.linkedin.com/in/anna1-rossi1"
+    assert enriched["apollo_data"]["organization"]["domain"] == "alpha1.com"
+    assert runner.db.inbox["c000"]["status"] == "no_match"
+    # Unmatchable contacts stay unprocessed so a later job retries them
+    assert runner.db.inbox["c999"]["status"] == "unmatchable"
+    assert runner.db.inbox["c999"]["processed_at"] is None
+
+
+def test_retries_after_rate_limit(runner):
+    stub.reset(limit=2, window_seconds=1.0)
+    contacts = make_contacts(30)
+    runner.db = FakeDB(contacts)
+    job = new_job()
+
+    started = time.monotonic()
+    run_chunk(runner, job, [c["contact_id"] for c in contacts])
+
+    assert stub.calls["rate_limited"] >= 1
+    assert stub.calls["bulk_match"] == 3
+    assert job["api_calls"] == 3 + stub.calls["rate_limited"]
+    assert job["failed"] == 0 and job["matched"] == 24
+    # Retry-After (1s) was honoured rather than hammering the stub
+    assert time.monotonic() - started >= 1.0
+
+
+def test_cache_is_reused(runner):
+    contacts = make_contacts(12)
+    runner.db = FakeDB(contacts)
+    contact_ids = [c["contact_id"] for c in contacts]
+    run_chunk(runner, new_job(), contact_ids)
+    assert stub.calls["bulk_match"] == 2
+
+    job = new_job(force=True)
+    run_chunk(runner, job, contact_ids)
+
+    assert stub.calls["bulk_match"] == 2  # no new calls
+    assert job["cached"] == 12 and job["requested"] == 0
+    assert (job["matched"], job["no_match"]) == (9, 3)
+
+
+def test_limit_counts_only_unprocessed_contacts(runner, monkeypatch):
+    import app.completeness
+
+    contacts = make_contacts(30)
+    contact_ids = [c["contact_id"] for c in contacts]
+    runner.db = FakeDB(contacts)
+    runner.chunk_size = 10
+    monkeypatch.setattr(app.completeness, "completeness_worklist", FakeWorklist(contact_ids))
+    monkeypatch.setattr(enrichment.httpx, "AsyncClient", lambda **_: stub_client())
+
+    async def run_jobs():
+        first = await runner.start(limit=10)
+        await runner.tasks[first["id"]]
+        second = await runner.start(limit=10)
+        await runner.tasks[second["id"]]
+        return first, second
+
+    first, second = asyncio.run(run_jobs())
+
+    assert first["status"] == second["status"] == "completed"
+    assert first["selected"] == second["selected"] == 10
+    # The second job passes over the first job's contacts instead of stopping at them
+    assert second["skipped"] == 10
+    assert {c for c, row in runner.db.inbox.items() if row["processed_at"]} == set(contact_ids[:20])
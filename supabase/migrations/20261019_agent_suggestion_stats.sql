@@ -0,0 +1,23 @@
+-- Migration: agent_suggestion_stats
+-- Dashboard stats in one grouped aggregate instead of a count query per status
+
+CREATE OR REPLACE FUNCTION agent_suggestion_stats()
+RETURNS TABLE (
+  status text,
+  suggestion_type text,
+  entity_type text,
+  total bigint
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT s.status, s.suggestion_type, s.entity_type, count(*) AS total
+  FROM agent_suggestions s
+  GROUP BY s.status, s.suggestion_type, s.entity_type;
+$$;
+
+-- Lets the aggregate run as an index-only scan
+CREATE INDEX IF NOT EXISTS idx_agent_suggestions_status_type_entity
+  ON agent_suggestions(status, suggestion_type, entity_type);
+
+COMMENT ON FUNCTION agent_suggestion_stats() IS 'Suggestion counts grouped by status, suggestion_type and entity_type (used by crm-agent-service /stats)';
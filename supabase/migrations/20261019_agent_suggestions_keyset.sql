@@ -0,0 +1,28 @@
+-- Migration: agent_suggestions_keyset
+-- Cursor pagination and cheap change detection for GET /suggestions
+
+-- Keyset order used by the list endpoint (newest first, id as tie-breaker)
+CREATE INDEX IF NOT EXISTS idx_agent_suggestions_status_created_id
+  ON agent_suggestions(status, created_at DESC, id DESC);
+
+-- Change marker for a filtered set: row count plus the latest create/review time.
+-- Reads only narrow columns, so polls can be answered with 304 without touching
+-- suggestion_data.
+CREATE OR REPLACE FUNCTION agent_suggestions_version(
+  p_status text DEFAULT NULL,
+  p_suggestion_type text DEFAULT NULL,
+  p_entity_type text DEFAULT NULL
+)
+RETURNS text
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT count(*)::text || ':' ||
+         coalesce(extract(epoch FROM max(greatest(s.created_at, coalesce(s.reviewed_at, s.created_at))))::text, '0')
+  FROM agent_suggestions s
+  WHERE (p_status IS NULL OR s.status = p_status)
+    AND (p_suggestion_type IS NULL OR s.suggestion_type = p_suggestion_type)
+    AND (p_entity_type IS NULL OR s.entity_type = p_entity_type);
+$$;
+
+COMMENT ON FUNCTION agent_suggestions_version(text, text, text) IS 'Count and latest created_at/reviewed_at of matching suggestions, used as the /suggestions ETag';
@@ -0,0 +1,16 @@
+-- Migration: apollo_enrichment_jobs
+-- Bulk Apollo enrichment (crm-agent-service /enrichment-jobs): match cache and
+-- the matched profile on apollo_enrichment_inbox
+
+CREATE TABLE IF NOT EXISTS apollo_match_cache (
+  match_key TEXT PRIMARY KEY,             -- email:..., linkedin:... or name:...|org
+  person JSONB,                           -- summarized Apollo person, NULL when Apollo had no match
+  fetched_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_apollo_match_cache_fetched_at ON apollo_match_cache(fetched_at);
+
+ALTER TABLE apollo_enrichment_inbox ADD COLUMN IF NOT EXISTS apollo_data JSONB;
+
+COMMENT ON TABLE apollo_match_cache IS 'Apollo people-match responses by lookup key, so repeated enrichment runs do not spend credits again';
+COMMENT ON COLUMN apollo_enrichment_inbox.apollo_data IS 'Matched Apollo profile (linkedin_url, job_title, organization, ...) written by bulk enrichment jobs';
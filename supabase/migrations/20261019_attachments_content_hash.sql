@@ -0,0 +1,9 @@
+-- Migration: attachments_content_hash
+-- Content-addressed attachment storage: identical files share one storage object
+
+ALTER TABLE attachments ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+-- Lookup of an existing copy by content
+CREATE INDEX IF NOT EXISTS idx_attachments_content_hash ON attachments(content_hash) WHERE content_hash IS NOT NULL;
+
+COMMENT ON COLUMN attachments.content_hash IS 'SHA256 of the file content; rows with the same hash share permanent_url and text_content';
@@ -0,0 +1,9 @@
+-- Migration: calendar_sync_content_hash
+-- Incremental calendar sync: skip writes for events whose content has not changed
+
+ALTER TABLE command_center_inbox ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+-- Calendar rows are loaded once per sync by type
+CREATE INDEX IF NOT EXISTS idx_command_center_inbox_calendar ON command_center_inbox(event_uid) WHERE type = 'calendar';
+
+COMMENT ON COLUMN command_center_inbox.content_hash IS 'SHA256 of the synced calendar event fields, used to skip unchanged events';
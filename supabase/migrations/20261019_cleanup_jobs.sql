@@ -0,0 +1,21 @@
+-- Migration: cleanup_jobs
+-- Resumable background cleanup scans (crm-agent-service /run-cleanup)
+
+CREATE TABLE IF NOT EXISTS cleanup_jobs (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  entity_type TEXT NOT NULL DEFAULT 'contact',
+  status TEXT NOT NULL DEFAULT 'queued',  -- queued, running, interrupted, completed, failed
+  page_size INTEGER NOT NULL DEFAULT 500,
+  cursor TEXT,                            -- last entity ID processed (keyset checkpoint)
+  scanned INTEGER NOT NULL DEFAULT 0,
+  candidates INTEGER NOT NULL DEFAULT 0,
+  suggestions_created INTEGER NOT NULL DEFAULT 0,
+  error TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),  -- heartbeat, bumped every page
+  finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_cleanup_jobs_status_updated ON cleanup_jobs(status, updated_at);
+
+COMMENT ON TABLE cleanup_jobs IS 'Full-CRM cleanup scans; cursor is checkpointed after every page so a job resumes after a restart';
@@ -0,0 +1,9 @@
+-- Migration: contact_emails_normalized
+-- Lowercased, trimmed email for batch participant lookups (crm-agent-service)
+
+ALTER TABLE contact_emails
+  ADD COLUMN IF NOT EXISTS email_normalized TEXT GENERATED ALWAYS AS (lower(btrim(email))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_contact_emails_normalized ON contact_emails(email_normalized);
+
+COMMENT ON COLUMN contact_emails.email_normalized IS 'lower(btrim(email)); lets many addresses be resolved with one indexed IN query instead of ilike per address';
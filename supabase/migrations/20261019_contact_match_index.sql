@@ -0,0 +1,28 @@
+-- Migration: contact_match_index
+-- Persistent blocking index for incremental duplicate detection (crm-agent-service)
+
+-- Blocking keys per contact: "email:<address>", "mobile:<last 10 digits>", "name:<first>|<last>"
+CREATE TABLE IF NOT EXISTS contact_match_index (
+  block_key TEXT NOT NULL,
+  contact_id UUID NOT NULL REFERENCES contacts(contact_id) ON DELETE CASCADE,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (block_key, contact_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_contact_match_index_contact ON contact_match_index(contact_id);
+
+-- How far each incremental scan has got
+CREATE TABLE IF NOT EXISTS dedup_watermarks (
+  scope TEXT PRIMARY KEY,
+  watermark_at TIMESTAMPTZ,
+  watermark_id TEXT,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Change detection for the scan
+CREATE INDEX IF NOT EXISTS idx_contacts_last_modified_id ON contacts(last_modified_at, contact_id);
+CREATE INDEX IF NOT EXISTS idx_contact_emails_last_modified ON contact_emails(last_modified_at, email_id);
+CREATE INDEX IF NOT EXISTS idx_contact_mobiles_last_modified ON contact_mobiles(last_modified_at, mobile_id);
+
+COMMENT ON TABLE contact_match_index IS 'Duplicate-detection blocking keys per contact; only new/changed contacts are compared against it';
+COMMENT ON TABLE dedup_watermarks IS 'Last processed (timestamp, id) per incremental dedup scope';